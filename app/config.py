@@ -10,16 +10,106 @@ class Settings(BaseSettings):
 
     data_dir: Path = Path(__file__).resolve().parent.parent / "data"
     database_file: str = "planner.db"
+    # WAL + tuned pragmas, a query-only read pool and a single in-process writer
+    sqlite_tuning: bool = True
+    sqlite_cache_size_kib: int = 20000
+    sqlite_mmap_size_bytes: int = 256 * 1024 * 1024
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_read_pool_size: int = 8
+    sqlite_write_timeout_seconds: float = 30.0
+    migrate_on_startup: bool = True
+    ui_cache_max_age_seconds: int = 300
+    gzip_minimum_bytes: int = 1024
+    gzip_level: int = 6
     planner_start_hour: int = 9
     planner_end_hour: int = 17
     default_block_minutes: int = 20
+    planner_engine: str = "optimized"
+    planner_time_budget_ms: int = 50
+    # optimized engine: route candidates in insertion order until their durations
+    # fill the window this many times over, and never more than the cap
+    planner_candidate_fill: float = 2.0
+    planner_max_candidates: int = 60
+    plan_range_max_days: int = 62
     home_location_name: str = "Home Base"
     home_location_address: str | None = None
+    # "google", "offline" (stored coordinates + speed model, no network) or "auto"
+    geo_provider: str = "google"
+    # address -> (lat, lng) known to the offline provider
+    geo_coordinates: dict[str, tuple[float, float]] = {}
+    offline_speed_kmh: float = 35.0
+    offline_detour_factor: float = 1.3
+    offline_overhead_minutes: int = 3
+    geocode_cache_max_entries: int = 4096
+    geocode_miss_ttl_seconds: int = 7 * 24 * 3600
+    geocode_batch_size: int = 200
     google_maps_api_key: str | None = None
+    # point at a stand-in server (see bench/fake_google.py) for load tests
+    google_maps_base_url: str = "https://maps.googleapis.com"
+    google_timeout_seconds: float = 5.0
+    google_http2: bool = True
+    google_max_connections: int = 20
+    google_max_keepalive_connections: int = 10
+    google_keepalive_expiry_seconds: float = 30.0
+    places_max_concurrency: int = 8
+    place_cache_ttl_seconds: int = 30 * 24 * 3600
+    place_cache_max_entries: int = 1024
+    place_cache_max_rows: int = 20000
+    nlp_batch_size: int = 64
+    nlp_socket_path: str | None = None
+    nlp_sidecar_timeout_seconds: float = 30.0
+    nlp_sidecar_fallback: bool = False
+    nlp_server_max_batch: int = 64
+    nlp_server_max_wait_ms: float = 10.0
+    known_stores: list[str] = [
+        "Costco",
+        "Target",
+        "Walmart",
+        "Trader Joe's",
+        "Whole Foods",
+        "Safeway",
+        "Kroger",
+        "CVS",
+        "Walgreens",
+        "Home Depot",
+        "Lowe's",
+        "Best Buy",
+        "IKEA",
+    ]
+    gazetteer_refresh_seconds: int = 300
+    gazetteer_max_labels: int = 5000
+    bulk_max_tasks: int = 5000
+    export_batch_size: int = 1000
+    import_batch_size: int = 1000
+    tasks_page_size: int = 200
+    tasks_page_max: int = 1000
+    job_concurrency: int = 4
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: float = 1.0
+    estimate_refresh_batch_size: int = 500
+    travel_mode: str = "driving"
+    travel_cache_ttl_seconds: int = 7 * 24 * 3600
+    travel_cache_stale_seconds: int = 30 * 24 * 3600
+    travel_cache_max_entries: int = 2048
+    # cProfile capture of single requests; the middleware is not installed unless enabled
+    profiling_enabled: bool = False
+    profiling_header: str = "X-Profile"
+    # when set, the header must carry this value; keeps strangers from triggering captures
+    profiling_token: str | None = None
+    profiling_sample_rate: float = 0.0
+    profiling_max_files: int = 50
 
     @property
     def database_url(self) -> str:
         return f"sqlite:///{self.data_dir / self.database_file}"
 
+    @property
+    def async_database_url(self) -> str:
+        return f"sqlite+aiosqlite:///{self.data_dir / self.database_file}"
+
+    @property
+    def profiles_dir(self) -> Path:
+        return self.data_dir / "profiles"
+
 
 settings = Settings()
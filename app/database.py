@@ -1,6 +1,12 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from sqlalchemy.exc import OperationalError
+import asyncio
+import threading
+import weakref
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.concurrency import await_only, in_greenlet
 
 from .config import settings
 
@@ -9,42 +15,152 @@ class Base(DeclarativeBase):
     """Base model for SQLAlchemy."""
 
 
-settings.data_dir.mkdir(parents=True, exist_ok=True)
+def tune_sqlite(target, *, read_only: bool = False) -> None:
+    """Apply the production pragmas to every new DBAPI connection of ``target``."""
+
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms}",
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA cache_size = -{settings.sqlite_cache_size_kib}",
+        f"PRAGMA mmap_size = {settings.sqlite_mmap_size_bytes}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # WAL lets readers proceed while a plan is being written; the mode is persistent
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+
+    @event.listens_for(target, "connect")
+    def _apply(dbapi_connection, _record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
 
 engine = create_engine(
     settings.database_url,
     connect_args={"check_same_thread": False},
 )
+read_engine = create_engine(
+    settings.database_url,
+    connect_args={"check_same_thread": False},
+    pool_size=settings.sqlite_read_pool_size,
+)
+# the request path and background jobs run on aiosqlite; the sync engines serve
+# migrations, the command-line tools and tests. aiosqlite defaults to NullPool,
+# which would open a connection (and its thread) per session.
+async_engine = create_async_engine(settings.async_database_url, poolclass=AsyncAdaptedQueuePool)
+async_read_engine = create_async_engine(
+    settings.async_database_url,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.sqlite_read_pool_size,
+)
+if settings.sqlite_tuning:
+    tune_sqlite(engine)
+    tune_sqlite(read_engine, read_only=True)
+    tune_sqlite(async_engine.sync_engine)
+    tune_sqlite(async_read_engine.sync_engine, read_only=True)
+
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(bind=read_engine, autocommit=False, autoflush=False)
 
 
-def _ensure_task_columns() -> None:
-    statements = [
-        "ALTER TABLE tasks ADD COLUMN time_estimate_minutes INTEGER",
-        "ALTER TABLE tasks ADD COLUMN time_estimate_meta JSON",
-        "ALTER TABLE tasks ADD COLUMN time_estimate_travel_to_minutes INTEGER",
-        "ALTER TABLE tasks ADD COLUMN time_estimate_travel_back_minutes INTEGER",
-        "ALTER TABLE tasks ADD COLUMN time_estimate_shopping_minutes INTEGER",
-    ]
-    with engine.begin() as connection:
-        for stmt in statements:
-            try:
-                connection.execute(text(stmt))
-            except OperationalError as exc:
-                if "duplicate column" in str(exc).lower():
-                    continue
-                if "no such table" in str(exc).lower():
-                    break
-                raise
+class WriteSession(Session):
+    """Sync half of :data:`AsyncSessionLocal`; exists so the writer lock can be attached to it."""
+
+
+# loaded rows stay usable after commit: an expired attribute would need I/O outside the loop
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    sync_session_class=WriteSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+# SQLite allows one writer at a time; queue writers here instead of bouncing off SQLITE_BUSY.
+# Sync sessions wait on a thread lock, async ones on a lock of their event loop so a
+# queued writer costs a suspended coroutine rather than a blocked thread.
+_write_lock = threading.Lock()
+_loop_write_locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = weakref.WeakKeyDictionary()
 
 
-_ensure_task_columns()
+def _loop_write_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _loop_write_locks.get(loop)
+    if lock is None:
+        lock = _loop_write_locks[loop] = asyncio.Lock()
+    return lock
 
 
-def get_db():
-    """FastAPI dependency that provides a DB session."""
-    db = SessionLocal()
+def _loop_running() -> bool:
     try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _acquire_writer(session) -> None:
+    if session.info.get("writer"):
+        return
+    if not session.in_transaction():
+        # the lock is released when this transaction ends, so make sure there is one
+        session.begin()
+    timeout = settings.sqlite_write_timeout_seconds
+    if in_greenlet():
+        lock = _loop_write_lock()
+        try:
+            await_only(asyncio.wait_for(lock.acquire(), timeout))
+        except asyncio.TimeoutError:
+            raise TimeoutError("Timed out waiting for the database writer.") from None
+    else:
+        if _loop_running():
+            # a blocked acquire here would freeze every request on the loop for up to the timeout
+            raise RuntimeError(
+                "Sync session writing on the event loop thread; use AsyncSessionLocal or run_in_threadpool."
+            )
+        lock = _write_lock
+        if not lock.acquire(timeout=timeout):
+            raise TimeoutError("Timed out waiting for the database writer.")
+    session.info["writer"] = lock
+
+
+def serialize_writes(factory: sessionmaker | type[Session]) -> None:
+    """Hold the process-wide writer lock from a session's first write until its transaction ends."""
+
+    @event.listens_for(factory, "before_flush")
+    def _before_flush(session, _context, _instances) -> None:
+        _acquire_writer(session)
+
+    @event.listens_for(factory, "do_orm_execute")
+    def _before_execute(state) -> None:
+        if not state.is_select:
+            _acquire_writer(state.session)
+
+    @event.listens_for(factory, "after_transaction_end")
+    def _release(session, transaction) -> None:
+        if transaction.parent is None:
+            lock = session.info.pop("writer", None)
+            if lock is not None:
+                lock.release()
+
+
+serialize_writes(SessionLocal)
+serialize_writes(WriteSession)
+
+
+async def get_db():
+    """FastAPI dependency that provides a read-write DB session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db():
+    """FastAPI dependency for handlers that only read; never waits on the writer."""
+    async with AsyncReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
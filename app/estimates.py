@@ -0,0 +1,86 @@
+"""Time estimates (travel + on-site minutes) attached to tasks.
+
+Estimates are stored on the task together with a fingerprint of the inputs
+they were computed from (location, duration, home address), so reads serve
+the stored values and only tasks whose inputs changed are recomputed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import geo, metrics
+from .config import settings
+from .geo import estimate_travel_batch
+from .locations import get_home_location
+from .models import Task
+
+
+async def home_address_for(db: AsyncSession) -> str:
+    # read-only: callers may hold a query-only session
+    home = await get_home_location(db)
+    return (home.address if home else settings.home_location_address) or ""
+
+
+def estimate_basis(task: Task, home_address: str) -> str:
+    """Fingerprint of every input the stored estimate depends on, the geo provider included."""
+
+    located = bool(task.location)
+    raw = json.dumps(
+        [
+            task.location or "",
+            task.duration_minutes,
+            home_address if located else "",
+            geo.get_provider().name if located else "",
+        ]
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+async def populate_time_estimate(db: AsyncSession, tasks: Sequence[Task]) -> None:
+    """Recompute and store estimates for ``tasks``; the caller commits."""
+
+    if not tasks:
+        return
+    with metrics.time_estimates.time():
+        home_address = await home_address_for(db)
+        estimates = await estimate_travel_batch(home_address, [task.location for task in tasks if task.location])
+        for task in tasks:
+            task.time_estimate_basis = estimate_basis(task, home_address)
+            task.time_estimate_minutes = None
+            task.time_estimate_meta = None
+            task.time_estimate_travel_to_minutes = None
+            task.time_estimate_travel_back_minutes = None
+            task.time_estimate_shopping_minutes = None
+            if not home_address or not task.location:
+                continue
+            travel_to, travel_back, summary = estimates.get(task.location, (None, None, None))
+            if travel_to is None or travel_back is None:
+                # no basis either, so the next refresh retries the lookup
+                task.time_estimate_basis = None
+                continue
+            shopping_minutes = task.duration_minutes or settings.default_block_minutes
+            total = travel_to + travel_back + shopping_minutes
+            task.time_estimate_minutes = total
+            task.time_estimate_meta = {
+                "travel_to_minutes": travel_to,
+                "travel_back_minutes": travel_back,
+                "shopping_minutes": shopping_minutes,
+                "summary": summary or "Drive",
+            }
+            task.time_estimate_travel_to_minutes = travel_to
+            task.time_estimate_travel_back_minutes = travel_back
+            task.time_estimate_shopping_minutes = shopping_minutes
+
+
+async def refresh_time_estimates(db: AsyncSession, tasks: Sequence[Task]) -> list[Task]:
+    """Recompute only the estimates whose inputs changed; returns the tasks touched."""
+
+    home_address = await home_address_for(db)
+    stale = [task for task in tasks if task.time_estimate_basis != estimate_basis(task, home_address)]
+    await populate_time_estimate(db, stale)
+    return stale
@@ -0,0 +1,86 @@
+"""Phrase gazetteer of known store names used as the cheap first extraction tier."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .models import TaskLocationSuggestion
+from .place_cache import normalize_query
+
+
+class Gazetteer:
+    """Longest-match phrase lookup over normalized title tokens.
+
+    Phrases are stored as token tuples, so matching a title is a handful of
+    dict lookups per token regardless of how many phrases are known.
+    """
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self._phrases: dict[tuple[str, ...], str] = {}
+        for name in names:
+            tokens = tuple(normalize_query(name).split())
+            if tokens:
+                self._phrases.setdefault(tokens, name.strip())
+        self.max_tokens = max((len(tokens) for tokens in self._phrases), default=0)
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and tuple(normalize_query(name).split()) in self._phrases
+
+    def match(self, title: str) -> list[str]:
+        tokens = normalize_query(title).split()
+        matches: list[str] = []
+        index = 0
+        while index < len(tokens):
+            for size in range(min(self.max_tokens, len(tokens) - index), 0, -1):
+                name = self._phrases.get(tuple(tokens[index : index + size]))
+                if name is not None:
+                    if name not in matches:
+                        matches.append(name)
+                    index += size
+                    break
+            else:
+                index += 1
+        return matches
+
+
+_lock = threading.Lock()
+_cached: Gazetteer | None = None
+_built_at = 0.0
+
+
+async def _load_labels(db: AsyncSession) -> list[str]:
+    stmt = (
+        select(TaskLocationSuggestion.label)
+        .group_by(TaskLocationSuggestion.label)
+        .order_by(func.max(TaskLocationSuggestion.id).desc())
+        .limit(settings.gazetteer_max_labels)
+    )
+    return [label for label in (await db.execute(stmt)).scalars() if label]
+
+
+async def get_gazetteer(db: AsyncSession) -> Gazetteer:
+    """Return the shared gazetteer, rebuilding it when invalidated or older than the refresh window."""
+
+    global _cached, _built_at
+    with _lock:
+        if _cached is not None and time.monotonic() - _built_at < settings.gazetteer_refresh_seconds:
+            return _cached
+    gazetteer = Gazetteer([*settings.known_stores, *await _load_labels(db)])
+    with _lock:
+        _cached, _built_at = gazetteer, time.monotonic()
+    return gazetteer
+
+
+def invalidate() -> None:
+    global _cached
+    with _lock:
+        _cached = None
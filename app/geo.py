@@ -0,0 +1,208 @@
+"""Pluggable providers for place search, geocoding and travel times.
+
+``settings.geo_provider`` selects one:
+
+* ``google`` - Places, Geocoding and Distance Matrix behind the two-tier
+  caches; the accurate option.
+* ``offline`` - great-circle distance between stored coordinates turned into
+  minutes by a simple speed model; answers instantly and never touches the
+  network, for development, tests and degraded deployments.
+* ``auto`` - Google when an API key is configured, offline otherwise.
+
+Callers use the module-level functions, which dispatch to the active provider.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Iterable, Protocol, Sequence
+
+from . import places
+from .config import settings
+from .place_cache import normalize_query
+from .places import TravelEstimate
+from .travel_cache import normalize_address
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python path is fine for a day's worth of stops
+    np = None
+
+Coordinates = tuple[float, float]
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class GeoProvider(Protocol):
+    name: str
+
+    async def search(self, query: str, near: str, *, max_results: int = 2) -> list[dict[str, str]]:
+        ...
+
+    async def geocode(self, addresses: Sequence[str]) -> dict[str, Coordinates | None]:
+        """Coordinates per address; ``None`` for no match, absent when the lookup failed."""
+        ...
+
+    async def travel_batch(self, home_address: str, addresses: Iterable[str]) -> dict[str, TravelEstimate]:
+        ...
+
+    async def travel_matrix(self, addresses: Sequence[str]) -> dict[tuple[str, str], int]:
+        ...
+
+
+class GoogleProvider:
+    name = "google"
+
+    async def search(self, query: str, near: str, *, max_results: int = 2) -> list[dict[str, str]]:
+        return await places.search_places(query, near, max_results=max_results)
+
+    async def geocode(self, addresses: Sequence[str]) -> dict[str, Coordinates | None]:
+        return await places.geocode_addresses(addresses)
+
+    async def travel_batch(self, home_address: str, addresses: Iterable[str]) -> dict[str, TravelEstimate]:
+        return await places.estimate_travel_batch(home_address, addresses)
+
+    async def travel_matrix(self, addresses: Sequence[str]) -> dict[tuple[str, str], int]:
+        return await places.estimate_travel_matrix(addresses)
+
+
+def haversine_km(origins: Sequence[Coordinates], destinations: Sequence[Coordinates]) -> list[list[float]]:
+    """Great-circle distances in km, one row per origin; vectorized when numpy is installed."""
+
+    if not origins or not destinations:
+        return [[] for _ in origins]
+    if np is not None:
+        lat1, lng1 = np.radians(np.asarray(origins, dtype=float)).T[:, :, None]
+        lat2, lng2 = np.radians(np.asarray(destinations, dtype=float)).T[:, None, :]
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))).tolist()
+
+    rows = []
+    for lat1, lng1 in origins:
+        phi1, cos1 = math.radians(lat1), math.cos(math.radians(lat1))
+        row = []
+        for lat2, lng2 in destinations:
+            phi2 = math.radians(lat2)
+            a = math.sin((phi2 - phi1) / 2) ** 2 + cos1 * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+            row.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(max(a, 0.0), 1.0))))
+        rows.append(row)
+    return rows
+
+
+def drive_minutes(km: float) -> int:
+    """Speed model: road distance is ``km * detour factor``, plus a fixed overhead per trip."""
+
+    if km <= 0:
+        return 0
+    road_km = km * settings.offline_detour_factor
+    return max(1, math.ceil(road_km / settings.offline_speed_kmh * 60) + settings.offline_overhead_minutes)
+
+
+class OfflineProvider:
+    name = "offline"
+
+    def __init__(self) -> None:
+        self._source: dict | None = None
+        self._configured: dict[str, Coordinates] = {}
+        self._searchable: list[tuple[str, str]] = []
+
+    def _index(self) -> tuple[dict[str, Coordinates], list[tuple[str, str]]]:
+        """Normalized views of ``settings.geo_coordinates``, rebuilt only when the setting is replaced."""
+
+        source = settings.geo_coordinates
+        if source is not self._source:
+            self._configured = {normalize_address(address): tuple(point) for address, point in source.items()}
+            self._searchable = [(normalize_query(address), address) for address in source]
+            self._source = source
+        return self._configured, self._searchable
+
+    async def coordinates(self, addresses: Iterable[str]) -> dict[str, Coordinates]:
+        """Configured coordinates first, then those already geocoded into ``geo_points``."""
+
+        from .geocoding import lookup
+
+        addresses = [address for address in addresses if address]
+        configured, _ = self._index()
+        found: dict[str, Coordinates] = {}
+        for address in addresses:
+            point = configured.get(normalize_address(address))
+            if point is not None:
+                found[address] = point
+        unknown = [address for address in addresses if address not in found]
+        if unknown:
+            found.update(await lookup(unknown))
+        return found
+
+    async def search(self, query: str, near: str, *, max_results: int = 2) -> list[dict[str, str]]:
+        """Known addresses mentioning ``query``, nearest to ``near`` first."""
+
+        needle = normalize_query(query)
+        if not needle:
+            return []
+        _, searchable = self._index()
+        matches = [address for normalized, address in searchable if needle in normalized]
+        origin = (await self.coordinates([near])).get(near)
+        if origin is not None and matches:
+            points = await self.coordinates(matches)
+            distances = haversine_km([origin], [points[address] for address in matches])[0]
+            matches = [address for _, address in sorted(zip(distances, matches))]
+        return [{"name": query, "address": address} for address in matches[:max_results]]
+
+    async def geocode(self, addresses: Sequence[str]) -> dict[str, Coordinates | None]:
+        return await self.coordinates(addresses)
+
+    async def travel_batch(self, home_address: str, addresses: Iterable[str]) -> dict[str, TravelEstimate]:
+        addresses = [address for address in dict.fromkeys(addresses) if address]
+        points = await self.coordinates([home_address, *addresses])
+        home = points.get(home_address)
+        located = [address for address in addresses if address in points]
+        if home is None or not located:
+            return {}
+        # great-circle distance is symmetric, so one row serves both legs
+        distances = haversine_km([home], [points[address] for address in located])[0]
+        return {
+            address: (drive_minutes(km), drive_minutes(km), f"~{km * settings.offline_detour_factor:.1f} km (offline)")
+            for address, km in zip(located, distances)
+        }
+
+    async def travel_matrix(self, addresses: Sequence[str]) -> dict[tuple[str, str], int]:
+        points = await self.coordinates(addresses)
+        located = list(dict.fromkeys(address for address in addresses if address in points))
+        distances = haversine_km([points[a] for a in located], [points[a] for a in located])
+        return {
+            (origin, destination): drive_minutes(distances[i][j])
+            for i, origin in enumerate(located)
+            for j, destination in enumerate(located)
+            if i != j
+        }
+
+
+PROVIDERS: dict[str, type] = {"google": GoogleProvider, "offline": OfflineProvider}
+_instances: dict[str, GeoProvider] = {}
+
+
+def get_provider() -> GeoProvider:
+    name = settings.geo_provider
+    if name == "auto":
+        name = "google" if settings.google_maps_api_key else "offline"
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown geo provider {settings.geo_provider!r}")
+    if name not in _instances:
+        _instances[name] = PROVIDERS[name]()
+    return _instances[name]
+
+
+async def search_places(query: str, near: str, *, max_results: int = 2) -> list[dict[str, str]]:
+    return await get_provider().search(query, near, max_results=max_results)
+
+
+async def geocode(addresses: Sequence[str]) -> dict[str, Coordinates | None]:
+    return await get_provider().geocode(addresses)
+
+
+async def estimate_travel_batch(home_address: str, task_addresses: Iterable[str]) -> dict[str, TravelEstimate]:
+    return await get_provider().travel_batch(home_address, task_addresses)
+
+
+async def estimate_travel_matrix(addresses: Sequence[str]) -> dict[tuple[str, str], int]:
+    return await get_provider().travel_matrix(addresses)
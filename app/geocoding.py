@@ -0,0 +1,147 @@
+"""Coordinates for free-text addresses, resolved once and kept in ``geo_points``.
+
+Rows are keyed by the normalized address, so "1 Main St" and "1  main st"
+share one. Lookups go memory LRU, then the table; only addresses never seen
+before (or whose recorded miss has expired) reach the geo provider. With
+coordinates stored, distance questions can be answered locally.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from . import geo
+from .cache import LRUCache
+from .config import settings
+from .database import AsyncSessionLocal
+from .models import GeoPoint
+from .travel_cache import normalize_address
+
+logger = logging.getLogger(__name__)
+
+Coordinates = tuple[float, float]
+
+# stays under SQLite's bound-parameter limit
+_QUERY_CHUNK = 500
+
+_memory = LRUCache(maxsize=settings.geocode_cache_max_entries)
+
+
+def _normalized(addresses: Iterable[str]) -> dict[str, str]:
+    return {address: normalize_address(address) for address in addresses if address}
+
+
+async def _stored(keys: set[str]) -> dict[str, Coordinates | None]:
+    """Known keys: coordinates, or ``None`` for a miss that has not expired yet."""
+
+    known: dict[str, Coordinates | None] = {}
+    missing = []
+    for key in keys:
+        point = _memory.get(key)
+        if point is None:
+            missing.append(key)
+        else:
+            known[key] = point
+    if not missing:
+        return known
+
+    miss_cutoff = datetime.utcnow() - timedelta(seconds=settings.geocode_miss_ttl_seconds)
+    try:
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(missing), _QUERY_CHUNK):
+                stmt = select(GeoPoint).where(GeoPoint.address.in_(missing[start : start + _QUERY_CHUNK]))
+                for row in (await db.execute(stmt)).scalars():
+                    if row.lat is None or row.lng is None:
+                        if row.resolved_at >= miss_cutoff:
+                            known[row.address] = None
+                        continue
+                    known[row.address] = (row.lat, row.lng)
+                    _memory.set(row.address, known[row.address])
+    except SQLAlchemyError:
+        logger.warning("geocode lookup failed", exc_info=True)
+    return known
+
+
+async def _store(points: dict[str, Coordinates | None], source: str) -> None:
+    if not points:
+        return
+    now = datetime.utcnow()
+    rows = [
+        {
+            "address": key,
+            "lat": point[0] if point else None,
+            "lng": point[1] if point else None,
+            "source": source,
+            "resolved_at": now,
+        }
+        for key, point in points.items()
+    ]
+    stmt = insert(GeoPoint)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GeoPoint.address],
+        set_={"lat": stmt.excluded.lat, "lng": stmt.excluded.lng, "source": stmt.excluded.source, "resolved_at": now},
+    )
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt, rows)
+            await db.commit()
+    except SQLAlchemyError:
+        logger.warning("geocode store failed", exc_info=True)
+        return
+    for key, point in points.items():
+        if point is not None:
+            _memory.set(key, point)
+
+
+async def lookup(addresses: Iterable[str]) -> dict[str, Coordinates]:
+    """Stored coordinates for ``addresses``; never calls the provider."""
+
+    normalized = _normalized(addresses)
+    known = await _stored(set(normalized.values()))
+    return {address: known[key] for address, key in normalized.items() if known.get(key)}
+
+
+async def resolve(addresses: Iterable[str]) -> dict[str, Coordinates]:
+    """Coordinates for ``addresses``, asking the provider only about unseen ones."""
+
+    normalized = _normalized(addresses)
+    known = await _stored(set(normalized.values()))
+    missing: dict[str, str] = {}
+    for address, key in normalized.items():
+        if key not in known:
+            missing.setdefault(key, address)
+
+    if missing:
+        provider = geo.get_provider()
+        found = await provider.geocode(list(missing.values()))
+        # absent means the lookup itself failed; only a definite "no match" is remembered
+        resolved = {key: found[address] for key, address in missing.items() if address in found}
+        await _store(resolved, provider.name)
+        known.update(resolved)
+    return {address: known[key] for address, key in normalized.items() if known.get(key)}
+
+
+async def distances_km(origin: str, addresses: Iterable[str]) -> dict[str, float]:
+    """Great-circle km from ``origin`` to every address with stored coordinates."""
+
+    addresses = list(dict.fromkeys(address for address in addresses if address))
+    points = await lookup([origin, *addresses])
+    start = points.get(origin)
+    located = [address for address in addresses if address in points]
+    if start is None or not located:
+        return {}
+    return dict(zip(located, geo.haversine_km([start], [points[address] for address in located])[0]))
+
+
+def clear_memory() -> None:
+    _memory.clear()
+
+
+def stats() -> dict[str, int]:
+    return _memory.stats()
@@ -0,0 +1,158 @@
+"""In-process asyncio job queue with bounded concurrency and retries."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict[str, Any]], Awaitable[None]]
+FailureHandler = Callable[[dict[str, Any], BaseException], Awaitable[None] | None]
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: dict[str, Any]
+    status: str = "queued"
+    attempts: int = 0
+    error: str | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class JobQueue:
+    """Run registered handlers on a fixed pool of worker coroutines.
+
+    Failed jobs are retried with exponential backoff up to ``max_attempts``;
+    the optional failure hook runs once the last attempt has failed.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int,
+        max_attempts: int,
+        retry_backoff_seconds: float,
+        history_size: int = 1000,
+    ) -> None:
+        self.concurrency = max(concurrency, 1)
+        self.max_attempts = max(max_attempts, 1)
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.history_size = history_size
+        self._handlers: dict[str, tuple[Handler, FailureHandler | None]] = {}
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._queue: asyncio.Queue[Job] | None = None
+        self._workers: list[asyncio.Task] = []
+
+    def register(self, kind: str, handler: Handler, *, on_failure: FailureHandler | None = None) -> None:
+        self._handlers[kind] = (handler, on_failure)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{index}")
+            for index in range(self.concurrency)
+        ]
+
+    async def stop(self, *, timeout: float = 5.0) -> None:
+        """Give queued jobs ``timeout`` seconds to drain, then cancel the workers."""
+
+        if not self.running or self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("job queue stopped with %d jobs pending", self._queue.qsize())
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def enqueue(self, kind: str, **payload: Any) -> Job:
+        if kind not in self._handlers:
+            raise KeyError(f"No handler registered for job kind {kind!r}")
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running.")
+        job = Job(id=uuid.uuid4().hex, kind=kind, payload=payload)
+        self._remember(job)
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    async def join(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+
+    def _remember(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history_size:
+            self._jobs.popitem(last=False)
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            try:
+                await self._run(job)
+            finally:
+                queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        handler, on_failure = self._handlers[job.kind]
+        job.started_at = datetime.utcnow()
+        while True:
+            job.status = "running"
+            job.attempts += 1
+            try:
+                await handler(job.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001 - every failure is retried or recorded
+                job.error = f"{type(exc).__name__}: {exc}"
+                if job.attempts < self.max_attempts:
+                    job.status = "retrying"
+                    await asyncio.sleep(self.retry_backoff_seconds * 2 ** (job.attempts - 1))
+                    continue
+                job.status = "failed"
+                job.finished_at = datetime.utcnow()
+                logger.warning("job %s (%s) failed after %d attempts", job.id, job.kind, job.attempts)
+                if on_failure is not None:
+                    try:
+                        result = on_failure(job.payload, exc)
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except Exception:  # noqa: BLE001 - the job is already marked failed
+                        logger.exception("failure hook for job %s raised", job.id)
+                return
+            job.status = "succeeded"
+            job.error = None
+            job.finished_at = datetime.utcnow()
+            return
+
+
+job_queue = JobQueue(
+    concurrency=settings.job_concurrency,
+    max_attempts=settings.job_max_attempts,
+    retry_backoff_seconds=settings.job_retry_backoff_seconds,
+)
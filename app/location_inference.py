@@ -2,84 +2,201 @@
 
 from __future__ import annotations
 
-from sqlalchemy.orm import Session
-
+import asyncio
+import threading
+from collections import Counter
+from typing import Sequence
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import gazetteer as gazetteer_index
+from .config import settings
+from .gazetteer import Gazetteer
+from .geo import search_places
 from .locations import ensure_home_location
 from .models import Task, TaskLocationSuggestion
-from .nlp import get_nlp
-from .places import search_places
+from .nlp import extract_entities
+from .place_cache import normalize_query
 
 STORE_LABELS = {"ORG", "FAC", "GPE", "LOC", "PRODUCT"}
 FALLBACK_SEPARATORS = [" at ", " @ ", " from ", " to "]
+EXTRACTION_TIERS = ("gazetteer", "heuristic", "model", "miss")
+
+_tier_hits: Counter[str] = Counter()
+_tier_lock = threading.Lock()
 
 
-def _extract_queries(title: str) -> list[str]:
-    title = title or ""
-    nlp = get_nlp()
+def _fallback_queries(title: str) -> list[str]:
     matches: list[str] = []
-    seen: set[str] = set()
-    if nlp and title:
-        doc = nlp(title)
-        for ent in doc.ents:
-            if ent.label_ in STORE_LABELS:
-                text = ent.text.strip()
-                if text and text not in seen:
-                    matches.append(text)
-                    seen.add(text)
-
-    if not matches:
-        lowered = title.lower()
-        for sep in FALLBACK_SEPARATORS:
-            idx = lowered.find(sep)
-            if idx != -1:
-                start = idx + len(sep)
-                part = title[start:]
-                hint = part.split(" and ")[0].split(",")[0].strip()
-                hint = hint.rstrip(".!?")
-                if hint and hint not in seen:
-                    matches.append(hint)
-                    seen.add(hint)
+    lowered = title.lower()
+    for sep in FALLBACK_SEPARATORS:
+        idx = lowered.find(sep)
+        if idx != -1:
+            start = idx + len(sep)
+            part = title[start:]
+            hint = part.split(" and ")[0].split(",")[0].strip()
+            hint = hint.rstrip(".!?")
+            if hint and hint not in matches:
+                matches.append(hint)
     return matches
 
 
-def infer_locations(db: Session, title: str) -> list[dict[str, str | None]]:
+def _model_queries(titles: Sequence[str]) -> list[list[str]] | None:
+    """Run transformer NER over ``titles`` as one batch, if a model is reachable."""
+
+    indexed = [(index, title) for index, title in enumerate(titles) if title]
+    entities = extract_entities([title for _, title in indexed])
+    if entities is None:
+        return None
+    extracted: list[list[str]] = [[] for _ in titles]
+    for (index, _), ents in zip(indexed, entities):
+        for text, label in ents:
+            text = text.strip()
+            if label in STORE_LABELS and text and text not in extracted[index]:
+                extracted[index].append(text)
+    return extracted
+
+
+def _extract_queries_batch(
+    titles: Sequence[str],
+    gazetteer: Gazetteer | None = None,
+    *,
+    use_model: bool = False,
+) -> list[list[str]]:
+    """Extract place queries tier by tier: gazetteer, separator heuristics, then the model.
+
+    The transformer only sees titles both cheap tiers missed, unless
+    ``use_model`` asks for it up front.
+    """
+
+    titles = [title or "" for title in titles]
+    extracted: list[list[str]] = [[] for _ in titles]
+    tiers: list[str] = ["miss"] * len(titles)
+
+    if use_model:
+        modelled = _model_queries(titles) or extracted
+        for index, queries in enumerate(modelled):
+            if queries:
+                extracted[index], tiers[index] = queries, "model"
+
+    for index, title in enumerate(titles):
+        if extracted[index] or not title:
+            continue
+        if gazetteer is not None:
+            extracted[index] = gazetteer.match(title)
+            tiers[index] = "gazetteer" if extracted[index] else "miss"
+        if not extracted[index]:
+            extracted[index] = _fallback_queries(title)
+            tiers[index] = "heuristic" if extracted[index] else "miss"
+
+    remaining = [index for index, title in enumerate(titles) if title and not extracted[index]]
+    if remaining and not use_model:
+        modelled = _model_queries([titles[index] for index in remaining]) or []
+        for index, queries in zip(remaining, modelled):
+            if queries:
+                extracted[index], tiers[index] = queries, "model"
+
+    with _tier_lock:
+        _tier_hits.update(tiers)
+    return extracted
+
+
+def extraction_stats() -> dict[str, int]:
+    with _tier_lock:
+        return {tier: _tier_hits[tier] for tier in EXTRACTION_TIERS}
+
+
+async def infer_locations_batch(
+    db: AsyncSession,
+    titles: Sequence[str],
+    *,
+    use_model: bool = False,
+) -> list[list[dict[str, str | None]]]:
+    """Infer suggestions for many titles, searching each distinct place query only once."""
+
+    if not titles:
+        return []
+    gazetteer = await gazetteer_index.get_gazetteer(db)
+    # spaCy inference is CPU-bound; keep it off the event loop
+    queries_per_title = await asyncio.to_thread(
+        _extract_queries_batch,
+        list(titles),
+        gazetteer,
+        use_model=use_model,
+    )
+    if not any(queries_per_title):
+        return [[] for _ in titles]
+
+    home = await ensure_home_location(db)
+    if not home.address:
+        return [[] for _ in titles]
+
+    unique: dict[str, str] = {}
+    for queries in queries_per_title:
+        for query in queries:
+            unique.setdefault(normalize_query(query), query)
+
+    # Places lookups run concurrently, bounded so a large import cannot flood the pool
+    semaphore = asyncio.Semaphore(settings.places_max_concurrency)
+
+    async def _search(query: str) -> list[dict[str, str]]:
+        async with semaphore:
+            return await search_places(query, home.address)
+
+    found = await asyncio.gather(*(_search(query) for query in unique.values()))
+    places_by_query = dict(zip(unique, found))
+
+    suggestions: list[list[dict[str, str | None]]] = []
+    for queries in queries_per_title:
+        items: list[dict[str, str | None]] = []
+        for query in queries:
+            for place in places_by_query[normalize_query(query)]:
+                items.append(
+                    {
+                        "name": place.get("name", query),
+                        "address": place.get("address"),
+                    }
+                )
+        suggestions.append(items)
+    return suggestions
+
+
+async def infer_locations(db: AsyncSession, title: str, *, use_model: bool = False) -> list[dict[str, str | None]]:
     """Infer potential location dicts for a given title without mutating state."""
 
-    queries = _extract_queries(title or "")
-    if not queries:
-        return []
+    return (await infer_locations_batch(db, [title or ""], use_model=use_model))[0]
 
-    home = ensure_home_location(db)
-    if not home.address:
-        return []
 
-    suggestions: list[dict[str, str | None]] = []
-    for query in queries:
-        places = search_places(query, home.address)
+async def refresh_location_suggestions(db: AsyncSession, tasks: Sequence[Task]) -> None:
+    """Rebuild location suggestions for ``tasks`` in a single transaction."""
+
+    if not tasks:
+        return
+    inferred = await infer_locations_batch(db, [task.title or "" for task in tasks])
+
+    await db.execute(
+        delete(TaskLocationSuggestion).where(TaskLocationSuggestion.task_id.in_([task.id for task in tasks]))
+    )
+    for task, places in zip(tasks, inferred):
         for place in places:
-            suggestions.append(
-                {
-                    "name": place.get("name", query),
-                    "address": place.get("address"),
-                }
+            db.add(
+                TaskLocationSuggestion(
+                    task_id=task.id,
+                    label=place.get("name") or "",
+                    address=place.get("address"),
+                )
             )
-    return suggestions
+    await db.commit()
+    known = await gazetteer_index.get_gazetteer(db)
+    labels = [place.get("name") or "" for places in inferred for place in places]
+    if any(label and label not in known for label in labels):
+        # new labels become gazetteer phrases on the next lookup
+        gazetteer_index.invalidate()
 
 
-def refresh_task_location_suggestions(db: Session, task: Task) -> None:
+async def refresh_task_location_suggestions(db: AsyncSession, task: Task) -> None:
     """Rebuild location suggestions for a task based on its title."""
 
-    for suggestion in list(task.location_suggestions):
-        db.delete(suggestion)
-    db.commit()
-
-    suggestions = infer_locations(db, task.title or "")
-    for place in suggestions:
-        suggestion = TaskLocationSuggestion(
-            task_id=task.id,
-            label=place.get("name") or "",
-            address=place.get("address"),
-        )
-        db.add(suggestion)
-    db.commit()
-    db.refresh(task)
+    await refresh_location_suggestions(db, [task])
+    await db.refresh(task)
@@ -2,18 +2,20 @@
 
 from __future__ import annotations
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .config import settings
 from .models import Location
 
 
-def get_home_location(db: Session) -> Location | None:
-    return db.query(Location).filter(Location.is_home.is_(True)).first()
+async def get_home_location(db: AsyncSession) -> Location | None:
+    stmt = select(Location).where(Location.is_home.is_(True)).limit(1)
+    return (await db.execute(stmt)).scalars().first()
 
 
-def ensure_home_location(db: Session) -> Location:
-    home = get_home_location(db)
+async def ensure_home_location(db: AsyncSession) -> Location:
+    home = await get_home_location(db)
     if home:
         return home
 
@@ -23,24 +25,22 @@ def ensure_home_location(db: Session) -> Location:
         is_home=True,
     )
     db.add(home)
-    db.commit()
-    db.refresh(home)
+    await db.commit()
     return home
 
 
-def save_home_location(
-    db: Session,
+async def save_home_location(
+    db: AsyncSession,
     *,
     name: str,
     address: str | None = None,
 ) -> Location:
-    home = get_home_location(db)
+    home = await get_home_location(db)
     if not home:
         home = Location(is_home=True)
         db.add(home)
 
     home.name = name
     home.address = address
-    db.commit()
-    db.refresh(home)
+    await db.commit()
     return home
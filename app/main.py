@@ -1,169 +1,417 @@
-from datetime import date, datetime, timedelta
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import Literal, Optional
 from pathlib import Path
+from urllib.parse import urlencode
 
-from fastapi import Depends, FastAPI, HTTPException, Response
-from fastapi.responses import HTMLResponse
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy import case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from . import geocoding, metrics, place_cache, places, profiling, travel_cache
 from .config import settings
-from .database import Base, engine, get_db
-from .location_inference import infer_locations, refresh_task_location_suggestions
-from .locations import ensure_home_location, save_home_location
-from .models import PlanBlock, Reminder, Task
-from .places import estimate_travel_segments
-from .planner import day_bounds, generate_plan, get_plan_for_date
+from .database import async_engine, async_read_engine, get_db, get_read_db
+from .estimates import refresh_time_estimates
+from .jobs import job_queue
+from .location_inference import extraction_stats, infer_locations
+from .locations import ensure_home_location, get_home_location, save_home_location
+from .migrations import migrate
+from .static_assets import StaticAsset
+from .table_versions import Validators, validators
+from .task_queries import InvalidCursor, TaskFilters, list_tasks_page
+from .transfer import ImportFormatError, aiter_export, import_stream
+from .models import PlanBlock, Task
+from .pipeline import (
+    enqueue_estimate_refresh,
+    enqueue_geocode_backfill,
+    enqueue_task_inference,
+    resume_task_inference,
+)
+from .planner import generate_plan, get_plan_blocks, get_plan_for_date, get_reminders, replan
 from .schemas import (
+    PlanRangeResponse,
     PlanRequest,
     PlanResponse,
     PlanBlockRead,
     ReminderRead,
+    TaskBulkCreate,
     TaskCreate,
+    TaskReorder,
     TaskRead,
     TaskUpdate,
     LocationRead,
     LocationUpsert,
     ClientConfig,
+    ExtractionStats,
+    JobRead,
+    ProfileRead,
     LocationInferenceRequest,
     LocationSuggestionPreview,
 )
 
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    began = time.perf_counter()
+    if settings.migrate_on_startup:
+        await asyncio.to_thread(migrate)
+    if index_page.path.exists():
+        # precompress once so the first page view pays nothing
+        await asyncio.to_thread(index_page.load)
+    await places.open_client()
+    await job_queue.start()
+    resumed = await resume_task_inference()
+    if resumed:
+        logger.info("resumed location inference for %d tasks", sum(len(job.payload["task_ids"]) for job in resumed))
+    app.state.startup_seconds = time.perf_counter() - began
+    logger.info("worker ready in %.1f ms", app.state.startup_seconds * 1000)
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        await places.close_client()
+        await async_engine.dispose()
+        await async_read_engine.dispose()
+
 
 app = FastAPI(
     title="AI Day Planner MVP",
     version="0.1.0",
     description="Minimal FastAPI + SQLite backend for experimenting with planning flows.",
+    lifespan=lifespan,
 )
 
+class NotModified(Exception):
+    def __init__(self, validators: Validators) -> None:
+        self.validators = validators
+
+
+def _validator_headers(current: Validators) -> dict[str, str]:
+    headers = {"ETag": current.etag, "Cache-Control": "no-cache"}
+    if current.last_modified_header:
+        headers["Last-Modified"] = current.last_modified_header
+    return headers
+
+
+def conditional(*tables: str):
+    """Dependency answering ``304`` from the tables' change counters before the handler runs."""
+
+    async def dependency(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)) -> Validators:
+        # parameter order and repeats of the same query must not change the tag
+        query = urlencode(sorted(request.query_params.multi_items()))
+        current = await validators(db, tables, query)
+        if current.matches(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+            raise NotModified(current)
+        response.headers.update(_validator_headers(current))
+        return current
+
+    return dependency
+
+
+@app.exception_handler(NotModified)
+async def not_modified(_: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers=_validator_headers(exc.validators))
+
+
 STATIC_DIR = Path(__file__).parent / "static"
 STATIC_DIR.mkdir(parents=True, exist_ok=True)
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
-
-
-def populate_time_estimate(db: Session, tasks: list[Task]) -> None:
-    if not tasks:
-        return
-    home = ensure_home_location(db)
-    home_address = home.address or ""
-    for task in tasks:
-        task.time_estimate_minutes = None
-        task.time_estimate_meta = None
-        task.time_estimate_travel_to_minutes = None
-        task.time_estimate_travel_back_minutes = None
-        task.time_estimate_shopping_minutes = None
-        if not home_address or not task.location:
-            continue
-        travel_to, travel_back, summary = estimate_travel_segments(home_address, task.location)
-        if travel_to is None or travel_back is None:
-            continue
-        shopping_minutes = task.duration_minutes or settings.default_block_minutes
-        total = travel_to + travel_back + shopping_minutes
-        task.time_estimate_minutes = total
-        task.time_estimate_meta = {
-            "travel_to_minutes": travel_to,
-            "travel_back_minutes": travel_back,
-            "shopping_minutes": shopping_minutes,
-            "summary": summary or "Drive",
-        }
-        task.time_estimate_travel_to_minutes = travel_to
-        task.time_estimate_travel_back_minutes = travel_back
-        task.time_estimate_shopping_minutes = shopping_minutes
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_bytes, compresslevel=settings.gzip_level)
+if settings.profiling_enabled:
+    app.add_middleware(profiling.ProfilingMiddleware)
+# outermost, so latencies include compression and profiling
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_sqlalchemy()
+index_page = StaticAsset(STATIC_DIR / "index.html", media_type="text/html; charset=utf-8")
 
 
 @app.get("/", response_class=HTMLResponse)
-def client_home() -> HTMLResponse:
-    index_path = STATIC_DIR / "index.html"
-    if not index_path.exists():
+async def client_home(request: Request) -> Response:
+    if not index_page.path.exists():
         raise HTTPException(status_code=404, detail="Sample client not found.")
-    return HTMLResponse(content=index_path.read_text(encoding="utf-8"))
+    return index_page.response(request)
 
 
 @app.get("/health")
-def healthcheck():
-    return {"status": "ok", "timestamp": datetime.utcnow()}
+async def healthcheck(request: Request):
+    startup = getattr(request.app.state, "startup_seconds", None)
+    return {
+        "status": "ok",
+        "timestamp": datetime.utcnow(),
+        "startup_ms": round(startup * 1000, 1) if startup is not None else None,
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics() -> Response:
+    travel, searches, points = travel_cache.stats(), place_cache.stats(), geocoding.stats()
+    metrics.record_cache("travel_time", entries=travel["size"], hits={"memory": travel["hits"]}, misses=travel["misses"])
+    metrics.record_cache(
+        "place_search",
+        entries=searches["size"],
+        hits={"memory": searches["memory_hits"], "db": searches["db_hits"]},
+        misses=searches["misses"],
+    )
+    metrics.record_cache("geocode", entries=points["size"], hits={"memory": points["hits"]}, misses=points["misses"])
+    for tier, count in extraction_stats().items():
+        metrics.extraction_tiers.set(count, tier=tier)
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def profile_access(request: Request) -> None:
+    # dumps expose source paths and internals: same header and token as triggering a capture
+    if not settings.profiling_enabled or not profiling.header_allows(request.headers):
+        raise HTTPException(status_code=404, detail="Profiling is disabled.")
+
+
+@app.get(
+    "/profiles",
+    response_model=list[ProfileRead],
+    include_in_schema=False,
+    dependencies=[Depends(profile_access)],
+)
+async def list_profiles(limit: int = Query(20, ge=1, le=200)):
+    return await asyncio.to_thread(profiling.recent_captures, limit)
+
+
+@app.get("/profiles/{capture_id}", include_in_schema=False, dependencies=[Depends(profile_access)])
+async def download_profile(capture_id: str):
+    path = profiling.capture_path(capture_id)
+    if path is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Profile not found. Captures are written once the response body has finished; retry shortly.",
+        )
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
 
 
 @app.get("/client/config", response_model=ClientConfig)
-def client_config() -> ClientConfig:
+async def client_config() -> ClientConfig:
     return ClientConfig(google_maps_api_key=settings.google_maps_api_key)
 
 
-@app.get("/locations/home", response_model=LocationRead)
-def read_home_location(db: Session = Depends(get_db)):
-    home = ensure_home_location(db)
+@app.get("/locations/home", response_model=LocationRead, dependencies=[Depends(conditional("locations"))])
+async def read_home_location(db: AsyncSession = Depends(get_db)):
+    home = await ensure_home_location(db)
     return LocationRead.from_orm(home)
 
 
 @app.put("/locations/home", response_model=LocationRead)
-def update_home_location(payload: LocationUpsert, db: Session = Depends(get_db)):
-    home = save_home_location(db, **payload.dict())
+async def update_home_location(payload: LocationUpsert, response: Response, db: AsyncSession = Depends(get_db)):
+    previous = await get_home_location(db)
+    previous_address = previous.address if previous else None
+    home = await save_home_location(db, **payload.dict())
+    if home.address != previous_address:
+        # every stored travel estimate starts from home
+        job = enqueue_estimate_refresh()
+        response.headers["X-Job-Id"] = job.id
     return LocationRead.from_orm(home)
 
 
 @app.post("/tasks", response_model=TaskRead)
-def create_task(task: TaskCreate, db: Session = Depends(get_db)):
-    db_task = Task(**task.dict())
+async def create_task(task: TaskCreate, response: Response, db: AsyncSession = Depends(get_db)):
+    db_task = Task(**task.dict(), inference_status="pending", location_suggestions=[])
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
-    refresh_task_location_suggestions(db, db_task)
-    db.refresh(db_task)
-    populate_time_estimate(db, [db_task])
+    await db.commit()
+    # suggestions and time estimates arrive asynchronously; clients poll the job or the task
+    job = enqueue_task_inference([db_task])
+    response.headers["X-Job-Id"] = job.id
     return db_task
 
 
-@app.get("/tasks", response_model=list[TaskRead])
-def list_tasks(db: Session = Depends(get_db)):
-    tasks = db.query(Task).order_by(Task.priority.desc()).all()
-    populate_time_estimate(db, tasks)
-    return tasks
+@app.post("/tasks/bulk", response_model=list[TaskRead])
+async def create_tasks_bulk(payload: TaskBulkCreate, response: Response, db: AsyncSession = Depends(get_db)):
+    if len(payload.tasks) > settings.bulk_max_tasks:
+        raise HTTPException(status_code=413, detail=f"At most {settings.bulk_max_tasks} tasks per request.")
+    db_tasks = [
+        Task(**task.dict(), inference_status="pending", location_suggestions=[])
+        for task in payload.tasks
+    ]
+    db.add_all(db_tasks)
+    await db.commit()
+    job = enqueue_task_inference(db_tasks)
+    response.headers["X-Job-Id"] = job.id
+    return db_tasks
+
+
+@app.get(
+    "/tasks",
+    response_model=list[TaskRead],
+    dependencies=[Depends(conditional("tasks", "task_location_suggestions"))],
+)
+async def list_tasks(
+    response: Response,
+    limit: int = Query(default=settings.tasks_page_size, ge=1, le=settings.tasks_page_max),
+    cursor: Optional[str] = None,
+    status: Optional[list[Literal["pending", "scheduled", "done"]]] = Query(default=None),
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+    has_location: Optional[bool] = None,
+    fields: Optional[str] = Query(default=None, description="Comma-separated TaskRead fields to return."),
+    db: AsyncSession = Depends(get_read_db),
+):
+    projection = None
+    if fields:
+        projection = {name.strip() for name in fields.split(",") if name.strip()} | {"id"}
+        unknown = projection - set(TaskRead.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}.")
+
+    filters = TaskFilters(statuses=status, due_after=due_after, due_before=due_before, has_location=has_location)
+    try:
+        tasks, next_cursor = await list_tasks_page(
+            db,
+            limit=limit,
+            cursor=cursor,
+            filters=filters,
+            with_suggestions=projection is None or "location_suggestions" in projection,
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if projection is None:
+        return tasks
+    rows = [TaskRead.model_validate(task).model_dump(mode="json", include=projection) for task in tasks]
+    return JSONResponse(rows, headers=dict(response.headers))
+
+
+# declared before /tasks/{task_id} so "reorder" is not parsed as an id
+@app.patch("/tasks/reorder", response_model=list[TaskRead])
+async def reorder_tasks(payload: TaskReorder, db: AsyncSession = Depends(get_db)):
+    if len(set(payload.ids)) != len(payload.ids):
+        raise HTTPException(status_code=400, detail="Task ids must be unique.")
+    found = set((await db.execute(select(Task.id).where(Task.id.in_(payload.ids)))).scalars())
+    missing = [task_id for task_id in payload.ids if task_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Tasks not found: {missing}.")
+
+    # same scheme the UI used per row: top of n gets n, clamped to the allowed 1-5 range;
+    # the clamp makes priorities tie past five rows, so the position keeps the exact order
+    total = len(payload.ids)
+    priorities = {task_id: max(1, min(5, total - index)) for index, task_id in enumerate(payload.ids)}
+    positions = {task_id: index for index, task_id in enumerate(payload.ids)}
+    await db.execute(
+        update(Task)
+        .where(Task.id.in_(payload.ids))
+        .values(priority=case(priorities, value=Task.id), position=case(positions, value=Task.id)),
+        execution_options={"synchronize_session": False},
+    )
+    await db.commit()
+    tasks = (
+        await db.execute(
+            select(Task).where(Task.id.in_(payload.ids)).options(selectinload(Task.location_suggestions))
+        )
+    ).scalars()
+    by_id = {task.id: task for task in tasks}
+    return [by_id[task_id] for task_id in payload.ids]
 
 
 @app.patch("/tasks/{task_id}", response_model=TaskRead)
-def update_task(task_id: int, payload: TaskUpdate, db: Session = Depends(get_db)):
-    task = db.query(Task).filter(Task.id == task_id).first()
+async def update_task(task_id: int, payload: TaskUpdate, response: Response, db: AsyncSession = Depends(get_db)):
+    task = await db.scalar(select(Task).where(Task.id == task_id).options(selectinload(Task.location_suggestions)))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found.")
 
     update_data = payload.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(task, field, value)
+    if "title" in update_data:
+        task.inference_status = "pending"
 
-    db.commit()
-    db.refresh(task)
+    await db.commit()
     if "title" in update_data:
-        refresh_task_location_suggestions(db, task)
-        db.refresh(task)
-    populate_time_estimate(db, [task])
+        job = enqueue_task_inference([task])
+        response.headers["X-Job-Id"] = job.id
+    if update_data.get("location"):
+        await geocoding.resolve([task.location])
+    if {"location", "duration_minutes"} & update_data.keys() and await refresh_time_estimates(db, [task]):
+        await db.commit()
     return task
 
 
 @app.delete("/tasks/{task_id}", status_code=204)
-def delete_task(task_id: int, db: Session = Depends(get_db)):
-    task = db.query(Task).filter(Task.id == task_id).first()
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_db)):
+    task = await db.get(Task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found.")
-    db.delete(task)
-    db.commit()
+    await db.delete(task)
+    await db.commit()
     return Response(status_code=204)
 
 
+@app.get("/export")
+async def export_data(db: AsyncSession = Depends(get_read_db)):
+    async def lines():
+        try:
+            async for line in aiter_export(db):
+                yield line
+        finally:
+            await db.close()
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="planner-export.ndjson"'},
+    )
+
+
+@app.post("/import")
+async def import_data(request: Request, db: AsyncSession = Depends(get_db)) -> dict[str, int]:
+    try:
+        return await import_stream(db, request.stream())
+    except ImportFormatError as exc:
+        await db.rollback()
+        # earlier batches stay committed; say how far the import got
+        raise HTTPException(status_code=400, detail={"message": str(exc), "imported": exc.imported}) from exc
+
+
+@app.get("/jobs/{job_id}", response_model=JobRead)
+async def read_job(job_id: str):
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return JobRead.from_orm(job)
+
+
+@app.post("/geocode/backfill", response_model=JobRead, status_code=202)
+async def backfill_geocodes():
+    return JobRead.from_orm(enqueue_geocode_backfill())
+
+
 @app.post("/tasks/infer-location", response_model=list[LocationSuggestionPreview])
-def infer_task_location(payload: LocationInferenceRequest, db: Session = Depends(get_db)):
-    suggestions = infer_locations(db, payload.title)
+async def infer_task_location(payload: LocationInferenceRequest, db: AsyncSession = Depends(get_db)):
+    suggestions = await infer_locations(db, payload.title, use_model=payload.use_model)
     return [
         LocationSuggestionPreview(label=item.get("name", payload.title), address=item.get("address"))
         for item in suggestions
     ]
 
 
+@app.get("/nlp/stats", response_model=ExtractionStats)
+async def read_extraction_stats() -> ExtractionStats:
+    return ExtractionStats(**extraction_stats())
+
+
 @app.post("/plan/generate", response_model=PlanResponse)
-def generate_daily_plan(payload: PlanRequest | None = None, db: Session = Depends(get_db)):
+async def generate_daily_plan(payload: PlanRequest | None = None, db: AsyncSession = Depends(get_db)):
     payload = payload or PlanRequest()
     target_date = payload.date or date.today()
-    blocks, reminders = generate_plan(db, target_date)
-    home = ensure_home_location(db)
+    if payload.changed_task_ids is not None:
+        blocks, reminders = await replan(db, target_date, payload.changed_task_ids, engine=payload.engine)
+    else:
+        blocks, reminders = await generate_plan(db, target_date, engine=payload.engine)
+    home = await ensure_home_location(db)
     return PlanResponse(
         date=target_date,
         blocks=[PlanBlockRead.from_orm(b) for b in blocks],
@@ -172,19 +420,41 @@ def generate_daily_plan(payload: PlanRequest | None = None, db: Session = Depend
     )
 
 
-@app.get("/plan/{target_date}", response_model=PlanResponse)
-def get_plan(target_date: date, db: Session = Depends(get_db)):
-    blocks = get_plan_for_date(db, target_date)
-    start, end = day_bounds(target_date)
-    reminders = (
-        db.query(Reminder)
-        .filter(Reminder.trigger_time.between(start - timedelta(hours=2), end))
-        .order_by(Reminder.trigger_time)
-        .all()
+PLAN_TABLES = ("plan_blocks", "reminders", "locations")
+
+
+@app.get("/plan", response_model=PlanRangeResponse, dependencies=[Depends(conditional(*PLAN_TABLES))])
+async def get_plan_range(
+    start: date = Query(alias="from"),
+    end: date = Query(alias="to"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'.")
+    if (end - start).days >= settings.plan_range_max_days:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.plan_range_max_days} days per request.",
+        )
+    blocks = await get_plan_blocks(db, start, end)
+    reminders = await get_reminders(db, start, end)
+    home = await get_home_location(db)
+    return PlanRangeResponse(
+        start=start,
+        end=end,
+        blocks=[PlanBlockRead.from_orm(b) for b in blocks],
+        reminders=[ReminderRead.from_orm(r) for r in reminders],
+        home_location=LocationRead.from_orm(home) if home else None,
     )
+
+
+@app.get("/plan/{target_date}", response_model=PlanResponse, dependencies=[Depends(conditional(*PLAN_TABLES))])
+async def get_plan(target_date: date, db: AsyncSession = Depends(get_read_db)):
+    blocks = await get_plan_for_date(db, target_date)
+    reminders = await get_reminders(db, target_date, target_date)
     if not blocks and not reminders:
         raise HTTPException(status_code=404, detail="Plan not found for that date.")
-    home = ensure_home_location(db)
+    home = await get_home_location(db)
     return PlanResponse(
         date=target_date,
         blocks=[PlanBlockRead.from_orm(b) for b in blocks],
@@ -193,14 +463,8 @@ def get_plan(target_date: date, db: Session = Depends(get_db)):
     )
 
 
-@app.get("/reminders/today", response_model=list[ReminderRead])
-def today_reminders(db: Session = Depends(get_db)):
+@app.get("/reminders/today", response_model=list[ReminderRead], dependencies=[Depends(conditional("reminders"))])
+async def today_reminders(db: AsyncSession = Depends(get_read_db)):
     today = date.today()
-    start, end = day_bounds(today)
-    reminders = (
-        db.query(Reminder)
-        .filter(Reminder.trigger_time.between(start - timedelta(hours=2), end))
-        .order_by(Reminder.trigger_time)
-        .all()
-    )
+    reminders = await get_reminders(db, today, today)
     return [ReminderRead.from_orm(r) for r in reminders]
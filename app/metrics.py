@@ -0,0 +1,331 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+A deliberately small subset of the client library: counters, gauges and
+histograms with fixed label names, kept in one registry and rendered by
+``GET /metrics``. Instrumented code calls ``inc``/``set``/``observe`` (or the
+``time`` context manager); figures that already live elsewhere, such as cache
+statistics, are copied into gauges and counters at scrape time.
+
+Per-request SQL statement counts ride on a context variable that
+:class:`MetricsMiddleware` sets, so queries issued by background jobs only
+reach the process-wide counters.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[tuple[str, LabelValues, float, tuple[str, ...]]]:
+        """``(suffix, label values, value, extra label names)`` per exposed sample."""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, value, extra_names in self.samples():
+            labels = _format_labels(self.labelnames + extra_names, values)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, **labels: str) -> None:
+        """Mirror a running total kept elsewhere, e.g. a cache's hit counter."""
+
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "_total", key, value, ()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "", key, value, ()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket..., sum, count]
+        self._values: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - began, **labels)
+
+    def count(self, **labels: str) -> float:
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0.0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            cumulative = 0.0
+            for bound, observed in zip(self.buckets, state):
+                cumulative += observed
+                yield "_bucket", key + (_format_value(bound),), cumulative, ("le",)
+            yield "_bucket", key + ("+Inf",), state[-1], ("le",)
+            yield "_sum", key, state[-2], ()
+            yield "_count", key, state[-1], ()
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.register(
+    Histogram(
+        "planner_http_request_duration_seconds",
+        "Time from receiving a request to sending its last body chunk.",
+        ("method", "route", "status"),
+    )
+)
+http_in_flight = REGISTRY.register(
+    Gauge("planner_http_requests_in_flight", "Requests currently being served.", ("method",))
+)
+http_queries = REGISTRY.register(
+    Histogram(
+        "planner_http_request_db_queries",
+        "SQL statements executed while serving one request.",
+        ("route",),
+        buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 1000),
+    )
+)
+db_queries = REGISTRY.register(Counter("planner_db_queries", "SQL statements executed, requests and jobs alike."))
+db_commits = REGISTRY.register(Counter("planner_db_commits", "Transactions committed."))
+google_requests = REGISTRY.register(
+    Histogram(
+        "planner_google_request_duration_seconds",
+        "Google Maps API calls by API and outcome (ok, zero_results, an API status, http_<code>, invalid_json or transport_error).",
+        ("api", "outcome"),
+    )
+)
+nlp_inference = REGISTRY.register(
+    Histogram(
+        "planner_nlp_inference_duration_seconds",
+        "spaCy NER over one batch of titles, by backend (sidecar or in_process).",
+        ("backend",),
+    )
+)
+time_estimates = REGISTRY.register(
+    Histogram(
+        "planner_time_estimate_duration_seconds",
+        "populate_time_estimate calls, including travel lookups.",
+    )
+)
+cache_entries = REGISTRY.register(Gauge("planner_cache_entries", "Entries held in a memory cache tier.", ("cache",)))
+cache_hits = REGISTRY.register(
+    Counter("planner_cache_hits", "Lookups answered by a cache tier.", ("cache", "tier"))
+)
+cache_misses = REGISTRY.register(
+    Counter("planner_cache_misses", "Lookups no reported cache tier could answer.", ("cache",))
+)
+cache_hit_ratio = REGISTRY.register(
+    Gauge("planner_cache_hit_ratio", "Share of lookups answered by a reported cache tier.", ("cache",))
+)
+extraction_tiers = REGISTRY.register(
+    Gauge("planner_location_extraction_titles", "Titles resolved per extraction tier since start.", ("tier",))
+)
+
+
+def record_cache(name: str, *, entries: int, hits: dict[str, int], misses: int) -> None:
+    """Copy one cache's statistics into the cache metrics."""
+
+    cache_entries.set(entries, cache=name)
+    for tier, count in hits.items():
+        cache_hits.set_total(count, cache=name, tier=tier)
+    cache_misses.set_total(misses, cache=name)
+    lookups = sum(hits.values()) + misses
+    cache_hit_ratio.set(sum(hits.values()) / lookups if lookups else 0.0, cache=name)
+
+
+_request_queries: ContextVar[list[int] | None] = ContextVar("request_queries", default=None)
+
+
+def _count_query(*_) -> None:
+    db_queries.inc()
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def _count_commit(*_) -> None:
+    db_commits.inc()
+
+
+def instrument_sqlalchemy() -> None:
+    """Count statements and commits on every engine, including ones created later."""
+
+    if not event.contains(Engine, "before_cursor_execute", _count_query):
+        event.listen(Engine, "before_cursor_execute", _count_query)
+        event.listen(Engine, "commit", _count_commit)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request under its route template.
+
+    Paths that match no route share one label so scanners cannot blow up the
+    series count.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        queries = [0]
+        token = _request_queries.set(queries)
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc(method=method)
+        began = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - began
+            http_in_flight.dec(method=method)
+            _request_queries.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            http_requests.observe(elapsed, method=method, route=route, status=str(status))
+            http_queries.observe(queries[0], route=route)
@@ -0,0 +1,192 @@
+"""Versioned schema migrations.
+
+Steps run in order, each in its own transaction together with the
+``schema_version`` row that records it. The runner holds an exclusive file
+lock so several workers starting at once apply every step exactly once.
+
+Run from the app lifespan, or by hand with ``python -m app.migrations``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+from sqlalchemy import Column, DateTime, Engine, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection
+
+from . import database, models  # noqa: F401 - models registers every table on Base.metadata
+from .config import settings
+from .database import Base
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms run without the cross-process lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def _add_column(connection: Connection, table: str, column: str, ddl: str) -> None:
+    existing = {info["name"] for info in inspect(connection).get_columns(table)}
+    if column not in existing:
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _create_tables(connection: Connection) -> None:
+    # creates only what is missing, so it is also safe on pre-migration databases
+    Base.metadata.create_all(bind=connection)
+
+
+def _task_estimate_columns(connection: Connection) -> None:
+    _add_column(connection, "tasks", "time_estimate_minutes", "INTEGER")
+    _add_column(connection, "tasks", "time_estimate_meta", "JSON")
+    _add_column(connection, "tasks", "time_estimate_travel_to_minutes", "INTEGER")
+    _add_column(connection, "tasks", "time_estimate_travel_back_minutes", "INTEGER")
+    _add_column(connection, "tasks", "time_estimate_shopping_minutes", "INTEGER")
+
+
+def _task_inference_status(connection: Connection) -> None:
+    _add_column(connection, "tasks", "inference_status", "VARCHAR(20)")
+
+
+def _plan_time_indexes(connection: Connection) -> None:
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_plan_blocks_start_time ON plan_blocks (start_time)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_reminders_trigger_time ON reminders (trigger_time)"))
+
+
+def _task_list_indexes(connection: Connection) -> None:
+    # spelled out: the model's indexes have since moved on (see _task_position)
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_tasks_priority_id ON tasks (priority DESC, id)"))
+    connection.execute(
+        text("CREATE INDEX IF NOT EXISTS ix_tasks_status_priority_id ON tasks (status, priority DESC, id)")
+    )
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_tasks_due_date ON tasks (due_date)"))
+
+
+def _task_estimate_basis(connection: Connection) -> None:
+    _add_column(connection, "tasks", "time_estimate_basis", "VARCHAR(40)")
+
+
+def _table_versions(connection: Connection) -> None:
+    models.TableVersion.__table__.create(connection, checkfirst=True)
+
+
+def _geo_points(connection: Connection) -> None:
+    models.GeoPoint.__table__.create(connection, checkfirst=True)
+
+
+def _task_position(connection: Connection) -> None:
+    _add_column(connection, "tasks", "position", "INTEGER NOT NULL DEFAULT 0")
+    # the list indexes gain the column as their tiebreak
+    connection.execute(text("DROP INDEX IF EXISTS ix_tasks_priority_id"))
+    connection.execute(text("DROP INDEX IF EXISTS ix_tasks_status_priority_id"))
+    for index in models.Task.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "create tables", _create_tables),
+    Migration(2, "task time estimate columns", _task_estimate_columns),
+    Migration(3, "task inference status", _task_inference_status),
+    Migration(4, "plan block and reminder time indexes", _plan_time_indexes),
+    Migration(5, "task list indexes", _task_list_indexes),
+    Migration(6, "task time estimate basis", _task_estimate_basis),
+    Migration(7, "table change counters", _table_versions),
+    Migration(8, "geocoded address coordinates", _geo_points),
+    Migration(9, "task reorder position", _task_position),
+]
+
+
+@contextmanager
+def _exclusive(lock_path: Path) -> Iterator[None]:
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    with engine.connect() as connection:
+        schema_version.create(connection, checkfirst=True)
+        connection.commit()
+        return set(connection.execute(select(schema_version.c.version)).scalars())
+
+
+def migrate(engine: Engine | None = None, *, lock_path: Path | None = None) -> list[int]:
+    """Apply pending migrations and return the versions applied by this call."""
+
+    engine = engine or database.engine
+    lock_path = lock_path or settings.data_dir / "migrations.lock"
+    settings.data_dir.mkdir(parents=True, exist_ok=True)
+    applied: list[int] = []
+    with _exclusive(lock_path):
+        done = applied_versions(engine)
+        for migration in MIGRATIONS:
+            if migration.version in done:
+                continue
+            began = time.perf_counter()
+            with engine.begin() as connection:
+                migration.apply(connection)
+                connection.execute(
+                    schema_version.insert().values(
+                        version=migration.version,
+                        description=migration.description,
+                        applied_at=datetime.utcnow(),
+                    )
+                )
+            logger.info(
+                "applied migration %d (%s) in %.1f ms",
+                migration.version,
+                migration.description,
+                (time.perf_counter() - began) * 1000,
+            )
+            applied.append(migration.version)
+    return applied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list applied and pending versions only")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    engine = database.engine
+    if args.status:
+        done = applied_versions(engine)
+        for migration in MIGRATIONS:
+            state = "applied" if migration.version in done else "pending"
+            print(f"{migration.version:>4}  {state:<8} {migration.description}")
+        return
+    applied = migrate(engine)
+    print(f"applied {len(applied)} migration(s)" + (f": {applied}" if applied else ""))
+
+
+if __name__ == "__main__":
+    main()
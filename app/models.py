@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Integer, JSON, String, Text
+from sqlalchemy import Boolean, DateTime, Enum, Float, ForeignKey, Index, Integer, JSON, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
@@ -21,10 +21,15 @@ class Task(Base):
     time_estimate_travel_to_minutes: Mapped[int | None] = mapped_column(Integer, default=None)
     time_estimate_travel_back_minutes: Mapped[int | None] = mapped_column(Integer, default=None)
     time_estimate_shopping_minutes: Mapped[int | None] = mapped_column(Integer, default=None)
+    # fingerprint of the inputs the stored estimate was computed from
+    time_estimate_basis: Mapped[str | None] = mapped_column(String(40), default=None)
     status: Mapped[str] = mapped_column(
         Enum("pending", "scheduled", "done", name="task_status"),
         default="pending",
     )
+    inference_status: Mapped[str | None] = mapped_column(String(20), default=None)
+    # rank from the last drag-and-drop reorder; breaks ties between equal priorities
+    position: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     plan_blocks: Mapped[list["PlanBlock"]] = relationship(back_populates="task")
     reminders: Mapped[list["Reminder"]] = relationship(back_populates="task")
@@ -34,12 +39,18 @@ class Task(Base):
     )
 
 
+# keyset pagination walks (priority DESC, position, id); filters seek on their leading column
+Index("ix_tasks_priority_position_id", Task.priority.desc(), Task.position, Task.id)
+Index("ix_tasks_status_priority_position_id", Task.status, Task.priority.desc(), Task.position, Task.id)
+Index("ix_tasks_due_date", Task.due_date)
+
+
 class PlanBlock(Base):
     __tablename__ = "plan_blocks"
 
     id: Mapped[int] = mapped_column(primary_key=True)
     task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"))
-    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=False))
+    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=False), index=True)
     end_time: Mapped[datetime] = mapped_column(DateTime(timezone=False))
     location: Mapped[str | None] = mapped_column(String(120))
 
@@ -51,7 +62,7 @@ class Reminder(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id"))
-    trigger_time: Mapped[datetime] = mapped_column(DateTime(timezone=False))
+    trigger_time: Mapped[datetime] = mapped_column(DateTime(timezone=False), index=True)
     reminder_type: Mapped[str] = mapped_column(
         Enum("time", "location", "manual", name="reminder_type"),
         default="time",
@@ -80,3 +91,51 @@ class TaskLocationSuggestion(Base):
     source: Mapped[str] = mapped_column(String(50), default="places")
 
     task: Mapped["Task"] = relationship(back_populates="location_suggestions")
+
+
+class TravelTimeEntry(Base):
+    __tablename__ = "travel_time_cache"
+    __table_args__ = (UniqueConstraint("origin", "destination", "mode"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    origin: Mapped[str] = mapped_column(String(255))
+    destination: Mapped[str] = mapped_column(String(255))
+    mode: Mapped[str] = mapped_column(String(20), default="driving")
+    minutes: Mapped[int] = mapped_column(Integer)
+    summary: Mapped[str | None] = mapped_column(String(120))
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=False))
+
+
+class PlaceSearchEntry(Base):
+    __tablename__ = "place_search_cache"
+    __table_args__ = (UniqueConstraint("query", "near"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    query: Mapped[str] = mapped_column(String(180))
+    near: Mapped[str] = mapped_column(String(255))
+    results: Mapped[list] = mapped_column(JSON)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), index=True)
+
+
+class GeoPoint(Base):
+    """Coordinates of a normalized address; NULL lat/lng records a lookup that found nothing."""
+
+    __tablename__ = "geo_points"
+    # the address is the only key, so skip the rowid b-tree
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    address: Mapped[str] = mapped_column(String(255), primary_key=True)
+    lat: Mapped[float | None] = mapped_column(Float)
+    lng: Mapped[float | None] = mapped_column(Float)
+    source: Mapped[str] = mapped_column(String(20))
+    resolved_at: Mapped[datetime] = mapped_column(DateTime(timezone=False))
+
+
+class TableVersion(Base):
+    """Per-table change counter bumped in the same transaction as every write."""
+
+    __tablename__ = "table_versions"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=False))
@@ -2,8 +2,19 @@
 
 from __future__ import annotations
 
+import json
+import logging
+import socket
+import threading
 from functools import lru_cache
-from typing import Any
+from typing import Any, Sequence
+
+from . import metrics
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+Entities = list[tuple[str, str]]
 
 
 @lru_cache(maxsize=1)
@@ -19,3 +30,89 @@ def get_nlp() -> Any | None:
         return spacy.load("en_core_web_trf")
     except OSError:
         return None
+
+
+def run_pipeline(nlp: Any, texts: Sequence[str]) -> list[Entities]:
+    """Return ``(text, label)`` entity pairs per input text using one ``nlp.pipe`` pass."""
+
+    return [
+        [(ent.text, ent.label_) for ent in doc.ents]
+        for doc in nlp.pipe(texts, batch_size=settings.nlp_batch_size)
+    ]
+
+
+class SidecarClient:
+    """Blocking client for :mod:`app.nlp_server`; one connection per calling thread."""
+
+    def __init__(self, socket_path: str, *, timeout: float) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _stream(self):
+        stream = getattr(self._local, "stream", None)
+        if stream is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            stream = sock.makefile("rwb")
+            self._local.stream = stream
+        return stream
+
+    def _reset(self) -> None:
+        stream = getattr(self._local, "stream", None)
+        self._local.stream = None
+        if stream is not None:
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def extract(self, texts: Sequence[str]) -> list[Entities]:
+        try:
+            stream = self._stream()
+            stream.write(json.dumps({"texts": list(texts)}).encode() + b"\n")
+            stream.flush()
+            line = stream.readline()
+        except OSError:
+            self._reset()
+            raise
+        if not line:
+            self._reset()
+            raise ConnectionError("NLP sidecar closed the connection")
+        reply = json.loads(line)
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return [[(text, label) for text, label in ents] for ents in reply["ents"]]
+
+
+@lru_cache(maxsize=1)
+def get_sidecar() -> SidecarClient | None:
+    if not settings.nlp_socket_path:
+        return None
+    return SidecarClient(settings.nlp_socket_path, timeout=settings.nlp_sidecar_timeout_seconds)
+
+
+def extract_entities(texts: Sequence[str]) -> list[Entities] | None:
+    """Run NER over ``texts`` via the shared sidecar when configured, else in-process.
+
+    Returns ``None`` when no model is available so callers can skip the tier.
+    """
+
+    if not texts:
+        return []
+    sidecar = get_sidecar()
+    if sidecar is not None:
+        try:
+            with metrics.nlp_inference.time(backend="sidecar"):
+                return sidecar.extract(texts)
+        except (OSError, RuntimeError, ValueError):
+            logger.warning("NLP sidecar unavailable at %s", sidecar.socket_path, exc_info=True)
+            if not settings.nlp_sidecar_fallback:
+                return None
+
+    nlp = get_nlp()
+    if nlp is None:
+        return None
+    with metrics.nlp_inference.time(backend="in_process"):
+        return run_pipeline(nlp, texts)
@@ -0,0 +1,143 @@
+"""Shared spaCy inference sidecar served over a Unix socket.
+
+Run ``python -m app.nlp_server`` once per host and point every web worker at
+it with ``NLP_SOCKET_PATH``; the model is loaded a single time and concurrent
+requests from all workers are folded into micro-batches.
+
+Wire format is one JSON object per line in each direction:
+``{"texts": [...]}`` -> ``{"ents": [[[text, label], ...], ...]}``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any
+
+from .config import settings
+from .nlp import get_nlp, run_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Pending:
+    texts: list[str]
+    future: asyncio.Future
+
+
+class NLPServer:
+    """Collect requests until ``max_batch`` texts or ``max_wait`` seconds, then run one pipe."""
+
+    def __init__(self, socket_path: str, nlp: Any, *, max_batch: int, max_wait: float) -> None:
+        self.socket_path = socket_path
+        self.nlp = nlp
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait
+        self.batches_run = 0
+        self._queue: asyncio.Queue[_Pending] | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._batcher: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        assert self._server is not None
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                try:
+                    texts = [str(text) for text in json.loads(line)["texts"]]
+                    future = asyncio.get_running_loop().create_future()
+                    assert self._queue is not None
+                    await self._queue.put(_Pending(texts, future))
+                    reply: dict[str, Any] = {"ents": await future}
+                except Exception as exc:  # noqa: BLE001 - report the error to this client only
+                    reply = {"error": f"{type(exc).__name__}: {exc}"}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _batch_loop(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0].texts)
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(pending)
+                size += len(pending.texts)
+
+            texts = [text for pending in batch for text in pending.texts]
+            try:
+                # inference is CPU-bound; the loop keeps accepting requests meanwhile
+                ents = await asyncio.to_thread(run_pipeline, self.nlp, texts)
+            except Exception as exc:  # noqa: BLE001 - fail every request in the batch
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(exc)
+                continue
+            self.batches_run += 1
+            offset = 0
+            for pending in batch:
+                count = len(pending.texts)
+                if not pending.future.done():
+                    pending.future.set_result(ents[offset : offset + count])
+                offset += count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve spaCy entity extraction over a Unix socket.")
+    parser.add_argument("--socket", default=settings.nlp_socket_path or str(settings.data_dir / "nlp.sock"))
+    parser.add_argument("--max-batch", type=int, default=settings.nlp_server_max_batch)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.nlp_server_max_wait_ms)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    nlp = get_nlp()
+    if nlp is None:
+        raise SystemExit("spaCy or en_core_web_trf is not installed.")
+    logger.info("model loaded; listening on %s", args.socket)
+
+    server = NLPServer(args.socket, nlp, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
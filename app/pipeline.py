@@ -0,0 +1,135 @@
+"""Background jobs that enrich tasks after they are written."""
+
+from __future__ import annotations
+
+from sqlalchemy import select, union, update
+
+from . import geocoding
+from .database import AsyncSessionLocal
+from .config import settings
+from .estimates import home_address_for, refresh_time_estimates
+from .jobs import Job, job_queue
+from .location_inference import refresh_location_suggestions
+from .models import Location, Task, TaskLocationSuggestion
+
+TASK_INFERENCE = "task_inference"
+ESTIMATE_REFRESH = "estimate_refresh"
+GEOCODE_BACKFILL = "geocode_backfill"
+
+
+async def run_task_inference(payload: dict) -> None:
+    """Infer location suggestions and time estimates for ``payload["task_ids"]``."""
+
+    task_ids = payload["task_ids"]
+    # loaded rows stay usable across the intermediate commits without per-task reloads
+    async with AsyncSessionLocal() as db:
+        tasks = (await db.execute(select(Task).where(Task.id.in_(task_ids)))).scalars().all()
+        for task in tasks:
+            task.inference_status = "running"
+        await db.commit()
+
+        await refresh_location_suggestions(db, tasks)
+        await refresh_time_estimates(db, tasks)
+        for task in tasks:
+            task.inference_status = "done"
+        await db.commit()
+        addresses = (
+            await db.scalars(
+                select(TaskLocationSuggestion.address).where(
+                    TaskLocationSuggestion.task_id.in_(task_ids), TaskLocationSuggestion.address.is_not(None)
+                )
+            )
+        ).all()
+
+    await geocoding.resolve([*(task.location for task in tasks if task.location), *addresses])
+
+
+async def mark_inference_failed(payload: dict, _: BaseException) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Task).where(Task.id.in_(payload["task_ids"])).values(inference_status="failed")
+        )
+        await db.commit()
+
+
+async def run_estimate_refresh(_: dict) -> None:
+    """Recompute stored estimates whose inputs changed, e.g. after the home address moved."""
+
+    async with AsyncSessionLocal() as db:
+        home_address = await home_address_for(db)
+    # the offline provider can only estimate from a home it has coordinates for
+    await geocoding.resolve([home_address])
+
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            tasks = (
+                (
+                    await db.execute(
+                        select(Task)
+                        .where(Task.id > last_id, Task.location.is_not(None), Task.status != "done")
+                        .order_by(Task.id)
+                        .limit(settings.estimate_refresh_batch_size)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            if not tasks:
+                return
+            last_id = tasks[-1].id
+            await geocoding.resolve([task.location for task in tasks])
+            await refresh_time_estimates(db, tasks)
+            await db.commit()
+
+
+async def run_geocode_backfill(_: dict) -> None:
+    """Geocode every address already stored on locations, tasks and suggestions."""
+
+    addresses = union(
+        select(Location.address.label("address")).where(Location.address.is_not(None)),
+        select(Task.location).where(Task.location.is_not(None)),
+        select(TaskLocationSuggestion.address).where(TaskLocationSuggestion.address.is_not(None)),
+    )
+    async with AsyncSessionLocal() as db:
+        pending = (await db.scalars(addresses)).all()
+    # resolve() skips everything already stored, so a re-run only pays for new addresses
+    for start in range(0, len(pending), settings.geocode_batch_size):
+        await geocoding.resolve(pending[start : start + settings.geocode_batch_size])
+
+
+async def resume_task_inference() -> list[Job]:
+    """Re-enqueue inference for tasks an earlier process left ``pending`` or ``running``.
+
+    Jobs only live in memory, so a restart (or a stop that cancelled the
+    workers) would otherwise leave those tasks unfinished for good.
+    """
+
+    async with AsyncSessionLocal() as db:
+        task_ids = (
+            await db.scalars(
+                select(Task.id).where(Task.inference_status.in_(("pending", "running"))).order_by(Task.id)
+            )
+        ).all()
+    size = settings.bulk_max_tasks
+    return [
+        job_queue.enqueue(TASK_INFERENCE, task_ids=task_ids[start : start + size])
+        for start in range(0, len(task_ids), size)
+    ]
+
+
+def enqueue_task_inference(tasks: list[Task]) -> Job:
+    return job_queue.enqueue(TASK_INFERENCE, task_ids=[task.id for task in tasks])
+
+
+def enqueue_estimate_refresh() -> Job:
+    return job_queue.enqueue(ESTIMATE_REFRESH)
+
+
+def enqueue_geocode_backfill() -> Job:
+    return job_queue.enqueue(GEOCODE_BACKFILL)
+
+
+job_queue.register(TASK_INFERENCE, run_task_inference, on_failure=mark_inference_failed)
+job_queue.register(ESTIMATE_REFRESH, run_estimate_refresh)
+job_queue.register(GEOCODE_BACKFILL, run_geocode_backfill)
@@ -0,0 +1,121 @@
+"""Two-tier (memory LRU + SQLite) cache for Places text-search results."""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from .cache import LRUCache
+from .config import settings
+from .database import AsyncSessionLocal
+from .models import PlaceSearchEntry
+from .travel_cache import normalize_address
+
+logger = logging.getLogger(__name__)
+
+PlaceKey = tuple[str, str]
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+@dataclass(frozen=True)
+class CachedSearch:
+    results: list[dict[str, str | None]]
+    fetched_at: datetime
+
+    @property
+    def is_fresh(self) -> bool:
+        return datetime.utcnow() - self.fetched_at <= timedelta(seconds=settings.place_cache_ttl_seconds)
+
+
+_memory = LRUCache(maxsize=settings.place_cache_max_entries)
+_counters = {"db_hits": 0, "misses": 0}
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, punctuation and whitespace so "Trader Joe's" == "trader  joes"."""
+
+    return " ".join(_PUNCTUATION.sub("", (query or "").casefold()).split())
+
+
+def cache_key(query: str, near: str) -> PlaceKey:
+    return normalize_query(query), normalize_address(near)
+
+
+async def get_results(key: PlaceKey) -> list[dict[str, str | None]] | None:
+    """Return fresh cached results for ``key`` or ``None`` when a live search is needed."""
+
+    cached = _memory.get(key)
+    if cached is not None:
+        if cached.is_fresh:
+            return cached.results
+        _memory.pop(key)
+
+    query, near = key
+    stmt = select(PlaceSearchEntry).where(PlaceSearchEntry.query == query, PlaceSearchEntry.near == near)
+    try:
+        async with AsyncSessionLocal() as db:
+            entry = (await db.execute(stmt)).scalar_one_or_none()
+    except SQLAlchemyError:
+        logger.warning("place cache lookup failed", exc_info=True)
+        entry = None
+
+    if entry is None:
+        _counters["misses"] += 1
+        return None
+    cached = CachedSearch(results=list(entry.results or []), fetched_at=entry.fetched_at)
+    if not cached.is_fresh:
+        _counters["misses"] += 1
+        return None
+    _counters["db_hits"] += 1
+    _memory.set(key, cached)
+    return cached.results
+
+
+async def put_results(key: PlaceKey, results: list[dict[str, str | None]]) -> None:
+    """Store results in both tiers, trimming the table to ``place_cache_max_rows``."""
+
+    cached = CachedSearch(results=results, fetched_at=datetime.utcnow())
+    _memory.set(key, cached)
+
+    query, near = key
+    stmt = select(PlaceSearchEntry).where(PlaceSearchEntry.query == query, PlaceSearchEntry.near == near)
+    try:
+        async with AsyncSessionLocal() as db:
+            entry = (await db.execute(stmt)).scalar_one_or_none()
+            if entry is None:
+                entry = PlaceSearchEntry(query=query, near=near)
+                db.add(entry)
+            entry.results = results
+            entry.fetched_at = cached.fetched_at
+            await db.flush()
+            overflow = (
+                select(PlaceSearchEntry.id)
+                .order_by(PlaceSearchEntry.fetched_at.desc())
+                .offset(settings.place_cache_max_rows)
+            )
+            await db.execute(delete(PlaceSearchEntry).where(PlaceSearchEntry.id.in_(overflow)))
+            await db.commit()
+    except SQLAlchemyError:
+        logger.warning("place cache write failed", exc_info=True)
+
+
+def clear_memory() -> None:
+    _memory.clear()
+    _counters.update(db_hits=0, misses=0)
+
+
+def stats() -> dict[str, int]:
+    memory = _memory.stats()
+    return {
+        "size": memory["size"],
+        "maxsize": memory["maxsize"],
+        "memory_hits": memory["hits"],
+        "db_hits": _counters["db_hits"],
+        "misses": _counters["misses"],
+    }
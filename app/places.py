@@ -2,81 +2,314 @@
 
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import importlib.util
+import time
+from typing import Iterable, Iterator, List, Sequence
 
 import httpx
 
+from . import metrics, place_cache, travel_cache
 from .config import settings
+from .travel_cache import TravelKey
 
-PLACES_SEARCH_URL = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+PLACES_SEARCH_PATH = "/maps/api/place/textsearch/json"
+DISTANCE_MATRIX_PATH = "/maps/api/distancematrix/json"
+GEOCODE_PATH = "/maps/api/geocode/json"
+# Keep a few more results than callers usually ask for so cached entries serve any max_results.
+PLACES_CACHED_RESULTS = 5
+# Statuses that are real answers; quota, denied and invalid-request errors are failures.
+ANSWERED_STATUSES = (None, "OK", "ZERO_RESULTS")
+# The API caps a request at 25 origins or 25 destinations.
+DISTANCE_MATRIX_MAX_ADDRESSES = 25
+# ...and at 100 elements, so full matrices are requested in 10x10 blocks.
+DISTANCE_MATRIX_BLOCK_SIDE = 10
 
+TravelEstimate = tuple[int | None, int | None, str | None]
 
-def search_places(query: str, near: str, *, max_results: int = 2) -> list[dict[str, str]]:
-    """Call the Places Text Search API and return simplified place info."""
+_client: httpx.AsyncClient | None = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.google_max_connections,
+        max_keepalive_connections=settings.google_max_keepalive_connections,
+        keepalive_expiry=settings.google_keepalive_expiry_seconds,
+    )
+    # HTTP/2 needs the optional ``h2`` package; fall back to pooled HTTP/1.1 without it.
+    http2 = settings.google_http2 and importlib.util.find_spec("h2") is not None
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=limits,
+        timeout=httpx.Timeout(settings.google_timeout_seconds),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared Google Maps client, creating it on first use outside the lifespan."""
+
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def open_client() -> httpx.AsyncClient:
+    return get_client()
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _get_json(api: str, path: str, params: dict[str, str]) -> dict | None:
+    """GET a Maps endpoint and return its JSON body, or ``None`` when the call failed.
+
+    Every call is recorded in ``metrics.google_requests`` by outcome.
+    """
+
+    began = time.perf_counter()
+    payload = None
+    try:
+        response = await get_client().get(settings.google_maps_base_url + path, params=params)
+    except httpx.HTTPError:
+        outcome = "transport_error"
+    else:
+        if response.status_code != 200:
+            outcome = f"http_{response.status_code}"
+        else:
+            try:
+                payload = response.json()
+            except ValueError:
+                outcome = "invalid_json"
+            else:
+                outcome = str(payload.get("status") or "OK").lower()
+    metrics.google_requests.observe(time.perf_counter() - began, api=api, outcome=outcome)
+    return payload
+
+
+async def search_places(query: str, near: str, *, max_results: int = 2) -> list[dict[str, str]]:
+    """Call the Places Text Search API and return simplified place info.
+
+    Results are cached per normalized (query, near) pair, so repeat errands
+    from the same home cost no network calls until the entry expires.
+    """
 
     api_key = settings.google_maps_api_key
     if not api_key or not near:
         return []
 
+    key = place_cache.cache_key(query, near)
+    cached = await place_cache.get_results(key)
+    if cached is not None:
+        return cached[:max_results]
+
     params = {
         "query": f"{query} near {near}",
         "key": api_key,
     }
-    try:
-        response = httpx.get(PLACES_SEARCH_URL, params=params, timeout=5)
-    except httpx.HTTPError:
-        return []
-
-    if response.status_code != 200:
+    payload = await _get_json("places", PLACES_SEARCH_PATH, params)
+    if payload is None or payload.get("status") not in ANSWERED_STATUSES:
+        # not cached, so the next search asks again
         return []
 
-    payload = response.json()
     results: List[dict[str, str]] = []
-    for item in payload.get("results", [])[:max_results]:
+    for item in payload.get("results", [])[:PLACES_CACHED_RESULTS]:
         results.append(
             {
                 "name": item.get("name", query),
                 "address": item.get("formatted_address"),
             }
         )
-    return results
+    await place_cache.put_results(key, results)
+    return results[:max_results]
+
 
+async def geocode_addresses(addresses: Sequence[str]) -> dict[str, tuple[float, float] | None]:
+    """Resolve ``addresses`` to ``(lat, lng)`` with the Geocoding API, one request per address.
+
+    Lookups run concurrently up to ``places_max_concurrency``. An address the
+    API has no match for maps to ``None``; one whose request failed is left
+    out, so callers can tell "nowhere" from "try again later".
+    """
 
-def estimate_travel_segments(home_address: str, task_address: str) -> tuple[int | None, int | None, str | None]:
     api_key = settings.google_maps_api_key
-    if not api_key or not home_address or not task_address:
-        return None, None, None
+    unique = list(dict.fromkeys(address for address in addresses if address))
+    if not api_key or not unique:
+        return {}
+    semaphore = asyncio.Semaphore(settings.places_max_concurrency)
+
+    failed = object()
+
+    async def _geocode(address: str):
+        async with semaphore:
+            payload = await _get_json("geocode", GEOCODE_PATH, {"address": address, "key": api_key})
+        if payload is None or payload.get("status") not in ANSWERED_STATUSES:
+            return failed
+        results = payload.get("results") or []
+        location = results[0].get("geometry", {}).get("location", {}) if results else {}
+        if location.get("lat") is None or location.get("lng") is None:
+            return None
+        return float(location["lat"]), float(location["lng"])
+
+    found = await asyncio.gather(*(_geocode(address) for address in unique))
+    return {address: point for address, point in zip(unique, found) if point is not failed}
+
+
+def _chunks(items: list[str], size: int) -> Iterator[list[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+async def _fetch_matrix(
+    origins: list[str],
+    destinations: list[str],
+    mode: str,
+) -> list[list[tuple[int, str | None] | None]] | None:
+    """Call the Distance Matrix API once and return a grid of (minutes, text) per element."""
 
     params = {
-        "origins": home_address,
-        "destinations": task_address,
-        "mode": "driving",
-        "key": api_key,
+        "origins": "|".join(origins),
+        "destinations": "|".join(destinations),
+        "mode": mode,
+        "key": settings.google_maps_api_key,
     }
-    try:
-        response = httpx.get(DISTANCE_MATRIX_URL, params=params, timeout=5)
-    except httpx.HTTPError:
-        return None, None, None
+    payload = await _get_json("distance_matrix", DISTANCE_MATRIX_PATH, params)
+    if payload is None:
+        return None
 
-    if response.status_code != 200:
-        return None, None, None
+    grid: list[list[tuple[int, str | None] | None]] = []
+    for row in payload.get("rows") or []:
+        cells: list[tuple[int, str | None] | None] = []
+        for element in row.get("elements") or []:
+            duration = element.get("duration", {}).get("value")
+            if element.get("status") != "OK" or duration is None:
+                cells.append(None)
+                continue
+            cells.append((max(int(duration / 60), 1), element.get("duration", {}).get("text")))
+        grid.append(cells)
+    return grid
 
-    payload = response.json()
-    rows = payload.get("rows") or []
-    if not rows:
-        return None, None, None
-    elements = rows[0].get("elements") or []
-    if not elements:
-        return None, None, None
-    first = elements[0]
-    if first.get("status") != "OK":
-            return None, None, None
-    duration = first.get("duration", {}).get("value")
-    if duration is None:
+
+async def _fetch_legs(home: str, keys: list[TravelKey], mode: str) -> dict[TravelKey, tuple[int, str | None]]:
+    """Fetch outbound and return legs for ``keys`` in as few requests as the API allows."""
+
+    destinations = [destination for origin, destination, _ in keys if origin == home]
+    origins = [origin for origin, destination, _ in keys if destination == home and origin != home]
+    outbound = list(_chunks(destinations, DISTANCE_MATRIX_MAX_ADDRESSES))
+    inbound = list(_chunks(origins, DISTANCE_MATRIX_MAX_ADDRESSES))
+    grids = await asyncio.gather(
+        *(_fetch_matrix([home], chunk, mode) for chunk in outbound),
+        *(_fetch_matrix(chunk, [home], mode) for chunk in inbound),
+    )
+
+    fetched: dict[TravelKey, tuple[int, str | None]] = {}
+    for chunk, grid in zip(outbound, grids[: len(outbound)]):
+        row = grid[0] if grid else []
+        for destination, cell in zip(chunk, row):
+            if cell is not None:
+                fetched[(home, destination, mode)] = cell
+    for chunk, grid in zip(inbound, grids[len(outbound) :]):
+        for origin, row in zip(chunk, grid or []):
+            if row and row[0] is not None:
+                fetched[(origin, home, mode)] = row[0]
+    return fetched
+
+
+async def estimate_travel_batch(home_address: str, task_addresses: Iterable[str]) -> dict[str, TravelEstimate]:
+    """Estimate outbound and return legs from home for many addresses at once.
+
+    Addresses are deduplicated after normalization, cached legs are reused, and
+    the remaining legs are fetched in chunks of ``DISTANCE_MATRIX_MAX_ADDRESSES``.
+    Addresses without both legs are left out of the result.
+    """
+
+    api_key = settings.google_maps_api_key
+    if not api_key or not home_address:
+        return {}
+
+    mode = settings.travel_mode
+    home = travel_cache.normalize_address(home_address)
+    addresses = {address: travel_cache.normalize_address(address) for address in task_addresses if address}
+    if not addresses:
+        return {}
+
+    keys: list[TravelKey] = []
+    for normalized in dict.fromkeys(addresses.values()):
+        keys.append(travel_cache.cache_key(home, normalized, mode))
+        keys.append(travel_cache.cache_key(normalized, home, mode))
+    legs = await travel_cache.cached_legs(keys, lambda missing: _fetch_legs(home, missing, mode))
+
+    estimates: dict[str, TravelEstimate] = {}
+    for address, normalized in addresses.items():
+        to_leg = legs.get((home, normalized, mode))
+        back_leg = legs.get((normalized, home, mode))
+        if to_leg is None or back_leg is None:
+            continue
+        estimates[address] = (to_leg.minutes, back_leg.minutes, to_leg.summary or "Drive")
+    return estimates
+
+
+async def _fetch_pairs(keys: list[TravelKey], mode: str) -> dict[TravelKey, tuple[int, str | None]]:
+    """Fetch arbitrary legs by tiling their origins x destinations into API-sized blocks."""
+
+    wanted = set(keys)
+    origins = list(dict.fromkeys(origin for origin, _, _ in keys))
+    destinations = list(dict.fromkeys(destination for _, destination, _ in keys))
+    blocks = [
+        (origin_chunk, destination_chunk)
+        for origin_chunk in _chunks(origins, DISTANCE_MATRIX_BLOCK_SIDE)
+        for destination_chunk in _chunks(destinations, DISTANCE_MATRIX_BLOCK_SIDE)
+        if any((o, d, mode) in wanted for o in origin_chunk for d in destination_chunk)
+    ]
+    semaphore = asyncio.Semaphore(settings.places_max_concurrency)
+
+    async def _fetch_block(origin_chunk: list[str], destination_chunk: list[str]):
+        async with semaphore:
+            return await _fetch_matrix(origin_chunk, destination_chunk, mode)
+
+    grids = await asyncio.gather(*(_fetch_block(*block) for block in blocks))
+    fetched: dict[TravelKey, tuple[int, str | None]] = {}
+    for (origin_chunk, destination_chunk), grid in zip(blocks, grids):
+        for origin, row in zip(origin_chunk, grid or []):
+            for destination, cell in zip(destination_chunk, row):
+                key = (origin, destination, mode)
+                if cell is not None and key in wanted:
+                    fetched[key] = cell
+    return fetched
+
+
+async def estimate_travel_matrix(addresses: Sequence[str]) -> dict[tuple[str, str], int]:
+    """Travel minutes between every ordered pair of distinct ``addresses``.
+
+    Cached legs are reused; the rest are fetched in 10x10 blocks. Pairs the
+    API could not route are missing from the result.
+    """
+
+    if not settings.google_maps_api_key:
+        return {}
+    mode = settings.travel_mode
+    normalized = {address: travel_cache.normalize_address(address) for address in addresses if address}
+    nodes = list(dict.fromkeys(normalized.values()))
+    keys = [(origin, destination, mode) for origin in nodes for destination in nodes if origin != destination]
+    if not keys:
+        return {}
+    legs = await travel_cache.cached_legs(keys, lambda missing: _fetch_pairs(missing, mode))
+
+    matrix: dict[tuple[str, str], int] = {}
+    for origin, origin_key in normalized.items():
+        for destination, destination_key in normalized.items():
+            leg = legs.get((origin_key, destination_key, mode))
+            if leg is not None:
+                matrix[(origin, destination)] = leg.minutes
+    return matrix
+
+
+async def estimate_travel_segments(home_address: str, task_address: str) -> TravelEstimate:
+    if not task_address:
         return None, None, None
-    text = first.get("duration", {}).get("text")
-    # round trip = out + back (minutes)
-    minutes = max(int(duration / 60), 1)
-    summary = text or "Drive"
-    return minutes, minutes, summary
+    estimates = await estimate_travel_batch(home_address, [task_address])
+    return estimates.get(task_address, (None, None, None))
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, replace
 from datetime import date, datetime, time, timedelta
 from typing import Sequence
 
-from sqlalchemy import delete, extract, select
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from .config import settings
+from .estimates import refresh_time_estimates
+from .geo import estimate_travel_matrix
 from .locations import ensure_home_location
-from .models import PlanBlock, Reminder, Task
+from .models import Location, PlanBlock, Reminder, Task
+from .routing import Stop, insertion_order, plan_route
+
+PLANNER_ENGINES = ("greedy", "optimized")
 
 
 def day_bounds(target_date: date) -> tuple[datetime, datetime]:
@@ -23,76 +30,373 @@ def day_bounds(target_date: date) -> tuple[datetime, datetime]:
     return start, end
 
 
-def get_plan_for_date(db: Session, target_date: date) -> Sequence[PlanBlock]:
+def reminder_window(first: date, last: date) -> tuple[datetime, datetime]:
+    """Trigger-time range for reminders belonging to the plans of ``first``..``last``."""
+
+    return day_bounds(first)[0] - timedelta(hours=2), day_bounds(last)[1]
+
+
+async def get_plan_blocks(db: AsyncSession, first: date, last: date) -> Sequence[PlanBlock]:
+    # half-open calendar range so the start_time index serves the scan
     stmt = (
         select(PlanBlock)
-        .where(extract("year", PlanBlock.start_time) == target_date.year)
-        .where(extract("month", PlanBlock.start_time) == target_date.month)
-        .where(extract("day", PlanBlock.start_time) == target_date.day)
+        .where(PlanBlock.start_time >= datetime.combine(first, time.min))
+        .where(PlanBlock.start_time < datetime.combine(last + timedelta(days=1), time.min))
         .order_by(PlanBlock.start_time)
     )
-    return db.execute(stmt).scalars().all()
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def get_reminders(db: AsyncSession, first: date, last: date) -> Sequence[Reminder]:
+    stmt = (
+        select(Reminder)
+        .where(Reminder.trigger_time.between(*reminder_window(first, last)))
+        .order_by(Reminder.trigger_time)
+    )
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def get_plan_for_date(db: AsyncSession, target_date: date) -> Sequence[PlanBlock]:
+    return await get_plan_blocks(db, target_date, target_date)
+
+
+async def _open_tasks(db: AsyncSession) -> list[Task]:
+    stmt = (
+        select(Task)
+        .where(Task.status.in_(["pending", "scheduled"]))
+        # position keeps the dragged order where reordering clamped priorities into a tie
+        .order_by(Task.priority.desc(), Task.due_date, Task.position, Task.id)
+    )
+    return list((await db.execute(stmt)).scalars())
+
+
+@dataclass(frozen=True)
+class ScheduledTask:
+    task: Task
+    start: datetime
+    end: datetime
+    # minutes of travel right before ``start``; reminders fire ahead of departure
+    travel_minutes: int = 0
+
+
+def greedy_schedule(tasks: Sequence[Task], start: datetime, end: datetime) -> list[ScheduledTask]:
+    """Baseline: pack tasks back to back in priority order until one does not fit."""
+
+    cursor = start
+    schedule: list[ScheduledTask] = []
+    for task in tasks:
+        duration = timedelta(minutes=task.time_estimate_minutes or task.duration_minutes)
+        block_end = cursor + duration
+        if block_end > end:
+            break
+        schedule.append(ScheduledTask(task=task, start=cursor, end=block_end))
+        cursor = block_end
+    return schedule
+
+
+async def _travel_matrix(
+    home: Location,
+    tasks: Sequence[Task],
+    origin: str | None = None,
+) -> tuple[list[list[int]], dict[str, int]]:
+    """Build a node matrix (0 = home) over ``origin`` and the distinct task locations."""
+
+    located = [origin] if origin else []
+    located.extend(task.location for task in tasks if task.location)
+    addresses = list(dict.fromkeys(located))
+    nodes = {address: index for index, address in enumerate(addresses, start=1)}
+    size = len(addresses) + 1
+    matrix = [[0] * size for _ in range(size)]
+    if not home.address or not addresses:
+        return matrix, nodes
+
+    pairs = await estimate_travel_matrix([home.address, *addresses])
+    names = [home.address, *addresses]
+    for i, origin in enumerate(names):
+        for j, destination in enumerate(names):
+            if i == j:
+                continue
+            minutes = pairs.get((origin, destination))
+            if minutes is None:
+                # unknown pair: detour via home when both home legs are known
+                minutes = pairs.get((origin, home.address), 0) + pairs.get((home.address, destination), 0)
+            matrix[i][j] = minutes
+    return matrix, nodes
+
 
+def _route_candidates(stops: Sequence[Stop], by_id: dict[int, Task], horizon: int, *, from_home: bool) -> list[Stop]:
+    """The stops worth a place in the travel matrix, in insertion order.
 
-def generate_plan(db: Session, target_date: date) -> tuple[list[PlanBlock], list[Reminder]]:
+    Stops that cannot fit the window even on their own are dropped. The rest
+    are taken until their durations fill the window ``planner_candidate_fill``
+    times over, or ``planner_max_candidates`` are chosen, so the matrix grows
+    with the length of the day rather than with the backlog.
+    """
+
+    chosen: list[Stop] = []
+    filled = 0
+    budget = horizon * settings.planner_candidate_fill
+    for stop in sorted(stops, key=insertion_order):
+        if filled >= budget or len(chosen) >= settings.planner_max_candidates:
+            break
+        alone = stop.duration
+        estimate = by_id[stop.task_id].time_estimate_minutes
+        if from_home and estimate is not None:
+            # stored round trip from home plus the time on site
+            alone = max(alone, estimate)
+        if alone > horizon:
+            continue
+        chosen.append(stop)
+        filled += stop.duration
+    return chosen
+
+
+async def optimized_schedule(
+    tasks: Sequence[Task],
+    home: Location,
+    start: datetime,
+    end: datetime,
+    *,
+    origin: str | None = None,
+) -> list[ScheduledTask]:
+    """Route-aware schedule honouring due dates, travel time and the day window.
+
+    ``origin`` is where the day resumes when only its tail is being planned;
+    the route starts there at ``start`` instead of at home.
+    """
+
+    horizon = int((end - start).total_seconds() // 60)
+    stops: list[Stop] = []
+    for task in tasks:
+        deadline = None
+        overdue = False
+        if task.due_date is not None:
+            due = int((task.due_date - start).total_seconds() // 60)
+            overdue = due <= 0
+            if 0 < due < horizon:
+                deadline = due
+        stops.append(
+            Stop(
+                task_id=task.id,
+                node=None,
+                duration=task.duration_minutes or settings.default_block_minutes,
+                priority=task.priority,
+                deadline=deadline,
+                overdue=overdue,
+                position=task.position,
+            )
+        )
+
+    by_id = {task.id: task for task in tasks}
+    stops = _route_candidates(stops, by_id, horizon, from_home=origin is None)
+    matrix, nodes = await _travel_matrix(home, [by_id[stop.task_id] for stop in stops], origin)
+    stops = [replace(stop, node=nodes.get(by_id[stop.task_id].location)) for stop in stops]
+    route = plan_route(
+        stops,
+        matrix,
+        horizon,
+        origin=nodes.get(origin, 0) if origin else 0,
+        time_budget=settings.planner_time_budget_ms / 1000,
+    )
+    return [
+        ScheduledTask(
+            task=by_id[visit.stop.task_id],
+            start=start + timedelta(minutes=visit.start),
+            end=start + timedelta(minutes=visit.end),
+            travel_minutes=visit.travel,
+        )
+        for visit in route
+    ]
+
+
+async def generate_plan(
+    db: AsyncSession,
+    target_date: date,
+    *,
+    engine: str | None = None,
+) -> tuple[list[PlanBlock], list[Reminder]]:
+    engine = engine or settings.planner_engine
+    if engine not in PLANNER_ENGINES:
+        raise ValueError(f"Unknown planner engine {engine!r}")
     start, end = day_bounds(target_date)
-    home = ensure_home_location(db)
+    home = await ensure_home_location(db)
+
+    tasks = await _open_tasks(db)
+    # stored estimates are reused; one batched pass covers any whose inputs changed
+    await refresh_time_estimates(db, tasks)
+
+    if engine == "greedy":
+        schedule = greedy_schedule(tasks, start, end)
+    else:
+        schedule = await optimized_schedule(tasks, home, start, end)
 
-    # wipe existing plan blocks/reminders for the date
-    db.execute(
+    # wipe existing plan blocks/reminders for the date; only now, so the write
+    # lock is never held while waiting on travel lookups
+    await db.execute(
         delete(PlanBlock).where(
             PlanBlock.start_time.between(start, end),
         )
     )
-    db.execute(
+    await db.execute(
         delete(Reminder).where(
-            Reminder.trigger_time.between(start - timedelta(hours=2), end),
+            Reminder.trigger_time.between(*reminder_window(target_date, target_date)),
         )
     )
 
-    tasks = (
-        db.query(Task)
-        .filter(Task.status.in_(["pending", "scheduled"]))
-        .order_by(Task.priority.desc(), Task.due_date)
-        .all()
-    )
-
-    cursor = start
     plan_blocks: list[PlanBlock] = []
     reminders: list[Reminder] = []
-
-    for task in tasks:
-        duration = timedelta(minutes=task.duration_minutes)
-        block_end = cursor + duration
-        if block_end > end:
-            break
-
+    for item in schedule:
+        task = item.task
         block = PlanBlock(
             task_id=task.id,
-            start_time=cursor,
-            end_time=block_end,
+            start_time=item.start,
+            end_time=item.end,
             location=task.location,
         )
         db.add(block)
         plan_blocks.append(block)
 
-        reminder = Reminder(
-            task_id=task.id,
-            trigger_time=cursor - timedelta(minutes=10),
-            reminder_type="location" if task.location else "time",
-            location_hint=task.location or home.name,
-        )
+        reminder = Reminder(task_id=task.id, **_reminder_fields(item, home))
         db.add(reminder)
         reminders.append(reminder)
 
         task.status = "scheduled"
-        cursor = block_end
 
-    db.commit()
+    await db.commit()
+    return plan_blocks, reminders
 
-    for block in plan_blocks:
-        db.refresh(block)
-    for reminder in reminders:
-        db.refresh(reminder)
 
-    return plan_blocks, reminders
+def _reminder_fields(item: ScheduledTask, home: Location) -> dict:
+    task = item.task
+    return {
+        "trigger_time": item.start - timedelta(minutes=item.travel_minutes + 10),
+        "reminder_type": "location" if task.location else "time",
+        "location_hint": task.location or home.name,
+    }
+
+
+def _affected_index(blocks: Sequence[PlanBlock], changed: set[int], candidates: dict[int, Task]) -> int:
+    """Index of the first block whose slot may differ once ``changed`` tasks are replanned."""
+
+    planned = {block.task_id for block in blocks}
+    first = next((index for index, block in enumerate(blocks) if block.task_id in changed), len(blocks))
+    for task_id in changed:
+        task = candidates.get(task_id)
+        if task is None:
+            if task_id in planned:
+                continue
+            # gone or finished without a block we can locate: repair the whole day
+            return 0
+        # a new or reprioritised task can displace any block it does not rank
+        # below; ties may go either way once due dates and routing weigh in
+        first = min(
+            first,
+            next(
+                (
+                    index
+                    for index, block in enumerate(blocks)
+                    if block.task_id != task_id and block.task.priority <= task.priority
+                ),
+                len(blocks),
+            ),
+        )
+    return first
+
+
+async def replan(
+    db: AsyncSession,
+    target_date: date,
+    changed_task_ids: Sequence[int],
+    *,
+    engine: str | None = None,
+) -> tuple[list[PlanBlock], list[Reminder]]:
+    """Repair an existing day plan after ``changed_task_ids`` were edited.
+
+    Blocks before the first affected one are kept as they are; the rest of
+    the day is rescheduled from where that prefix ends, and only rows whose
+    slot actually moved are updated, inserted or deleted. Falls back to
+    :func:`generate_plan` when the day has no plan yet.
+    """
+
+    engine = engine or settings.planner_engine
+    if engine not in PLANNER_ENGINES:
+        raise ValueError(f"Unknown planner engine {engine!r}")
+    start, end = day_bounds(target_date)
+    blocks = (
+        await db.execute(
+            select(PlanBlock)
+            .where(PlanBlock.start_time.between(start, end))
+            .order_by(PlanBlock.start_time)
+            .options(selectinload(PlanBlock.task))
+        )
+    ).scalars().all()
+    if not blocks:
+        return await generate_plan(db, target_date, engine=engine)
+    home = await ensure_home_location(db)
+
+    tasks = await _open_tasks(db)
+    first = _affected_index(blocks, set(changed_task_ids), {task.id: task for task in tasks})
+    kept, stale = blocks[:first], blocks[first:]
+    kept_ids = {block.task_id for block in kept}
+    remaining = [task for task in tasks if task.id not in kept_ids]
+    resume = kept[-1].end_time if kept else start
+    origin = next((block.location for block in reversed(kept) if block.location), None)
+
+    await refresh_time_estimates(db, remaining)
+    if engine == "greedy":
+        schedule = greedy_schedule(remaining, resume, end)
+    else:
+        schedule = await optimized_schedule(remaining, home, resume, end, origin=origin)
+
+    in_window = Reminder.trigger_time.between(*reminder_window(target_date, target_date))
+    old_blocks = {block.task_id: block for block in stale}
+    old_reminders = {
+        reminder.task_id: reminder
+        for reminder in (
+            await db.execute(
+                select(Reminder).where(
+                    Reminder.task_id.in_([*old_blocks, *(item.task.id for item in schedule)]),
+                    in_window,
+                )
+            )
+        ).scalars()
+    }
+
+    for item in schedule:
+        task = item.task
+        block = old_blocks.pop(task.id, None)
+        if block is None:
+            db.add(PlanBlock(task_id=task.id, start_time=item.start, end_time=item.end, location=task.location))
+        elif (block.start_time, block.end_time, block.location) != (item.start, item.end, task.location):
+            block.start_time, block.end_time, block.location = item.start, item.end, task.location
+
+        fields = _reminder_fields(item, home)
+        reminder = old_reminders.pop(task.id, None)
+        if reminder is None:
+            db.add(Reminder(task_id=task.id, **fields))
+        else:
+            for field, value in fields.items():
+                if getattr(reminder, field) != value:
+                    setattr(reminder, field, value)
+        task.status = "scheduled"
+
+    # whatever was pushed out of the day goes back to the pending pool
+    for task_id, block in old_blocks.items():
+        await db.delete(block)
+        reminder = old_reminders.pop(task_id, None)
+        if reminder is not None:
+            await db.delete(reminder)
+        if block.task.status == "scheduled":
+            block.task.status = "pending"
+
+    await db.commit()
+
+    plan_blocks = await get_plan_for_date(db, target_date)
+    reminders = (
+        await db.execute(
+            select(Reminder)
+            .where(Reminder.task_id.in_([block.task_id for block in plan_blocks]), in_window)
+            .order_by(Reminder.trigger_time)
+        )
+    ).scalars().all()
+    return list(plan_blocks), list(reminders)
@@ -0,0 +1,147 @@
+"""Opt-in cProfile capture of single requests.
+
+With ``settings.profiling_enabled`` the middleware profiles a request when it
+carries ``settings.profiling_header`` (matching ``profiling_token`` if one is
+set) or falls into ``profiling_sample_rate``. Each capture is written to
+``data/profiles/`` as a ``.prof`` pstats dump, which ``python -m pstats``,
+snakeviz or gprof2dot open directly; the newest ``profiling_max_files`` are
+kept. When profiling is disabled the middleware is not installed at all.
+
+cProfile hooks the event loop thread, so a capture also contains whatever
+other requests ran while the profiled one was awaiting; work pushed to
+threads (spaCy) shows up only as the await. One capture runs at a time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import logging
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Mapping
+from urllib.parse import quote, unquote
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# <id>_<METHOD>_<duration>ms_<quoted route>.prof, where the id is a UTC timestamp
+_CAPTURE_NAME = re.compile(r"^(?P<id>\d{8}T\d{12})_(?P<method>[A-Z]+)_(?P<ms>\d+)ms_(?P<route>.+)\.prof$")
+_ID = re.compile(r"^\d{8}T\d{12}$")
+
+_capture_lock = threading.Lock()
+
+
+def _new_id() -> str:
+    return datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+
+
+def header_allows(headers: Mapping[str, str]) -> bool:
+    """Whether ``headers`` carry the profiling header (with the token, when one is set).
+
+    Gates both triggering a capture and reading captures back.
+    """
+
+    requested = headers.get(settings.profiling_header.lower())
+    if requested is None:
+        return False
+    return requested == settings.profiling_token if settings.profiling_token else requested not in ("", "0")
+
+
+def should_profile(headers: Mapping[str, str]) -> bool:
+    if headers.get(settings.profiling_header.lower()) is not None:
+        return header_allows(headers)
+    return settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate
+
+
+def _write(profiler: cProfile.Profile, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(path)
+    captures = sorted(path.parent.glob("*.prof"), reverse=True)
+    for stale in captures[settings.profiling_max_files :]:
+        stale.unlink(missing_ok=True)
+
+
+def recent_captures(limit: int) -> list[dict]:
+    """Newest captures first, described from their file names."""
+
+    found = []
+    if not settings.profiles_dir.is_dir():
+        return found
+    for path in sorted(settings.profiles_dir.glob("*.prof"), reverse=True):
+        match = _CAPTURE_NAME.match(path.name)
+        if match is None:
+            continue
+        found.append(
+            {
+                "id": match["id"],
+                "name": path.name,
+                "method": match["method"],
+                "route": unquote(match["route"]),
+                "duration_ms": int(match["ms"]),
+                "size_bytes": path.stat().st_size,
+                "created_at": datetime.strptime(match["id"], "%Y%m%dT%H%M%S%f"),
+            }
+        )
+        if len(found) == limit:
+            break
+    return found
+
+
+def capture_path(capture_id: str) -> Path | None:
+    if not _ID.match(capture_id) or not settings.profiles_dir.is_dir():
+        return None
+    return next(settings.profiles_dir.glob(f"{capture_id}_*.prof"), None)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests :func:`should_profile` selects.
+
+    The response of a profiled request carries the capture id in
+    ``X-Profile-Id``; ``GET /profiles/{id}`` downloads it. The header goes out
+    with the response start, but the file is written only after the body has
+    finished, so a client fetching it straight away may briefly get a 404.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        # reading captures back sends the same header; do not profile that
+        if scope["type"] != "http" or scope["path"].startswith("/profiles"):
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        if not should_profile(headers) or not _capture_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        capture_id = _new_id()
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", capture_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        began = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+            elapsed_ms = round((time.perf_counter() - began) * 1000)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            name = f"{capture_id}_{scope['method']}_{elapsed_ms}ms_{quote(route, safe='')}.prof"
+            try:
+                await asyncio.to_thread(_write, profiler, settings.profiles_dir / name)
+            except OSError:
+                logger.warning("could not write profile %s", name, exc_info=True)
+        finally:
+            _capture_lock.release()
@@ -0,0 +1,250 @@
+"""Travel-aware day routing: cheapest insertion plus 2-opt / or-opt local search.
+
+Times are integer minutes measured from the start of the planning window.
+Node ``0`` of the travel matrix is home; the route starts at ``origin``
+(home unless a partial day is being repaired) and must be back home by
+``horizon``. Stops without a node (tasks with no location) are done
+wherever the previous stop left off and add no travel.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Sequence
+
+Matrix = Sequence[Sequence[int]]
+
+INF = float("inf")
+
+
+@dataclass(frozen=True)
+class Stop:
+    task_id: int
+    node: int | None
+    duration: int
+    priority: int
+    # latest minute the stop may finish; None means no deadline today
+    deadline: int | None = None
+    overdue: bool = False
+    # the task's manual order among equal priorities
+    position: int = 0
+
+
+@dataclass(frozen=True)
+class Visit:
+    stop: Stop
+    travel: int
+    start: int
+    end: int
+
+
+def insertion_order(stop: Stop) -> tuple:
+    """Sort key candidates are inserted by: overdue first, then priority, deadline, position and id."""
+
+    return (
+        not stop.overdue,
+        -stop.priority,
+        stop.deadline if stop.deadline is not None else INF,
+        stop.position,
+        stop.task_id,
+    )
+
+
+def simulate(route: Sequence[Stop], matrix: Matrix, horizon: int, origin: int = 0) -> tuple[bool, int, int]:
+    """Return ``(feasible, total_travel, finish)`` for visiting ``route`` in order."""
+
+    clock = 0
+    travel = 0
+    pos = origin
+    for stop in route:
+        node = stop.node
+        if node is not None:
+            leg = matrix[pos][node]
+            pos = node
+            travel += leg
+            clock += leg
+        clock += stop.duration
+        if stop.deadline is not None and clock > stop.deadline:
+            return False, travel, clock
+    back = matrix[pos][0]
+    return clock + back <= horizon, travel + back, clock + back
+
+
+def visits(route: Sequence[Stop], matrix: Matrix, origin: int = 0) -> list[Visit]:
+    clock = 0
+    pos = origin
+    result: list[Visit] = []
+    for stop in route:
+        leg = 0
+        if stop.node is not None:
+            leg = matrix[pos][stop.node]
+            pos = stop.node
+        start = clock + leg
+        clock = start + stop.duration
+        result.append(Visit(stop=stop, travel=leg, start=start, end=clock))
+    return result
+
+
+class _Timeline:
+    """Per-route arrays that make insertion checks O(1) outside runs of unlocated stops."""
+
+    def __init__(self, route: list[Stop], matrix: Matrix, horizon: int, origin: int) -> None:
+        n = len(route)
+        self.route = route
+        self.pos_before = [origin] * n
+        self.end = [0] * n
+        clock = 0
+        pos = origin
+        for index, stop in enumerate(route):
+            self.pos_before[index] = pos
+            if stop.node is not None:
+                clock += matrix[pos][stop.node]
+                pos = stop.node
+            clock += stop.duration
+            self.end[index] = clock
+        self.final_pos = pos
+        self.horizon_slack = horizon - (clock + matrix[pos][0])
+
+        self.own_slack = [
+            (stop.deadline - self.end[index]) if stop.deadline is not None else INF
+            for index, stop in enumerate(route)
+        ]
+        self.suffix_slack = [INF] * (n + 1)
+        self.next_located = [n] * (n + 1)
+        for index in range(n - 1, -1, -1):
+            self.suffix_slack[index] = min(self.own_slack[index], self.suffix_slack[index + 1])
+            self.next_located[index] = index if route[index].node is not None else self.next_located[index + 1]
+
+    def best_insertion(self, stop: Stop, matrix: Matrix) -> tuple[float, int] | None:
+        """Return ``(added_travel, position)`` of the cheapest feasible insertion, if any."""
+
+        route = self.route
+        n = len(route)
+        best: tuple[float, int] | None = None
+        for position in range(n + 1):
+            prev_pos = self.pos_before[position] if position < n else self.final_pos
+            clock = self.end[position - 1] if position else 0
+            if stop.node is None:
+                leg_in = 0
+                shift_run = shift_rest = stop.duration
+                added = 0
+                run_end = position
+            else:
+                leg_in = matrix[prev_pos][stop.node]
+                shift_run = leg_in + stop.duration
+                run_end = self.next_located[position]
+                if run_end < n:
+                    target = route[run_end].node
+                    old_leg, new_leg = matrix[prev_pos][target], matrix[stop.node][target]
+                else:
+                    old_leg, new_leg = matrix[prev_pos][0], matrix[stop.node][0]
+                added = leg_in + new_leg - old_leg
+                shift_rest = shift_run + new_leg - old_leg
+
+            if stop.deadline is not None and clock + leg_in + stop.duration > stop.deadline:
+                continue
+            if shift_rest > self.horizon_slack or shift_rest > self.suffix_slack[run_end]:
+                continue
+            if any(shift_run > self.own_slack[index] for index in range(position, run_end)):
+                continue
+            # ties go to the later slot so equally cheap stops keep priority order
+            if best is None or added <= best[0]:
+                best = (added, position)
+        return best
+
+
+def _insert_all(
+    route: list[Stop],
+    candidates: list[Stop],
+    matrix: Matrix,
+    horizon: int,
+    origin: int,
+    deadline: float,
+) -> tuple[list[Stop], list[Stop]]:
+    skipped: list[Stop] = []
+    timeline = _Timeline(route, matrix, horizon, origin)
+    for index, stop in enumerate(candidates):
+        if time.perf_counter() > deadline:
+            skipped.extend(candidates[index:])
+            break
+        best = timeline.best_insertion(stop, matrix)
+        if best is None:
+            skipped.append(stop)
+            continue
+        route = route[: best[1]] + [stop] + route[best[1] :]
+        timeline = _Timeline(route, matrix, horizon, origin)
+    return route, skipped
+
+
+def _improve(route: list[Stop], matrix: Matrix, horizon: int, origin: int, deadline: float) -> list[Stop]:
+    """First-improvement or-opt (segments of 1-3) and 2-opt on total travel."""
+
+    _, best_travel, _ = simulate(route, matrix, horizon, origin)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        n = len(route)
+        for length in (1, 2, 3):
+            for i in range(n - length + 1):
+                segment = route[i : i + length]
+                rest = route[:i] + route[i + length :]
+                for j in range(len(rest) + 1):
+                    if j == i:
+                        continue
+                    candidate = rest[:j] + segment + rest[j:]
+                    ok, travel, _ = simulate(candidate, matrix, horizon, origin)
+                    if ok and travel < best_travel:
+                        route, best_travel, improved = candidate, travel, True
+                        break
+                    if time.perf_counter() > deadline:
+                        return route
+                if improved:
+                    break
+            if improved:
+                break
+        if improved:
+            continue
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                candidate = route[:i] + route[i : j + 1][::-1] + route[j + 1 :]
+                ok, travel, _ = simulate(candidate, matrix, horizon, origin)
+                if ok and travel < best_travel:
+                    route, best_travel, improved = candidate, travel, True
+                    break
+                if time.perf_counter() > deadline:
+                    return route
+            if improved:
+                break
+    return route
+
+
+def plan_route(
+    stops: Sequence[Stop],
+    matrix: Matrix,
+    horizon: int,
+    *,
+    origin: int = 0,
+    time_budget: float = 0.05,
+) -> list[Visit]:
+    """Choose and order ``stops`` to fit the window, favouring priority then less travel.
+
+    Candidates are inserted by (overdue, priority, deadline) at their
+    cheapest feasible slot; local search then shortens the route and the
+    freed time is offered to the stops that did not fit. Work stops once
+    ``time_budget`` seconds have passed, keeping the best feasible route.
+    """
+
+    deadline = time.perf_counter() + time_budget
+    ordered = sorted(stops, key=insertion_order)
+    route, skipped = _insert_all([], ordered, matrix, horizon, origin, INF)
+    while time.perf_counter() < deadline:
+        shorter = _improve(route, matrix, horizon, origin, deadline)
+        if not skipped:
+            route = shorter
+            break
+        route_after, still_skipped = _insert_all(shorter, skipped, matrix, horizon, origin, deadline)
+        if len(still_skipped) == len(skipped) and shorter is route:
+            break
+        route, skipped = route_after, still_skipped
+    return visits(route, matrix, origin)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, date as dt_date
-from typing import Optional, Sequence
+from typing import Literal, Optional, Sequence
 
 from pydantic import BaseModel, Field
 
@@ -19,6 +19,10 @@ class TaskCreate(TaskBase):
     pass
 
 
+class TaskBulkCreate(BaseModel):
+    tasks: list[TaskCreate] = Field(min_length=1)
+
+
 class TaskUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -29,6 +33,11 @@ class TaskUpdate(BaseModel):
     status: Optional[str] = None
 
 
+class TaskReorder(BaseModel):
+    # top row first
+    ids: list[int] = Field(min_length=1)
+
+
 class TaskRead(TaskBase):
     id: int
     status: str
@@ -38,6 +47,21 @@ class TaskRead(TaskBase):
     time_estimate_travel_to_minutes: Optional[int] = None
     time_estimate_travel_back_minutes: Optional[int] = None
     time_estimate_shopping_minutes: Optional[int] = None
+    inference_status: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class JobRead(BaseModel):
+    id: str
+    kind: str
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -82,6 +106,24 @@ class LocationSuggestionPreview(BaseModel):
 
 class LocationInferenceRequest(BaseModel):
     title: str
+    use_model: bool = False
+
+
+class ExtractionStats(BaseModel):
+    gazetteer: int
+    heuristic: int
+    model: int
+    miss: int
+
+
+class ProfileRead(BaseModel):
+    id: str
+    name: str
+    method: str
+    route: str
+    duration_ms: int
+    size_bytes: int
+    created_at: datetime
 
 
 class LocationBase(BaseModel):
@@ -108,8 +150,19 @@ class PlanResponse(BaseModel):
     home_location: Optional[LocationRead] = None
 
 
+class PlanRangeResponse(BaseModel):
+    start: dt_date
+    end: dt_date
+    blocks: Sequence[PlanBlockRead]
+    reminders: Sequence[ReminderRead]
+    home_location: Optional[LocationRead] = None
+
+
 class PlanRequest(BaseModel):
     date: Optional[dt_date] = None
+    engine: Optional[Literal["greedy", "optimized"]] = None
+    # when set, repair the existing plan around these tasks instead of rebuilding it
+    changed_task_ids: Optional[list[int]] = None
 
 
 class ClientConfig(BaseModel):
@@ -0,0 +1,115 @@
+"""In-memory, precompressed delivery of the single-page client."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass
+from email.utils import formatdate
+from pathlib import Path
+
+from fastapi import Request, Response
+
+from .config import settings
+
+try:
+    import brotli
+except ImportError:  # optional: gzip alone still covers every browser
+    brotli = None
+
+
+@dataclass(frozen=True)
+class _Variants:
+    mtime_ns: int
+    last_modified: str
+    bodies: dict[str, bytes]  # content-coding -> bytes; "identity" is always present
+    # content-coding -> strong ETag; the bodies differ byte for byte, so each has its own
+    etags: dict[str, str]
+
+
+# suffixes marking the compressed variants' ETags
+_ETAG_SUFFIXES = {"identity": "", "gzip": "-gz", "br": "-br"}
+
+
+def _opaque_tags(header: str) -> set[str]:
+    """Entity tags listed in an If-None-Match header, compared weakly as RFC 9110 requires."""
+
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        tags.add(tag[2:] if tag.startswith("W/") else tag)
+    return tags
+
+
+def _accepted_encodings(header: str) -> dict[str, float]:
+    accepted: dict[str, float] = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+class StaticAsset:
+    """A file kept in memory with gzip/brotli variants, rebuilt when its mtime changes."""
+
+    def __init__(self, path: Path, media_type: str) -> None:
+        self.path = path
+        self.media_type = media_type
+        self._variants: _Variants | None = None
+        self._lock = threading.Lock()
+
+    def load(self) -> _Variants:
+        mtime_ns = self.path.stat().st_mtime_ns
+        variants = self._variants
+        if variants is not None and variants.mtime_ns == mtime_ns:
+            return variants
+        with self._lock:
+            if self._variants is not None and self._variants.mtime_ns == mtime_ns:
+                return self._variants
+            raw = self.path.read_bytes()
+            bodies = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                bodies["br"] = brotli.compress(raw, quality=11)
+            digest = hashlib.sha1(raw).hexdigest()[:20]
+            self._variants = _Variants(
+                mtime_ns=mtime_ns,
+                last_modified=formatdate(mtime_ns / 1e9, usegmt=True),
+                bodies=bodies,
+                etags={coding: f'"{digest}{_ETAG_SUFFIXES[coding]}"' for coding in bodies},
+            )
+            return self._variants
+
+    def response(self, request: Request) -> Response:
+        variants = self.load()
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        coding = "identity"
+        for candidate in ("br", "gzip"):
+            if candidate in variants.bodies and accepted.get(candidate, accepted.get("*", 0.0)) > 0:
+                coding = candidate
+                break
+
+        headers = {
+            "ETag": variants.etags[coding],
+            "Last-Modified": variants.last_modified,
+            "Cache-Control": f"public, max-age={settings.ui_cache_max_age_seconds}, must-revalidate",
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = _opaque_tags(if_none_match)
+            # any variant's tag still names the current file; the 304 carries the one to use now
+            if "*" in tags or tags & set(variants.etags.values()):
+                return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(content=variants.bodies[coding], media_type=self.media_type, headers=headers)
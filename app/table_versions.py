@@ -0,0 +1,116 @@
+"""Cheap change tracking for conditional GETs.
+
+Every ORM flush and bulk ``insert()``/``update()``/``delete()`` bumps the counter of the
+tables it touched, inside the same transaction. Read endpoints hash the
+counters of the tables they depend on into a weak ETag, so a matching
+``If-None-Match`` can be answered with ``304`` before any real query runs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import TableVersion
+
+_PENDING = "changed_tables"
+
+
+def _mark(session: Session, tables: Iterable[str]) -> None:
+    session.info.setdefault(_PENDING, set()).update(
+        name for name in tables if name != TableVersion.__tablename__
+    )
+
+
+def _flush_pending(session: Session) -> None:
+    tables = session.info.pop(_PENDING, None)
+    if not tables:
+        return
+    now = datetime.utcnow()
+    stmt = insert(TableVersion).values([{"name": name, "version": 1, "updated_at": now} for name in sorted(tables)])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TableVersion.name],
+        set_={"version": TableVersion.version + 1, "updated_at": now},
+    )
+    # Core execution: no ORM events, no autoflush
+    session.connection().execute(stmt)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_statements(state) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        _mark(state.session, [state.statement.table.name])
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_objects(session: Session, _context) -> None:
+    dirty = (obj for obj in session.dirty if session.is_modified(obj, include_collections=False))
+    _mark(session, (obj.__table__.name for group in (session.new, dirty, session.deleted) for obj in group))
+    _flush_pending(session)
+
+
+@event.listens_for(Session, "before_commit")
+def _track_before_commit(session: Session) -> None:
+    # bulk statements that were not followed by a flush
+    _flush_pending(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: datetime | None
+
+    @property
+    def last_modified_header(self) -> str | None:
+        if self.last_modified is None:
+            return None
+        return format_datetime(self.last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+
+    def matches(self, if_none_match: str | None, if_modified_since: str | None) -> bool:
+        """Whether the client's copy is current (``If-None-Match`` wins over the date)."""
+
+        if if_none_match is not None:
+            tags = {tag.strip() for tag in if_none_match.split(",")}
+            # weak comparison: W/"x" and "x" name the same representation
+            return "*" in tags or self.etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+        if if_modified_since is not None and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return self.last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+        return False
+
+
+async def validators(db: AsyncSession, tables: Iterable[str], variant: str = "") -> Validators:
+    """One primary-key lookup over ``table_versions`` for the given tables.
+
+    ``variant`` names which representation of those tables is being served
+    (a page, a filter), so different views never share one ETag.
+    """
+
+    names = sorted(set(tables))
+    rows = {
+        row.name: row
+        for row in (await db.execute(select(TableVersion).where(TableVersion.name.in_(names)))).scalars()
+    }
+    digest = hashlib.sha1()
+    for name in names:
+        row = rows.get(name)
+        digest.update(f"{name}:{row.version if row else 0}:{row.updated_at.isoformat() if row else ''};".encode())
+    digest.update(variant.encode())
+    stamps = [row.updated_at for row in rows.values()]
+    return Validators(etag=f'W/"{digest.hexdigest()[:20]}"', last_modified=max(stamps) if stamps else None)
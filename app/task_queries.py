@@ -0,0 +1,87 @@
+"""Keyset-paginated, filtered task listing."""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload, selectinload
+
+from .models import Task
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(task: Task) -> str:
+    raw = json.dumps([task.priority, task.position, task.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, int, int]:
+    try:
+        priority, position, task_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(priority), int(position), int(task_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor.") from exc
+
+
+@dataclass(frozen=True)
+class TaskFilters:
+    statuses: Sequence[str] | None = None
+    due_after: datetime | None = None
+    due_before: datetime | None = None
+    has_location: bool | None = None
+
+
+async def list_tasks_page(
+    db: AsyncSession,
+    *,
+    limit: int,
+    cursor: str | None = None,
+    filters: TaskFilters = TaskFilters(),
+    with_suggestions: bool = True,
+) -> tuple[list[Task], str | None]:
+    """Return one page ordered by ``(priority DESC, position, id)`` and the cursor of the next one."""
+
+    stmt = select(Task).order_by(Task.priority.desc(), Task.position, Task.id).limit(limit + 1)
+    if cursor is not None:
+        priority, position, task_id = decode_cursor(cursor)
+        # the outer bound lets the index seek; only ties on ``priority`` are re-scanned
+        stmt = stmt.where(
+            Task.priority <= priority,
+            or_(
+                Task.priority < priority,
+                and_(
+                    Task.priority == priority,
+                    or_(Task.position > position, and_(Task.position == position, Task.id > task_id)),
+                ),
+            ),
+        )
+    if filters.statuses:
+        stmt = stmt.where(Task.status.in_(filters.statuses))
+    if filters.due_after is not None:
+        stmt = stmt.where(Task.due_date >= filters.due_after)
+    if filters.due_before is not None:
+        stmt = stmt.where(Task.due_date < filters.due_before)
+    if filters.has_location is True:
+        stmt = stmt.where(Task.location.is_not(None), Task.location != "")
+    elif filters.has_location is False:
+        stmt = stmt.where(or_(Task.location.is_(None), Task.location == ""))
+    if with_suggestions:
+        stmt = stmt.options(selectinload(Task.location_suggestions))
+    else:
+        # projections still validate through TaskRead; never lazy-load what they drop
+        stmt = stmt.options(noload(Task.location_suggestions))
+
+    tasks = list((await db.execute(stmt)).scalars())
+    if len(tasks) <= limit:
+        return tasks, None
+    tasks = tasks[:limit]
+    return tasks, encode_cursor(tasks[-1])
@@ -0,0 +1,232 @@
+"""Streaming NDJSON export and import of tasks and plans.
+
+Every line is one row: ``{"type": "task", "id": 1, "title": ...}``. Rows keep
+their ids so references survive a round trip, and importing a row whose id
+already exists replaces it, which makes restores repeatable.
+
+CLI: ``python -m app.transfer export -o backup.ndjson`` and
+``python -m app.transfer import backup.ndjson`` (``-`` for stdin/stdout).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import date, datetime
+from typing import Any, AsyncIterable, AsyncIterator, BinaryIO, Iterable, Iterator
+
+from sqlalchemy import Column, DateTime, Table, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import Location, PlanBlock, Reminder, Task, TaskLocationSuggestion
+
+# parents before children, so an import never references a row it has not written
+RECORD_TABLES: dict[str, Table] = {
+    "location": Location.__table__,
+    "task": Task.__table__,
+    "suggestion": TaskLocationSuggestion.__table__,
+    "plan_block": PlanBlock.__table__,
+    "reminder": Reminder.__table__,
+}
+
+
+class ImportFormatError(ValueError):
+    """A line the importer cannot write; ``imported`` counts the rows committed before it."""
+
+    def __init__(self, message: str, imported: dict[str, int] | None = None) -> None:
+        super().__init__(message)
+        self.imported = imported or {}
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _export_statement(table: Table):
+    return select(table).order_by(*table.primary_key.columns).execution_options(yield_per=settings.export_batch_size)
+
+
+def _export_line(kind: str, row: Any) -> bytes:
+    return json.dumps({"type": kind, **row}, default=_json_default).encode() + b"\n"
+
+
+def iter_export(db: Session) -> Iterator[bytes]:
+    """Yield one NDJSON line per row, fetching ``export_batch_size`` rows at a time."""
+
+    for kind, table in RECORD_TABLES.items():
+        for row in db.execute(_export_statement(table)).mappings():
+            yield _export_line(kind, row)
+
+
+async def aiter_export(db: AsyncSession) -> AsyncIterator[bytes]:
+    """:func:`iter_export` for the async request path."""
+
+    for kind, table in RECORD_TABLES.items():
+        result = await db.stream(_export_statement(table))
+        async for row in result.mappings():
+            yield _export_line(kind, row)
+
+
+def _column_default(column: Column) -> Any:
+    default = column.default
+    if default is None or not (default.is_scalar or default.is_callable):
+        return None
+    return default.arg(None) if default.is_callable else default.arg
+
+
+def _required(column: Column) -> bool:
+    if column.nullable or column.default is not None or column.server_default is not None:
+        return False
+    # an integer primary key is assigned by SQLite when left out
+    return not (column.primary_key and column.autoincrement in (True, "auto"))
+
+
+class Importer:
+    """Buffer parsed rows per table and write them with one executemany per batch.
+
+    Each batch commits on its own so the writer lock is never held while the
+    caller waits for more input; re-running an interrupted import is safe.
+    Rows are filled out to every column (defaults where the line left one
+    out), so one batch always binds the same parameters. A failed batch is
+    rolled back and reported with the line range and the counts committed
+    so far.
+    """
+
+    def __init__(self, db: Session, *, batch_size: int | None = None) -> None:
+        self.db = db
+        self.batch_size = batch_size or settings.import_batch_size
+        self.counts = {kind: 0 for kind in RECORD_TABLES}
+        self._pending: dict[str, list[dict[str, Any]]] = {kind: [] for kind in RECORD_TABLES}
+        self._buffered = 0
+        self._line = 0
+        self._batch_start = 1
+        self._columns = {kind: {column.name: column for column in table.columns} for kind, table in RECORD_TABLES.items()}
+        self._required = {
+            kind: [name for name, column in columns.items() if _required(column)] for kind, columns in self._columns.items()
+        }
+
+    def add_line(self, line: bytes | str) -> None:
+        self._line += 1
+        if not line.strip():
+            return
+        try:
+            record = json.loads(line)
+            kind = record.pop("type")
+            columns = self._columns[kind]
+            missing = [name for name in self._required[kind] if name not in record]
+            if missing:
+                raise ImportFormatError(f"Line {self._line}: missing {', '.join(missing)}", dict(self.counts))
+            row = {}
+            for name, column in columns.items():
+                value = record[name] if name in record else _column_default(column)
+                if value is not None and isinstance(column.type, DateTime) and isinstance(value, str):
+                    value = datetime.fromisoformat(value)
+                row[name] = value
+        except ImportFormatError:
+            raise
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            raise ImportFormatError(f"Line {self._line}: {exc!r}", dict(self.counts)) from exc
+        self._pending[kind].append(row)
+        self._buffered += 1
+
+    @property
+    def full(self) -> bool:
+        return self._buffered >= self.batch_size
+
+    def add_lines(self, lines: Iterable[bytes | str]) -> None:
+        for line in lines:
+            self.add_line(line)
+            if self.full:
+                self.flush()
+
+    def flush(self) -> None:
+        if not self._buffered:
+            return
+        lines = f"Lines {self._batch_start}-{self._line}"
+        try:
+            for kind, rows in self._pending.items():
+                if rows:
+                    self.db.execute(insert(RECORD_TABLES[kind]).prefix_with("OR REPLACE"), rows)
+            self.db.commit()
+        except SQLAlchemyError as exc:
+            self.db.rollback()
+            raise ImportFormatError(f"{lines}: {getattr(exc, 'orig', None) or exc}", dict(self.counts)) from exc
+        for kind, rows in self._pending.items():
+            self.counts[kind] += len(rows)
+            rows.clear()
+        self._buffered = 0
+        self._batch_start = self._line + 1
+
+
+def export_to(db: Session, stream: BinaryIO) -> None:
+    for line in iter_export(db):
+        stream.write(line)
+
+
+def import_from(db: Session, stream: BinaryIO) -> dict[str, int]:
+    importer = Importer(db)
+    importer.add_lines(stream)
+    importer.flush()
+    return importer.counts
+
+
+async def import_stream(db: AsyncSession, chunks: AsyncIterable[bytes]) -> dict[str, int]:
+    """Import an NDJSON byte stream that arrives in arbitrary chunks, e.g. a request body."""
+
+    importer = Importer(db.sync_session)
+
+    async def flush() -> None:
+        await db.run_sync(lambda _: importer.flush())
+
+    pending = b""
+    async for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            importer.add_line(line)
+            if importer.full:
+                await flush()
+    importer.add_line(pending)
+    await flush()
+    return importer.counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export or import tasks and plans as NDJSON.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_cmd = commands.add_parser("export")
+    export_cmd.add_argument("-o", "--output", default="-")
+    import_cmd = commands.add_parser("import")
+    import_cmd.add_argument("path", nargs="?", default="-")
+    args = parser.parse_args()
+
+    from .database import ReadSessionLocal, SessionLocal
+    from .migrations import migrate
+    from . import table_versions  # noqa: F401 - imports must move the ETags
+
+    migrate()
+    if args.command == "export":
+        with ReadSessionLocal() as db:
+            if args.output == "-":
+                export_to(db, sys.stdout.buffer)
+            else:
+                with open(args.output, "wb") as handle:
+                    export_to(db, handle)
+        return
+
+    with SessionLocal() as db:
+        if args.path == "-":
+            counts = import_from(db, sys.stdin.buffer)
+        else:
+            with open(args.path, "rb") as handle:
+                counts = import_from(db, handle)
+    print(json.dumps(counts), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
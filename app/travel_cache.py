@@ -0,0 +1,180 @@
+"""Persistent travel-time cache backed by SQLite with an in-process LRU in front."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Iterable, Sequence
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import LRUCache
+from .config import settings
+from .database import AsyncSessionLocal
+from .models import TravelTimeEntry
+
+logger = logging.getLogger(__name__)
+
+TravelKey = tuple[str, str, str]
+Fetcher = Callable[[list[TravelKey]], Awaitable["dict[TravelKey, tuple[int, str | None]]"]]
+
+
+@dataclass(frozen=True)
+class TravelLeg:
+    minutes: int
+    summary: str | None
+    fetched_at: datetime
+
+    @property
+    def age(self) -> timedelta:
+        return datetime.utcnow() - self.fetched_at
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.age <= timedelta(seconds=settings.travel_cache_ttl_seconds)
+
+    @property
+    def is_usable(self) -> bool:
+        return self.age <= timedelta(seconds=settings.travel_cache_stale_seconds)
+
+
+# three bound parameters per key; stays under SQLite's default limit of 999
+_QUERY_CHUNK = 300
+
+_memory = LRUCache(maxsize=settings.travel_cache_max_entries)
+_inflight: set[TravelKey] = set()
+_refresh_tasks: set[asyncio.Task] = set()
+
+
+def normalize_address(address: str) -> str:
+    return " ".join((address or "").split()).casefold()
+
+
+def cache_key(origin: str, destination: str, mode: str) -> TravelKey:
+    return normalize_address(origin), normalize_address(destination), mode.strip().lower()
+
+
+def _entry_to_leg(entry: TravelTimeEntry) -> TravelLeg:
+    return TravelLeg(minutes=entry.minutes, summary=entry.summary, fetched_at=entry.fetched_at)
+
+
+async def _stored_entries(db: AsyncSession, keys: Sequence[TravelKey]) -> list[TravelTimeEntry]:
+    entries: list[TravelTimeEntry] = []
+    key_columns = tuple_(TravelTimeEntry.origin, TravelTimeEntry.destination, TravelTimeEntry.mode)
+    for start in range(0, len(keys), _QUERY_CHUNK):
+        stmt = select(TravelTimeEntry).where(key_columns.in_(keys[start : start + _QUERY_CHUNK]))
+        entries.extend((await db.execute(stmt)).scalars())
+    return entries
+
+
+async def get_legs(keys: Iterable[TravelKey]) -> dict[TravelKey, TravelLeg]:
+    """Return cached legs for ``keys`` from memory, falling back to chunked SQLite queries."""
+
+    found: dict[TravelKey, TravelLeg] = {}
+    missing: list[TravelKey] = []
+    for key in dict.fromkeys(keys):
+        leg = _memory.get(key)
+        if leg is None:
+            missing.append(key)
+        else:
+            found[key] = leg
+    if not missing:
+        return found
+
+    try:
+        async with AsyncSessionLocal() as db:
+            entries = await _stored_entries(db, missing)
+    except SQLAlchemyError:
+        logger.warning("travel cache lookup failed", exc_info=True)
+        return found
+
+    for entry in entries:
+        key = (entry.origin, entry.destination, entry.mode)
+        leg = _entry_to_leg(entry)
+        _memory.set(key, leg)
+        found[key] = leg
+    return found
+
+
+async def put_legs(fetched: dict[TravelKey, tuple[int, str | None]]) -> dict[TravelKey, TravelLeg]:
+    """Persist freshly fetched legs and promote them into the memory tier."""
+
+    if not fetched:
+        return {}
+    now = datetime.utcnow()
+    legs = {
+        key: TravelLeg(minutes=minutes, summary=summary, fetched_at=now)
+        for key, (minutes, summary) in fetched.items()
+    }
+    for key, leg in legs.items():
+        _memory.set(key, leg)
+
+    try:
+        async with AsyncSessionLocal() as db:
+            existing = {
+                (entry.origin, entry.destination, entry.mode): entry
+                for entry in await _stored_entries(db, list(legs))
+            }
+            for key, leg in legs.items():
+                entry = existing.get(key)
+                if entry is None:
+                    origin, destination, mode = key
+                    entry = TravelTimeEntry(origin=origin, destination=destination, mode=mode)
+                    db.add(entry)
+                entry.minutes = leg.minutes
+                entry.summary = leg.summary
+                entry.fetched_at = leg.fetched_at
+            await db.commit()
+    except SQLAlchemyError:
+        logger.warning("travel cache write failed", exc_info=True)
+    return legs
+
+
+def revalidate(keys: Iterable[TravelKey], fetch: Fetcher) -> None:
+    """Refresh stale entries in a background task; keys already in flight are skipped."""
+
+    pending = [key for key in dict.fromkeys(keys) if key not in _inflight]
+    if not pending:
+        return
+    _inflight.update(pending)
+
+    async def _run() -> None:
+        try:
+            await put_legs(await fetch(pending))
+        except Exception:  # noqa: BLE001 - background refresh must never crash the loop
+            logger.warning("travel cache refresh failed for %d legs", len(pending), exc_info=True)
+        finally:
+            _inflight.difference_update(pending)
+
+    task = asyncio.get_running_loop().create_task(_run())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def cached_legs(keys: Iterable[TravelKey], fetch: Fetcher) -> dict[TravelKey, TravelLeg]:
+    """Serve ``keys`` from cache, fetching misses in one batch and refreshing stale ones lazily."""
+
+    keys = list(dict.fromkeys(keys))
+    legs = await get_legs(keys)
+    stale = [key for key, leg in legs.items() if not leg.is_fresh and leg.is_usable]
+    missing = [key for key in keys if key not in legs or not legs[key].is_usable]
+    if stale:
+        revalidate(stale, fetch)
+    if missing:
+        try:
+            legs.update(await put_legs(await fetch(missing)))
+        except Exception:  # noqa: BLE001 - fall back to whatever the cache had
+            logger.warning("travel lookup failed for %d legs", len(missing), exc_info=True)
+    return legs
+
+
+def clear_memory() -> None:
+    _memory.clear()
+
+
+def stats() -> dict[str, int]:
+    return _memory.stats()
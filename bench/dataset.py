@@ -0,0 +1,122 @@
+"""Synthetic task datasets for load tests.
+
+Rows are written with one executemany per batch, so 100k tasks load in a few
+seconds. Titles reuse the known store names, which keeps the gazetteer tier
+busy, and locations are drawn from a fixed pool so travel lookups repeat the
+way they do for a real household.
+
+CLI: ``DATA_DIR=/tmp/bench python -m bench.dataset --tasks 100000``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Engine, delete, insert, select
+from sqlalchemy.orm import Session
+
+from app import table_versions  # noqa: F401 - loaded rows must move the ETags
+from app.config import settings
+from app.models import Location, PlanBlock, Reminder, Task, TaskLocationSuggestion
+
+HOME_ADDRESS = "1 Bench St, Springfield"
+ERRAND_TITLES = [
+    "Pick up groceries at {store}",
+    "Return package to {store}",
+    "Grab batteries from {store}",
+    "Buy birthday gift at {store}",
+    "Drop off prescription at {store}",
+]
+DESK_TITLES = [
+    "Write weekly report",
+    "Call the dentist",
+    "Plan weekend trip",
+    "Pay utility bill",
+    "Review pull requests",
+]
+STREETS = ["Main St", "Oak Ave", "Elm St", "Market St", "Lake Rd", "Hill Blvd"]
+
+
+def location_pool(size: int, rng: random.Random) -> list[tuple[str, str]]:
+    """``(store, address)`` pairs shared by every located task."""
+
+    pool = []
+    for index in range(size):
+        store = rng.choice(settings.known_stores)
+        pool.append((store, f"{store} - {100 + index} {rng.choice(STREETS)}"))
+    return pool
+
+
+def generate_rows(count: int, *, seed: int = 0, locations: int = 200, now: datetime | None = None) -> list[dict]:
+    rng = random.Random(seed)
+    pool = location_pool(locations, rng)
+    now = now or datetime.utcnow().replace(microsecond=0)
+    rows = []
+    for _ in range(count):
+        located = rng.random() < 0.6
+        if located:
+            store, address = rng.choice(pool)
+            title = rng.choice(ERRAND_TITLES).format(store=store)
+        else:
+            address, title = None, rng.choice(DESK_TITLES)
+        rows.append(
+            {
+                "title": title,
+                "priority": rng.randint(1, 5),
+                "duration_minutes": rng.choice([15, 30, 45, 60, 90]),
+                "location": address,
+                "due_date": now + timedelta(hours=rng.randint(1, 14 * 24)) if rng.random() < 0.5 else None,
+                "status": "done" if rng.random() < 0.1 else "pending",
+                "inference_status": "done",
+            }
+        )
+    return rows
+
+
+def load_dataset(
+    engine: Engine,
+    count: int,
+    *,
+    seed: int = 0,
+    locations: int = 200,
+    batch_size: int = 5000,
+    reset: bool = True,
+) -> dict[str, float]:
+    """Insert ``count`` synthetic tasks (and a home location) and return load timings."""
+
+    began = time.perf_counter()
+    rows = generate_rows(count, seed=seed, locations=locations)
+    with Session(engine) as db:
+        if reset:
+            for model in (Reminder, PlanBlock, TaskLocationSuggestion, Task):
+                db.execute(delete(model))
+        if db.execute(select(Location.id).where(Location.is_home.is_(True))).first() is None:
+            db.add(Location(name="Bench Home", address=HOME_ADDRESS, is_home=True))
+        for start in range(0, len(rows), batch_size):
+            db.execute(insert(Task), rows[start : start + batch_size])
+        db.commit()
+    return {"tasks": count, "locations": locations, "load_seconds": round(time.perf_counter() - began, 3)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load a synthetic task dataset.")
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--append", action="store_true", help="keep existing tasks and plans")
+    args = parser.parse_args()
+
+    from app.database import engine
+    from app.migrations import migrate
+
+    migrate()
+    stats = load_dataset(engine, args.tasks, seed=args.seed, locations=args.locations, reset=not args.append)
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
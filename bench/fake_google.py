@@ -0,0 +1,148 @@
+"""Local stand-in for the Places Text Search, Geocoding and Distance Matrix APIs.
+
+Answers are deterministic (travel minutes are derived from a hash of the
+address pair) so runs are comparable, while ``latency_ms``, ``jitter_ms`` and
+``error_rate`` model a slow or flaky upstream. Run it on its own with::
+
+    python -m bench.fake_google --port 8100 --latency-ms 80 --error-rate 0.02
+
+and start the planner with ``GOOGLE_MAPS_BASE_URL=http://127.0.0.1:8100``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.places import DISTANCE_MATRIX_PATH, GEOCODE_PATH, PLACES_SEARCH_PATH
+
+
+@dataclass
+class FakeGoogleConfig:
+    latency_ms: float = 50.0
+    jitter_ms: float = 20.0
+    # share of requests answered with HTTP 500, and of matrix elements with NOT_FOUND
+    error_rate: float = 0.0
+    element_error_rate: float = 0.0
+    results_per_search: int = 3
+    seed: int = 0
+
+
+def travel_minutes(origin: str, destination: str) -> int:
+    """Stable 5-44 minute leg for an address pair."""
+
+    return 5 + zlib.crc32(f"{origin}|{destination}".casefold().encode()) % 40
+
+
+def coordinates(address: str) -> tuple[float, float]:
+    """Stable point within roughly 30 km of downtown San Francisco."""
+
+    digest = zlib.crc32(address.casefold().encode())
+    return 37.77 + (digest % 5000 - 2500) / 10000, -122.42 + (digest // 5000 % 5000 - 2500) / 10000
+
+
+def create_app(config: FakeGoogleConfig | None = None) -> FastAPI:
+    config = config or FakeGoogleConfig()
+    rng = random.Random(config.seed)
+    counts: Counter[str] = Counter()
+    app = FastAPI(title="Fake Google Maps")
+    app.state.config = config
+    app.state.counts = counts
+
+    async def _delay() -> None:
+        delay = config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    def _failed(kind: str) -> bool:
+        counts[kind] += 1
+        if rng.random() < config.error_rate:
+            counts[f"{kind}_errors"] += 1
+            return True
+        return False
+
+    @app.get(PLACES_SEARCH_PATH)
+    async def text_search(query: str, key: str = "") -> JSONResponse:
+        await _delay()
+        if _failed("places"):
+            return JSONResponse({"status": "UNKNOWN_ERROR"}, status_code=500)
+        name, _, near = query.partition(" near ")
+        results = [
+            {
+                "name": name.strip() or query,
+                "formatted_address": f"{100 + index * 17} {name.strip() or 'Main'} Way, near {near or 'town'}",
+            }
+            for index in range(config.results_per_search)
+        ]
+        return JSONResponse({"status": "OK", "results": results})
+
+    @app.get(DISTANCE_MATRIX_PATH)
+    async def distance_matrix(origins: str, destinations: str, mode: str = "driving", key: str = "") -> JSONResponse:
+        await _delay()
+        if _failed("matrix"):
+            return JSONResponse({"status": "UNKNOWN_ERROR"}, status_code=500)
+        rows = []
+        for origin in origins.split("|"):
+            elements = []
+            for destination in destinations.split("|"):
+                counts["matrix_elements"] += 1
+                if rng.random() < config.element_error_rate:
+                    elements.append({"status": "NOT_FOUND"})
+                    continue
+                minutes = travel_minutes(origin, destination)
+                elements.append(
+                    {
+                        "status": "OK",
+                        "duration": {"value": minutes * 60, "text": f"{minutes} mins"},
+                    }
+                )
+            rows.append({"elements": elements})
+        return JSONResponse({"status": "OK", "rows": rows})
+
+    @app.get(GEOCODE_PATH)
+    async def geocode(address: str, key: str = "") -> JSONResponse:
+        await _delay()
+        if _failed("geocode"):
+            return JSONResponse({"status": "UNKNOWN_ERROR"}, status_code=500)
+        lat, lng = coordinates(address)
+        return JSONResponse({"status": "OK", "results": [{"geometry": {"location": {"lat": lat, "lng": lng}}}]})
+
+    @app.get("/_stats")
+    async def stats() -> dict[str, int]:
+        return dict(counts)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a fake Places / Distance Matrix API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=FakeGoogleConfig.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=FakeGoogleConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=FakeGoogleConfig.error_rate)
+    parser.add_argument("--element-error-rate", type=float, default=FakeGoogleConfig.element_error_rate)
+    parser.add_argument("--seed", type=int, default=FakeGoogleConfig.seed)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeGoogleConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        element_error_rate=args.element_error_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
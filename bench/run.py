@@ -0,0 +1,321 @@
+"""Throughput and latency benchmarks for the planner API.
+
+The runner starts the fake Google server and the planner (one uvicorn
+worker) as subprocesses against a throwaway data directory, loads a
+synthetic dataset, then drives every scenario at each concurrency level over
+real sockets. Results are written as JSON::
+
+    python -m bench.run --tasks 10000 --concurrency 1,8,32 -o bench-results.json
+
+Each result carries p50/p95/p99 latency in milliseconds, requests per second
+and the error count, keyed by scenario and concurrency, so two runs can be
+diffed field by field.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable
+
+import httpx
+
+from .dataset import ERRAND_TITLES, location_pool
+
+Request = tuple[str, str, dict | None]
+
+
+@dataclass
+class Scenario:
+    name: str
+    # builds (method, path, json body) for one request
+    build: Callable[[random.Random, "BenchContext"], Request]
+    requests: int | None = None
+
+
+@dataclass
+class BenchContext:
+    task_ids: list[int]
+    locations: list[tuple[str, str]]
+
+
+@dataclass
+class Result:
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    seconds: float
+    rps: float
+    latency_ms: dict[str, float] = field(default_factory=dict)
+
+
+def _errand(rng: random.Random, ctx: BenchContext) -> str:
+    store, _ = rng.choice(ctx.locations)
+    return rng.choice(ERRAND_TITLES).format(store=store)
+
+
+SCENARIOS: dict[str, Scenario] = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario("list_tasks", lambda rng, ctx: ("GET", "/tasks?limit=200", None)),
+        Scenario(
+            "list_tasks_filtered",
+            lambda rng, ctx: ("GET", "/tasks?limit=200&status=pending&has_location=true&fields=id,title,location", None),
+        ),
+        Scenario(
+            "create_task",
+            lambda rng, ctx: ("POST", "/tasks", {"title": _errand(rng, ctx), "priority": rng.randint(1, 5)}),
+        ),
+        # moving a task recomputes its time estimate on the request path
+        Scenario(
+            "update_estimate",
+            lambda rng, ctx: (
+                "PATCH",
+                f"/tasks/{rng.choice(ctx.task_ids)}",
+                {"location": rng.choice(ctx.locations)[1]},
+            ),
+        ),
+        Scenario(
+            "infer_location",
+            lambda rng, ctx: ("POST", "/tasks/infer-location", {"title": _errand(rng, ctx)}),
+        ),
+        Scenario(
+            "generate_plan",
+            lambda rng, ctx: (
+                "POST",
+                "/plan/generate",
+                {"date": (date.today() + timedelta(days=rng.randint(1, 7))).isoformat(), "engine": "optimized"},
+            ),
+            requests=20,
+        ),
+    ]
+}
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Linear-interpolated percentile of an already sorted sample."""
+
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(scenario: str, concurrency: int, latencies: list[float], errors: int, seconds: float) -> Result:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return Result(
+        scenario=scenario,
+        concurrency=concurrency,
+        requests=count,
+        errors=errors,
+        seconds=round(seconds, 3),
+        rps=round(count / seconds, 1) if seconds else 0.0,
+        latency_ms={
+            "p50": round(percentile(ordered, 0.50) * 1000, 2),
+            "p95": round(percentile(ordered, 0.95) * 1000, 2),
+            "p99": round(percentile(ordered, 0.99) * 1000, 2),
+            "mean": round(sum(ordered) / count * 1000, 2) if count else 0.0,
+            "max": round(ordered[-1] * 1000, 2) if count else 0.0,
+        },
+    )
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    ctx: BenchContext,
+    *,
+    concurrency: int,
+    requests: int,
+    seed: int = 0,
+) -> Result:
+    """Send ``requests`` requests from ``concurrency`` workers and summarize their latencies."""
+
+    rng = random.Random(seed)
+    planned = [scenario.build(rng, ctx) for _ in range(requests)]
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while planned:
+            method, path, body = planned.pop()
+            began = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - began)
+            errors += not ok
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(scenario.name, concurrency, latencies, errors, time.perf_counter() - began)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args!r} exited with {process.returncode}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+async def run_scenarios(base_url: str, args: argparse.Namespace, ctx: BenchContext) -> list[Result]:
+    results: list[Result] = []
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        for name in args.scenarios:
+            scenario = SCENARIOS[name]
+            for concurrency in args.concurrency:
+                requests = scenario.requests or args.requests
+                if args.warmup:
+                    await drive(client, scenario, ctx, concurrency=concurrency, requests=args.warmup, seed=-1)
+                result = await drive(client, scenario, ctx, concurrency=concurrency, requests=requests, seed=args.seed)
+                print(
+                    f"{name:<22} c={concurrency:<4} rps={result.rps:<8} "
+                    f"p50={result.latency_ms['p50']}ms p95={result.latency_ms['p95']}ms "
+                    f"p99={result.latency_ms['p99']}ms errors={result.errors}",
+                    file=sys.stderr,
+                )
+                results.append(result)
+    return results
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the planner API against a fake Google Maps.")
+    parser.add_argument("--tasks", type=int, default=10_000, help="dataset size (10k-100k is typical)")
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--concurrency", type=lambda raw: [int(n) for n in raw.split(",")], default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--scenarios", type=lambda raw: raw.split(","), default=list(SCENARIOS))
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake Google latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of fake Google requests failing")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", type=Path, help="defaults to a fresh temporary directory")
+    parser.add_argument("-o", "--output", default="-", help="JSON results path, '-' for stdout")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    data_dir = args.data_dir or Path(tempfile.mkdtemp(prefix="planner-bench-"))
+    google_port, planner_port = _free_port(), _free_port()
+    env = {
+        **os.environ,
+        "DATA_DIR": str(data_dir),
+        "GOOGLE_MAPS_API_KEY": "bench",
+        "GOOGLE_MAPS_BASE_URL": f"http://127.0.0.1:{google_port}",
+    }
+    processes: list[subprocess.Popen] = []
+    try:
+        google = subprocess.Popen(
+            [
+                sys.executable, "-m", "bench.fake_google",
+                "--port", str(google_port),
+                "--latency-ms", str(args.latency_ms),
+                "--jitter-ms", str(args.jitter_ms),
+                "--error-rate", str(args.error_rate),
+                "--seed", str(args.seed),
+            ],
+            env=env,
+        )
+        processes.append(google)
+        dataset = json.loads(
+            subprocess.run(
+                [
+                    sys.executable, "-m", "bench.dataset",
+                    "--tasks", str(args.tasks),
+                    "--locations", str(args.locations),
+                    "--seed", str(args.seed),
+                ],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        )
+        planner = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--port", str(planner_port),
+                "--log-level", "warning",
+                "--no-access-log",
+            ],
+            env=env,
+        )
+        processes.append(planner)
+        planner_url = f"http://127.0.0.1:{planner_port}"
+        _wait_until_up(f"{env['GOOGLE_MAPS_BASE_URL']}/_stats", google)
+        _wait_until_up(f"{planner_url}/health", planner)
+
+        ids = httpx.get(f"{planner_url}/tasks", params={"limit": 1000, "fields": "id"}, timeout=args.timeout).json()
+        ctx = BenchContext(
+            task_ids=[row["id"] for row in ids],
+            locations=location_pool(args.locations, random.Random(args.seed)),
+        )
+        results = asyncio.run(run_scenarios(planner_url, args, ctx))
+        report = {
+            "meta": {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "dataset": dataset,
+                "fake_google": {
+                    "latency_ms": args.latency_ms,
+                    "jitter_ms": args.jitter_ms,
+                    "error_rate": args.error_rate,
+                    "requests": httpx.get(f"{env['GOOGLE_MAPS_BASE_URL']}/_stats").json(),
+                },
+            },
+            "results": [asdict(result) for result in results],
+        }
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=10)
+
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        Path(args.output).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,9 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from app.database import SessionLocal, Base, engine  # noqa:E402
+from app.database import SessionLocal  # noqa:E402
+from app.migrations import migrate  # noqa:E402
+from app import table_versions  # noqa:E402,F401 - keeps ETags in step with seeded rows
 from app.models import Task  # noqa:E402
 
 SAMPLE_TASKS = [
@@ -38,7 +40,7 @@ SAMPLE_TASKS = [
 
 
 def main():
-    Base.metadata.create_all(bind=engine)
+    migrate()
     db = SessionLocal()
     try:
         if db.query(Task).count() > 0:
@@ -1,35 +1,56 @@
+import json
+import os
+import tempfile
+import time
 from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
+from fastapi import Request
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, inspect
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
-from app.database import Base, get_db
+from app import gazetteer, geocoding
+from app.config import settings
+from app.database import Base, WriteSession, get_db, get_read_db
 from app.main import app
+from app.models import Task
+from app.static_assets import StaticAsset
 
 
-engine = create_engine(
-    "sqlite://",
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
+# File-backed so background jobs and request sessions get their own connections.
+DB_PATH = Path(tempfile.mkdtemp()) / "test.db"
+engine = create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+# every TestClient runs its own event loop, so async connections are never pooled across tests
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    sync_session_class=WriteSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 
 @pytest.fixture()
-def client():
+def client(monkeypatch):
     Base.metadata.create_all(bind=engine)
-
-    def override_get_db():
-        db = TestingSessionLocal()
-        try:
+    monkeypatch.setattr(settings, "migrate_on_startup", False)
+    monkeypatch.setattr("app.pipeline.AsyncSessionLocal", TestingAsyncSessionLocal)
+    monkeypatch.setattr("app.geocoding.AsyncSessionLocal", TestingAsyncSessionLocal)
+    gazetteer.invalidate()
+    geocoding.clear_memory()
+
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as db:
             yield db
-        finally:
-            db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     with TestClient(app) as test_client:
         yield test_client
@@ -75,6 +96,191 @@ def test_create_task_endpoint_matches_ui_payload(client: TestClient):
     assert "time_estimate_minutes" in body
 
 
+def test_list_tasks_pages_with_cursor_and_filters(client: TestClient):
+    payload = [
+        {"title": f"Task {n}", "priority": 1 + n % 5, "location": "Gym" if n % 2 else None}
+        for n in range(23)
+    ]
+    client.post("/tasks/bulk", json={"tasks": payload})
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 5, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/tasks", params=params)
+        seen.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == 23
+    ordered = sorted(seen, key=lambda t: (-t["priority"], t["id"]))
+    assert [t["id"] for t in seen] == [t["id"] for t in ordered]
+
+    located = client.get("/tasks", params={"has_location": True, "status": "pending", "fields": "title,location"}).json()
+    assert len(located) == 11
+    assert set(located[0]) == {"id", "title", "location"}
+
+    assert client.get("/tasks", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/tasks", params={"fields": "title,secret"}).status_code == 400
+
+
+def test_conditional_get_returns_304_until_tables_change(client: TestClient):
+    created = client.post("/tasks", json={"title": "Stretch", "priority": 2})
+    # the inference job writes to the task too; let it settle first
+    _wait_for_job(client, created.headers["X-Job-Id"])
+    first = client.get("/tasks")
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    assert client.get("/tasks", headers={"If-None-Match": etag}).status_code == 304
+    since = {"If-Modified-Since": first.headers["Last-Modified"]}
+    assert client.get("/tasks", headers=since).status_code == 304
+
+    task_id = first.json()[0]["id"]
+    client.patch(f"/tasks/{task_id}", json={"priority": 4})
+    changed = client.get("/tasks", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+    # each page and filter is its own representation of the same tables
+    assert client.get("/tasks", params={"limit": 1}).headers["ETag"] != changed.headers["ETag"]
+    assert (
+        client.get("/tasks", params={"limit": 1, "status": "pending"}).headers["ETag"]
+        == client.get("/tasks", params={"status": "pending", "limit": 1}).headers["ETag"]
+    )
+    assert client.get("/tasks", params={"limit": 1, "status": "pending"}).headers["ETag"] != client.get(
+        "/tasks", params={"limit": 1, "status": "done"}
+    ).headers["ETag"]
+
+    client.post("/plan/generate", json={"date": "2030-01-02", "engine": "greedy"})
+    current = client.get("/plan/2030-01-02").headers["ETag"]
+    assert client.get("/plan/2030-01-02", headers={"If-None-Match": current}).status_code == 304
+    # regenerating the day deletes rows in bulk; that must still move the ETag
+    client.post("/plan/generate", json={"date": "2030-01-02", "engine": "greedy"})
+    assert client.get("/plan/2030-01-02", headers={"If-None-Match": current}).status_code == 200
+
+
+def test_client_page_is_served_precompressed_and_cacheable(client: TestClient):
+    plain = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert plain.headers.get("content-encoding") is None
+    assert plain.headers["cache-control"].startswith("public")
+
+    zipped = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.text == plain.text
+    # different bytes, different strong validators
+    assert zipped.headers["etag"] == plain.headers["etag"][:-1] + '-gz"'
+
+    assert client.get("/", headers={"If-None-Match": plain.headers["etag"]}).status_code == 304
+    revalidated = client.get(
+        "/", headers={"If-None-Match": f'"stale", W/{zipped.headers["etag"]}', "Accept-Encoding": "gzip"}
+    )
+    assert revalidated.status_code == 304 and revalidated.headers["etag"] == zipped.headers["etag"]
+    assert client.get("/", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get("/", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_static_asset_prefers_brotli_when_available(tmp_path, monkeypatch):
+    # stands in for the Brotli package so the br branch runs without it installed
+    monkeypatch.setattr("app.static_assets.brotli", SimpleNamespace(compress=lambda raw, quality: b"br:" + raw))
+    page = tmp_path / "index.html"
+    page.write_text("<p>hi</p>")
+    asset = StaticAsset(page, media_type="text/html")
+
+    def get(**headers):
+        raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+        return asset.response(Request({"type": "http", "method": "GET", "path": "/", "headers": raw}))
+
+    compressed = get(accept_encoding="gzip, br")
+    assert compressed.headers["content-encoding"] == "br"
+    assert compressed.body == b"br:<p>hi</p>"
+    assert compressed.headers["etag"].endswith('-br"')
+    assert get(accept_encoding="gzip, br;q=0").headers["content-encoding"] == "gzip"
+    assert get(if_none_match=compressed.headers["etag"]).status_code == 304
+
+
+def test_static_asset_reloads_only_when_mtime_changes(tmp_path):
+    page = tmp_path / "index.html"
+    page.write_text("<p>one</p>")
+    asset = StaticAsset(page, media_type="text/html")
+
+    first = asset.load()
+    assert asset.load() is first
+    page.write_text("<p>two</p>")
+    os.utime(page, ns=(first.mtime_ns + 1_000_000_000, first.mtime_ns + 1_000_000_000))
+    assert asset.load().bodies["identity"] == b"<p>two</p>"
+
+
+def test_large_json_responses_are_gzipped(client: TestClient):
+    client.post("/tasks/bulk", json={"tasks": [{"title": f"Task number {n}"} for n in range(40)]})
+
+    response = client.get("/tasks", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 40
+    small = client.get("/locations/home", headers={"Accept-Encoding": "gzip"})
+    assert small.headers.get("content-encoding") is None
+
+
+def test_export_import_round_trip(client: TestClient):
+    client.post("/tasks/bulk", json={"tasks": [{"title": f"Task {n}", "due_date": "2030-01-02T10:00:00"} for n in range(5)]})
+    client.post("/plan/generate", json={"date": "2030-01-02", "engine": "greedy"})
+    exported = client.get("/export")
+    assert exported.headers["content-type"] == "application/x-ndjson"
+    lines = exported.text.splitlines()
+    kinds = [json.loads(line)["type"] for line in lines]
+    assert kinds.count("task") == 5 and kinds.count("plan_block") == 5
+
+    # restore into an empty database
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    assert client.get("/tasks").json() == []
+
+    counts = client.post("/import", content=exported.content).json()
+    assert counts["task"] == 5 and counts["reminder"] == 5
+    restored = client.get("/tasks").json()
+    assert len(restored) == 5 and restored[0]["due_date"] == "2030-01-02T10:00:00"
+    assert client.get("/export").text == exported.text
+
+    bad = client.post("/import", content=b'{"type": "task", "id": 99, "title": "Kept"}\n{"type": "spaceship"}\n')
+    assert bad.status_code == 400 and "Line 2" in bad.json()["detail"]["message"]
+
+
+def test_import_rejects_rows_that_fail_the_schema(client: TestClient, monkeypatch):
+    missing = client.post("/import", content=b'{"type": "task", "id": 77}\n')
+    assert missing.status_code == 400
+    assert missing.json()["detail"]["message"] == "Line 1: missing title"
+
+    # differing key sets share one batch; left-out columns take their defaults
+    mixed = b'{"type": "task", "id": 1, "title": "A", "priority": 5}\n{"type": "task", "id": 2, "title": "B"}\n'
+    assert client.post("/import", content=mixed).json()["task"] == 2
+    assert {task["title"]: task["priority"] for task in client.get("/tasks").json()} == {"A": 5, "B": 3}
+
+    # a constraint failure in a later batch reports the committed rows and its line range
+    monkeypatch.setattr(settings, "import_batch_size", 2)
+    lines = [{"type": "task", "id": n, "title": f"T{n}"} for n in (10, 11)] + [{"type": "task", "id": 12, "title": None}]
+    failed = client.post("/import", content="\n".join(json.dumps(line) for line in lines).encode())
+    assert failed.status_code == 400
+    assert failed.json()["detail"]["message"].startswith("Lines 3-3:")
+    assert failed.json()["detail"]["imported"]["task"] == 2
+
+
+def test_moving_a_task_geocodes_its_new_location(client: TestClient, monkeypatch):
+    resolved = []
+
+    async def fake_resolve(addresses):
+        resolved.append(list(addresses))
+        return {}
+
+    monkeypatch.setattr(geocoding, "resolve", fake_resolve)
+    created = client.post("/tasks", json={"title": "Errand"})
+    _wait_for_job(client, created.headers["X-Job-Id"])
+    task_id = created.json()["id"]
+    client.patch(f"/tasks/{task_id}", json={"location": "450 10th St"})
+    assert resolved[-1] == ["450 10th St"]
+    calls = len(resolved)
+    client.patch(f"/tasks/{task_id}", json={"priority": 1})
+    assert len(resolved) == calls
+
+
 def test_update_task_allows_partial_edits(client: TestClient):
     new_task = {
         "title": "Initial title",
@@ -133,6 +339,126 @@ def test_generate_plan_creates_blocks_and_reminders(client: TestClient):
     assert {task["status"] for task in tasks_after_plan} == {"scheduled"}
 
 
+def test_plan_engines_greedy_baseline_and_optimized(client: TestClient):
+    for title, priority, minutes in [("Deep work", 5, 200), ("Workshop", 4, 240), ("Errand", 3, 60), ("Call", 2, 30)]:
+        client.post("/tasks", json={"title": title, "priority": priority, "duration_minutes": minutes})
+
+    def planned(engine):
+        body = client.post("/plan/generate", json={"date": "2030-01-02", "engine": engine}).json()
+        return [block["task_id"] for block in body["blocks"]]
+
+    ids = {task["title"]: task["id"] for task in client.get("/tasks").json()}
+    # greedy stops at the first task that does not fit
+    assert planned("greedy") == [ids["Deep work"], ids["Workshop"]]
+    assert sorted(planned("optimized")) == sorted([ids["Deep work"], ids["Workshop"], ids["Call"]])
+    assert client.post("/plan/generate", json={"engine": "magic"}).status_code == 422
+
+
+def test_optimized_plan_routes_only_tasks_the_day_can_fit(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "planner_max_candidates", 8)
+    client.put("/locations/home", json={"name": "Home", "address": "1 Home St"})
+    tasks = [
+        {"title": f"Errand {n}", "priority": n % 5 + 1, "duration_minutes": 30, "location": f"{n} Market St"}
+        for n in range(40)
+    ]
+    client.post("/tasks/bulk", json={"tasks": tasks})
+
+    sizes = []
+
+    async def fake_matrix(addresses):
+        sizes.append(len(addresses))
+        return {}
+
+    monkeypatch.setattr("app.planner.estimate_travel_matrix", fake_matrix)
+    body = client.post("/plan/generate", json={"date": "2030-01-02", "engine": "optimized"}).json()
+
+    # home plus at most the capped candidates, never the whole backlog
+    assert sizes == [9]
+    by_id = {task["id"]: task for task in client.get("/tasks").json()}
+    assert len(body["blocks"]) == 8
+    assert {by_id[block["task_id"]]["priority"] for block in body["blocks"]} == {5}
+
+
+def test_replan_keeps_unaffected_prefix(client: TestClient):
+    for title, priority in [("First", 5), ("Second", 4), ("Third", 3), ("Fourth", 2)]:
+        client.post("/tasks", json={"title": title, "priority": priority, "duration_minutes": 60})
+    ids = {task["title"]: task["id"] for task in client.get("/tasks").json()}
+    before = client.post("/plan/generate", json={"date": "2030-01-02", "engine": "greedy"}).json()
+    old_blocks = {block["task_id"]: block for block in before["blocks"]}
+    old_reminders = {reminder["task_id"]: reminder["id"] for reminder in before["reminders"]}
+
+    client.patch(f"/tasks/{ids['Third']}", json={"duration_minutes": 30})
+    after = client.post(
+        "/plan/generate",
+        json={"date": "2030-01-02", "engine": "greedy", "changed_task_ids": [ids["Third"]]},
+    ).json()
+    blocks = {block["task_id"]: block for block in after["blocks"]}
+
+    assert [block["task_id"] for block in after["blocks"]] == [ids[t] for t in ("First", "Second", "Third", "Fourth")]
+    # untouched prefix rows survive as-is
+    for title in ("First", "Second"):
+        assert blocks[ids[title]] == old_blocks[ids[title]]
+    assert blocks[ids["Third"]]["id"] == old_blocks[ids["Third"]]["id"]
+    assert blocks[ids["Third"]]["end_time"].endswith("11:30:00")
+    assert blocks[ids["Fourth"]]["start_time"].endswith("11:30:00")
+    assert {r["task_id"]: r["id"] for r in after["reminders"]} == old_reminders
+
+    # finishing a task frees its slot for the rest of the day
+    client.patch(f"/tasks/{ids['First']}", json={"status": "done"})
+    after = client.post(
+        "/plan/generate",
+        json={"date": "2030-01-02", "engine": "optimized", "changed_task_ids": [ids["First"]]},
+    ).json()
+    assert ids["First"] not in [block["task_id"] for block in after["blocks"]]
+    assert after["blocks"][0]["start_time"].endswith("09:00:00")
+
+
+@pytest.mark.parametrize("engine", ["greedy", "optimized"])
+def test_replan_moves_a_planned_task_ahead_of_blocks_it_now_outranks(client: TestClient, engine):
+    for title, priority, minutes in [("A", 5, 60), ("B", 4, 120), ("C", 3, 120), ("D", 2, 60)]:
+        client.post("/tasks", json={"title": title, "priority": priority, "duration_minutes": minutes})
+    ids = {task["title"]: task["id"] for task in client.get("/tasks").json()}
+    client.post("/plan/generate", json={"date": "2030-01-02", "engine": engine})
+
+    client.patch(f"/tasks/{ids['D']}", json={"priority": 5, "duration_minutes": 240})
+    repaired = client.post(
+        "/plan/generate",
+        json={"date": "2030-01-02", "engine": engine, "changed_task_ids": [ids["D"]]},
+    ).json()
+    regenerated = client.post("/plan/generate", json={"date": "2030-01-02", "engine": engine}).json()
+
+    assert [block["task_id"] for block in repaired["blocks"]] == [block["task_id"] for block in regenerated["blocks"]]
+    assert ids["C"] not in [block["task_id"] for block in repaired["blocks"]]
+
+
+def test_plan_range_returns_several_days(client: TestClient):
+    client.post("/tasks", json={"title": "Morning run", "priority": 3, "duration_minutes": 30})
+    for day in ("2030-01-02", "2030-01-03", "2030-01-05"):
+        client.post("/plan/generate", json={"date": day, "engine": "greedy"})
+
+    body = client.get("/plan", params={"from": "2030-01-02", "to": "2030-01-04"}).json()
+    assert [block["start_time"][:10] for block in body["blocks"]] == ["2030-01-02", "2030-01-03"]
+    assert len(body["reminders"]) == 2
+
+    assert client.get("/plan", params={"from": "2030-01-04", "to": "2030-01-02"}).status_code == 400
+    assert client.get("/plan", params={"from": "2030-01-01", "to": "2030-12-31"}).status_code == 400
+
+
+def test_plan_queries_use_indexes(client: TestClient):
+    with engine.connect() as connection:
+        plans = [
+            " ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+            for sql in (
+                "SELECT id FROM plan_blocks WHERE start_time >= '2030-01-02' AND start_time < '2030-01-03'",
+                "SELECT id FROM reminders WHERE trigger_time BETWEEN '2030-01-02' AND '2030-01-03'",
+                "SELECT id FROM tasks WHERE priority <= 3 ORDER BY priority DESC, position, id LIMIT 6",
+            )
+        ]
+    assert "ix_plan_blocks_start_time" in plans[0]
+    assert "ix_reminders_trigger_time" in plans[1]
+    assert "ix_tasks_priority_position_id" in plans[2] and "TEMP B-TREE" not in plans[2]
+
+
 def test_home_location_defaults_and_updates(client: TestClient):
     # Default home should be provisioned automatically
     default_home = client.get("/locations/home").json()
@@ -171,7 +497,7 @@ def test_infer_location_endpoint_uses_title_keywords(client: TestClient, monkeyp
         json={"name": "HQ", "address": "100 Main St"},
     )
 
-    def fake_search(query, near, *, max_results=2):
+    async def fake_search(query, near, *, max_results=2):
         return [{"name": query, "address": "456 Elm"}]
 
     monkeypatch.setattr("app.location_inference.search_places", fake_search)
@@ -186,6 +512,162 @@ def test_infer_location_endpoint_uses_title_keywords(client: TestClient, monkeyp
     assert payload[0]["label"] == "Home Depot"
 
 
+@pytest.fixture()
+def stuck_tasks():
+    # rows a previous process left mid-inference, written before the app starts
+    Base.metadata.create_all(bind=engine)
+    with TestingSessionLocal() as db:
+        db.add_all(
+            [
+                Task(title="Queued before the restart", inference_status="pending"),
+                Task(title="Cut off mid-run", inference_status="running"),
+                Task(title="Already enriched", inference_status="done"),
+            ]
+        )
+        db.commit()
+
+
+def test_startup_resumes_inference_left_unfinished(stuck_tasks, client: TestClient):
+    deadline = time.monotonic() + 5
+    while True:
+        statuses = {task["title"]: task["inference_status"] for task in client.get("/tasks").json()}
+        if set(statuses.values()) == {"done"} or time.monotonic() > deadline:
+            break
+        time.sleep(0.02)
+    assert statuses == {
+        "Queued before the restart": "done",
+        "Cut off mid-run": "done",
+        "Already enriched": "done",
+    }
+
+
+def _wait_for_job(client: TestClient, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in {"succeeded", "failed"} or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def test_create_task_infers_locations_in_background(client: TestClient, monkeypatch):
+    client.put("/locations/home", json={"name": "HQ", "address": "100 Main St"})
+
+    async def fake_search(query, near, *, max_results=2):
+        return [{"name": query, "address": "456 Elm"}]
+
+    monkeypatch.setattr("app.location_inference.search_places", fake_search)
+
+    response = client.post("/tasks", json={"title": "Pick up lumber at Home Depot"})
+    assert response.status_code == 200
+    assert response.json()["inference_status"] == "pending"
+    assert response.json()["location_suggestions"] == []
+
+    job = _wait_for_job(client, response.headers["X-Job-Id"])
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 1
+
+    task = client.get("/tasks").json()[0]
+    assert task["inference_status"] == "done"
+    assert [s["label"] for s in task["location_suggestions"]] == ["Home Depot"]
+
+
+def test_failed_inference_is_retried_then_marked_failed(client: TestClient, monkeypatch):
+    client.put("/locations/home", json={"name": "HQ", "address": "100 Main St"})
+    monkeypatch.setattr("app.jobs.job_queue.retry_backoff_seconds", 0)
+
+    async def broken_search(query, near, *, max_results=2):
+        raise RuntimeError("places down")
+
+    monkeypatch.setattr("app.location_inference.search_places", broken_search)
+
+    response = client.post("/tasks", json={"title": "Return books at Library"})
+    job = _wait_for_job(client, response.headers["X-Job-Id"])
+
+    assert job["status"] == "failed"
+    assert job["attempts"] == 3
+    assert "places down" in job["error"]
+    assert client.get("/tasks").json()[0]["inference_status"] == "failed"
+    assert client.get("/jobs/missing").status_code == 404
+
+
+def test_bulk_create_pipes_titles_and_dedupes_searches(client: TestClient, monkeypatch):
+    client.put("/locations/home", json={"name": "HQ", "address": "100 Main St"})
+    searched = []
+    piped = []
+
+    async def fake_search(query, near, *, max_results=2):
+        searched.append(query)
+        return [{"name": query, "address": "456 Elm"}]
+
+    class FakeEnt:
+        label_ = "ORG"
+
+        def __init__(self, text):
+            self.text = text
+
+    class FakeNlp:
+        def pipe(self, texts, batch_size):
+            texts = list(texts)
+            piped.append((len(texts), batch_size))
+            for text in texts:
+                store = text.split()[-1]
+                yield type("Doc", (), {"ents": [FakeEnt(store)]})()
+
+    monkeypatch.setattr("app.location_inference.search_places", fake_search)
+    monkeypatch.setattr("app.nlp.get_nlp", lambda: FakeNlp())
+
+    titles = [f"Errand {n} {'Acme' if n % 2 else 'acme'}" for n in range(20)] + ["Milk Bodega"]
+    response = client.post("/tasks/bulk", json={"tasks": [{"title": t} for t in titles]})
+    assert response.status_code == 200
+    created = response.json()
+    assert [task["title"] for task in created] == titles
+    assert all(task["inference_status"] == "pending" for task in created)
+
+    job = _wait_for_job(client, response.headers["X-Job-Id"])
+    assert job["status"] == "succeeded"
+    assert piped == [(len(titles), 64)]
+    assert sorted(searched) == ["Bodega", "acme"]
+
+    tasks = client.get("/tasks").json()
+    assert len(tasks) == len(titles)
+    assert all(len(task["location_suggestions"]) == 1 for task in tasks)
+
+
+def test_extraction_prefers_gazetteer_and_heuristics_over_model(client: TestClient, monkeypatch):
+    client.put("/locations/home", json={"name": "HQ", "address": "100 Main St"})
+    modelled = []
+
+    async def fake_search(query, near, *, max_results=2):
+        return [{"name": query, "address": "456 Elm"}]
+
+    class FakeNlp:
+        def pipe(self, texts, batch_size):
+            for text in texts:
+                modelled.append(text)
+                yield type("Doc", (), {"ents": []})()
+
+    monkeypatch.setattr("app.location_inference.search_places", fake_search)
+    monkeypatch.setattr("app.nlp.get_nlp", lambda: FakeNlp())
+    before = client.get("/nlp/stats").json()
+
+    def infer(title, **extra):
+        return client.post("/tasks/infer-location", json={"title": title, **extra}).json()
+
+    assert [s["label"] for s in infer("grab milk from trader joes")] == ["Trader Joe's"]
+    assert [s["label"] for s in infer("Drop off parcel at Post Office")] == ["Post Office"]
+    assert infer("Call mom") == []
+    assert modelled == ["Call mom"]
+
+    infer("Costco run", use_model=True)
+    assert modelled == ["Call mom", "Costco run"]
+
+    after = client.get("/nlp/stats").json()
+    assert after["gazetteer"] - before["gazetteer"] == 2
+    assert after["heuristic"] - before["heuristic"] == 1
+    assert after["miss"] - before["miss"] == 1
+
+
 def test_task_api_fields_match_db_and_ui_expectations(client: TestClient):
     client.put(
         "/locations/home",
@@ -231,6 +713,42 @@ def test_task_api_fields_match_db_and_ui_expectations(client: TestClient):
     assert db_fields.issubset(columns)
 
 
+def test_time_estimates_are_stored_and_recomputed_on_change(client: TestClient, monkeypatch):
+    calls = []
+
+    async def fake_batch(home, addresses):
+        addresses = list(addresses)
+        calls.append(addresses)
+        offset = 10 if home == "1 Old Rd" else 20
+        return {address: (offset, offset, "Drive") for address in addresses}
+
+    monkeypatch.setattr("app.estimates.estimate_travel_batch", fake_batch)
+    client.put("/locations/home", json={"name": "Home", "address": "1 Old Rd"})
+    job_id = client.post("/tasks", json={"title": "Gym", "location": "Gym", "duration_minutes": 30}).headers["X-Job-Id"]
+    other_id = client.post("/tasks", json={"title": "Pool", "location": "Pool"}).headers["X-Job-Id"]
+    _wait_for_job(client, job_id)
+    _wait_for_job(client, other_id)
+    calls.clear()
+
+    tasks = {task["title"]: task for task in client.get("/tasks").json()}
+    assert tasks["Gym"]["time_estimate_minutes"] == 50
+    assert calls == []
+
+    # only the edited task is recomputed, and only when an input changed
+    client.patch(f"/tasks/{tasks['Gym']['id']}", json={"priority": 5})
+    assert calls == []
+    updated = client.patch(f"/tasks/{tasks['Gym']['id']}", json={"duration_minutes": 60}).json()
+    assert updated["time_estimate_minutes"] == 80
+    assert calls == [["Gym"]]
+
+    # moving home refreshes every located task in one background pass
+    job_id = client.put("/locations/home", json={"name": "Home", "address": "2 New St"}).headers["X-Job-Id"]
+    _wait_for_job(client, job_id)
+    assert calls[-1] == ["Gym", "Pool"]
+    tasks = {task["title"]: task for task in client.get("/tasks").json()}
+    assert tasks["Gym"]["time_estimate_minutes"] == 100
+
+
 def test_reorder_tasks_updates_priorities(client: TestClient):
     client.put("/locations/home", json={"name": "HQ", "address": "100 Main St"})
     ids = []
@@ -258,6 +776,38 @@ def test_reorder_tasks_updates_priorities(client: TestClient):
     assert order_ids == new_order
 
 
+def test_reorder_endpoint_keeps_the_dragged_order(client: TestClient):
+    ids = [client.post("/tasks", json={"title": f"Task {n}", "priority": 3}).json()["id"] for n in range(10)]
+
+    short = [ids[2], ids[1], ids[0]]
+    resp = client.patch("/tasks/reorder", json={"ids": short})
+    assert resp.status_code == 200
+    assert [task["priority"] for task in resp.json()] == [3, 2, 1]
+
+    # past five rows priorities tie at the clamp; the stored position keeps the order
+    new_order = ids[::-1]
+    resp = client.patch("/tasks/reorder", json={"ids": new_order})
+    assert [task["id"] for task in resp.json()] == new_order
+    assert [task["id"] for task in client.get("/tasks").json()] == new_order
+
+    pages, cursor = [], None
+    while True:
+        page = client.get("/tasks", params={"limit": 3, **({"cursor": cursor} if cursor else {})})
+        pages.extend(task["id"] for task in page.json())
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert pages == new_order
+
+    planned = client.post("/plan/generate", json={"date": "2030-01-02", "engine": "greedy"}).json()
+    # the day fills in the dragged order, ties at the clamp included
+    blocks = [block["task_id"] for block in planned["blocks"]]
+    assert len(blocks) > 5 and blocks == new_order[: len(blocks)]
+
+    assert client.patch("/tasks/reorder", json={"ids": [ids[0], ids[0]]}).status_code == 400
+    assert client.patch("/tasks/reorder", json={"ids": [ids[0], 9999]}).status_code == 404
+
+
 def test_tasks_endpoint_returns_list(client: TestClient):
     response = client.get("/tasks")
     assert response.status_code == 200
@@ -265,3 +815,31 @@ def test_tasks_endpoint_returns_list(client: TestClient):
     assert isinstance(data, list)
     # Ensure list response matches expectation (UI expects array, not text)
     assert data == sorted(data, key=lambda t: -t["priority"])
+
+
+def test_metrics_expose_route_latency_queries_and_caches(client: TestClient):
+    from app import metrics
+
+    missing = metrics.http_requests.count(method="PATCH", route="/tasks/{task_id}", status="404")
+    unmatched = metrics.http_requests.count(method="GET", route="unmatched", status="404")
+    commits = metrics.db_commits.value()
+    client.post("/tasks", json={"title": "Metered"})
+    client.patch("/tasks/999999", json={"title": "Gone"})
+    client.get("/no/such/page")
+    assert metrics.http_requests.count(method="PATCH", route="/tasks/{task_id}", status="404") == missing + 1
+    assert metrics.http_requests.count(method="GET", route="unmatched", status="404") == unmatched + 1
+    assert metrics.db_commits.value() > commits
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'planner_http_request_duration_seconds_bucket{method="POST",route="/tasks",status="200",le="+Inf"}' in body
+    assert 'planner_http_requests_in_flight{method="GET"} 1' in body
+    assert 'planner_cache_hit_ratio{cache="place_search"}' in body
+    assert "# TYPE planner_cache_misses counter" in body
+    assert 'planner_cache_misses_total{cache="place_search"}' in body
+    queries = [
+        line for line in body.splitlines() if line.startswith('planner_http_request_db_queries_sum{route="/tasks"}')
+    ]
+    assert queries and float(queries[0].split()[-1]) > 0
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.places import DISTANCE_MATRIX_PATH, PLACES_SEARCH_PATH
+from bench.dataset import generate_rows
+from bench.fake_google import FakeGoogleConfig, create_app, travel_minutes
+from bench.run import percentile, summarize
+
+
+def test_fake_google_answers_matrix_and_search_deterministically():
+    client = TestClient(create_app(FakeGoogleConfig(latency_ms=0, jitter_ms=0)))
+    body = client.get(DISTANCE_MATRIX_PATH, params={"origins": "a|b", "destinations": "c|d|e"}).json()
+    assert [len(row["elements"]) for row in body["rows"]] == [3, 3]
+    assert body["rows"][1]["elements"][0]["duration"]["value"] == travel_minutes("b", "c") * 60
+
+    results = client.get(PLACES_SEARCH_PATH, params={"query": "Costco near 1 Home St"}).json()["results"]
+    assert results[0]["name"] == "Costco"
+    assert client.get("/_stats").json() == {"matrix": 1, "matrix_elements": 6, "places": 1}
+
+
+def test_fake_google_error_rate_fails_requests():
+    client = TestClient(create_app(FakeGoogleConfig(latency_ms=0, jitter_ms=0, error_rate=1.0)))
+    assert client.get(PLACES_SEARCH_PATH, params={"query": "CVS"}).status_code == 500
+
+
+def test_summary_reports_percentiles_and_rate():
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.5
+    result = summarize("list_tasks", 4, [i / 1000 for i in range(1, 101)], errors=2, seconds=0.5)
+    assert result.rps == 200.0
+    assert result.latency_ms["p50"] == 50.5
+    assert result.latency_ms["p99"] == 99.01
+    assert result.errors == 2
+
+
+def test_dataset_rows_are_reproducible():
+    now = datetime(2030, 1, 1)
+    rows = generate_rows(50, seed=3, now=now)
+    assert rows == generate_rows(50, seed=3, now=now)
+    assert any(row["location"] for row in rows)
@@ -0,0 +1,99 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database import Base, WriteSession, serialize_writes, tune_sqlite
+from app.models import Task
+
+
+@pytest.fixture()
+def sessions(tmp_path):
+    url = f"sqlite:///{tmp_path / 'planner.db'}"
+    write_engine = create_engine(url, connect_args={"check_same_thread": False})
+    read_engine = create_engine(url, connect_args={"check_same_thread": False})
+    tune_sqlite(write_engine)
+    tune_sqlite(read_engine, read_only=True)
+    Base.metadata.create_all(bind=write_engine)
+    writer = sessionmaker(bind=write_engine, autoflush=False)
+    serialize_writes(writer)
+    yield writer, sessionmaker(bind=read_engine)
+    write_engine.dispose()
+    read_engine.dispose()
+
+
+def test_engines_use_wal_and_read_sessions_cannot_write(sessions):
+    writer, reader = sessions
+    with writer() as db:
+        assert db.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert db.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    with reader() as db:
+        with pytest.raises(OperationalError, match="readonly"):
+            db.execute(text("DELETE FROM tasks"))
+
+
+def test_concurrent_writers_queue_instead_of_failing(sessions):
+    writer, reader = sessions
+
+    def add(n):
+        with writer() as db:
+            db.add(Task(title=f"Task {n}"))
+            db.flush()
+            # an open read snapshot must not block or be blocked by the writer
+            with reader() as read_db:
+                read_db.execute(text("SELECT count(*) FROM tasks")).scalar()
+            db.commit()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(add, range(40)))
+
+    with reader() as db:
+        assert db.query(Task).count() == 40
+
+
+def test_async_writers_queue_on_the_event_loop(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'planner.db'}"
+    async_engine = create_async_engine(url, poolclass=NullPool)
+    tune_sqlite(async_engine.sync_engine)
+    writer = async_sessionmaker(async_engine, sync_session_class=WriteSession, expire_on_commit=False)
+
+    async def add(n):
+        async with writer() as db:
+            db.add(Task(title=f"Task {n}"))
+            await db.flush()
+            assert isinstance(db.sync_session.info["writer"], asyncio.Lock)
+            # other writers are parked on the loop meanwhile, not on SQLITE_BUSY
+            await asyncio.sleep(0)
+            await db.commit()
+
+    async def run():
+        async with async_engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        await asyncio.gather(*(add(n) for n in range(40)))
+        async with writer() as db:
+            count = await db.scalar(select(func.count(Task.id)))
+        await async_engine.dispose()
+        return count
+
+    assert asyncio.run(run()) == 40
+
+
+def test_sync_writers_refuse_to_block_the_event_loop(sessions):
+    writer, _ = sessions
+
+    async def write_on_the_loop():
+        with writer() as db:
+            db.add(Task(title="Blocks the loop"))
+            db.commit()
+
+    with pytest.raises(RuntimeError, match="event loop"):
+        asyncio.run(write_on_the_loop())
+
+    with writer() as db:
+        db.add(Task(title="From a plain thread"))
+        db.commit()
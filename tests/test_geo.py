@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import geo, geocoding, places
+from app.config import settings
+from app.database import Base
+
+HOME = "1 Home St"
+COORDINATES = {
+    HOME: (37.7749, -122.4194),
+    "Costco - 450 10th St": (37.7706, -122.4113),
+    "Costco - 2300 Middlefield Rd": (37.4806, -122.2263),
+    "Target - 789 Mission St": (37.7843, -122.4036),
+}
+
+
+@pytest.fixture()
+def offline(monkeypatch, tmp_path):
+    # addresses missing from the settings are looked up in an empty geo_points table
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{tmp_path / 'geo.db'}"))
+    sessions = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'geo.db'}", poolclass=NullPool))
+    monkeypatch.setattr(geocoding, "AsyncSessionLocal", sessions)
+    geocoding.clear_memory()
+    monkeypatch.setattr(settings, "geo_provider", "offline")
+    monkeypatch.setattr(settings, "geo_coordinates", COORDINATES)
+
+    def no_network():
+        raise AssertionError("the offline provider must not open an HTTP client")
+
+    monkeypatch.setattr(places, "get_client", no_network)
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_haversine_matches_known_distance(monkeypatch, vectorized):
+    if not vectorized:
+        monkeypatch.setattr(geo, "np", None)
+    elif geo.np is None:
+        pytest.skip("numpy is not installed")
+    san_francisco, los_angeles = (37.7749, -122.4194), (34.0522, -118.2437)
+    distances = geo.haversine_km([san_francisco, los_angeles], [los_angeles])
+    assert distances[0][0] == pytest.approx(559.1, abs=0.5)
+    assert distances[1][0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_offline_estimates_use_stored_coordinates(offline):
+    estimates = asyncio.run(geo.estimate_travel_batch(HOME, ["Costco - 450 10th St", "Costco - 2300 Middlefield Rd", "Nowhere"]))
+    near, far = estimates["Costco - 450 10th St"], estimates["Costco - 2300 Middlefield Rd"]
+    assert near[0] == near[1] and near[0] < far[0]
+    assert far[2].endswith("(offline)")
+    assert "Nowhere" not in estimates
+
+    matrix = asyncio.run(geo.estimate_travel_matrix([HOME, "Target - 789 Mission St", "Nowhere"]))
+    assert set(matrix) == {(HOME, "Target - 789 Mission St"), ("Target - 789 Mission St", HOME)}
+
+
+def test_offline_speed_model_is_configurable(offline, monkeypatch):
+    monkeypatch.setattr(settings, "offline_overhead_minutes", 0)
+    monkeypatch.setattr(settings, "offline_detour_factor", 1.0)
+    monkeypatch.setattr(settings, "offline_speed_kmh", 60.0)
+    assert geo.drive_minutes(30.0) == 30
+    assert geo.drive_minutes(0.0) == 0
+
+
+def test_offline_search_returns_nearest_known_address(offline):
+    results = asyncio.run(geo.search_places("costco", HOME))
+    assert [result["address"] for result in results] == ["Costco - 450 10th St", "Costco - 2300 Middlefield Rd"]
+
+
+def test_auto_provider_falls_back_to_offline_without_a_key(monkeypatch):
+    monkeypatch.setattr(settings, "geo_provider", "auto")
+    monkeypatch.setattr(settings, "google_maps_api_key", None)
+    assert geo.get_provider().name == "offline"
+    monkeypatch.setattr(settings, "google_maps_api_key", "key")
+    assert geo.get_provider().name == "google"
+    monkeypatch.setattr(settings, "geo_provider", "carrier-pigeon")
+    with pytest.raises(ValueError):
+        geo.get_provider()
+
+
+def test_offline_index_is_built_once_per_setting(offline, monkeypatch):
+    provider = geo.get_provider()
+    calls = []
+    normalize = geo.normalize_address
+
+    def counting(address):
+        calls.append(address)
+        return normalize(address)
+
+    monkeypatch.setattr(geo, "normalize_address", counting)
+    asyncio.run(provider.coordinates([HOME]))
+    asyncio.run(provider.coordinates([HOME]))
+    assert len(calls) <= len(COORDINATES) + 2
+
+    monkeypatch.setattr(settings, "geo_coordinates", {"Elsewhere": (1.0, 2.0)})
+    assert asyncio.run(provider.coordinates(["elsewhere"])) == {"elsewhere": (1.0, 2.0)}
+
+
+def test_estimate_basis_changes_with_the_geo_provider(monkeypatch):
+    from app.estimates import estimate_basis
+    from app.models import Task
+
+    task = Task(title="Costco run", location="450 10th St", duration_minutes=30)
+    monkeypatch.setattr(settings, "geo_provider", "offline")
+    offline_basis = estimate_basis(task, HOME)
+    monkeypatch.setattr(settings, "geo_provider", "google")
+    assert estimate_basis(task, HOME) != offline_basis
@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import geo, geocoding, pipeline
+from app.database import Base
+from app.models import GeoPoint, Location, Task, TaskLocationSuggestion
+
+KNOWN = {
+    "1 Home St": (37.7749, -122.4194),
+    "Costco - 450 10th St": (37.7706, -122.4113),
+    "Target - 789 Mission St": (37.7843, -122.4036),
+}
+
+
+class FakeProvider:
+    name = "fake"
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+        self.failing: set[str] = set()
+
+    async def geocode(self, addresses):
+        self.calls.append(list(addresses))
+        return {
+            address: KNOWN.get(address.strip())
+            for address in addresses
+            if address not in self.failing
+        }
+
+    async def travel_batch(self, home_address, addresses):
+        return {}
+
+
+@pytest.fixture()
+def provider(monkeypatch, tmp_path):
+    db_path = tmp_path / "geo.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    sessions = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool),
+        expire_on_commit=False,
+    )
+    monkeypatch.setattr(geocoding, "AsyncSessionLocal", sessions)
+    monkeypatch.setattr(pipeline, "AsyncSessionLocal", sessions)
+    fake = FakeProvider()
+    monkeypatch.setattr(geo, "get_provider", lambda: fake)
+    geocoding.clear_memory()
+    fake.engine = engine
+    yield fake
+    geocoding.clear_memory()
+
+
+def test_each_normalized_address_is_geocoded_once(provider):
+    found = asyncio.run(geocoding.resolve(["1 Home St", "1  home st", "Nowhere"]))
+    assert found == {"1 Home St": KNOWN["1 Home St"], "1  home st": KNOWN["1 Home St"]}
+    assert provider.calls == [["1 Home St", "Nowhere"]]
+
+    # the miss is remembered too, and a cold memory tier is refilled from the table
+    geocoding.clear_memory()
+    assert asyncio.run(geocoding.resolve(["1 HOME ST", "Nowhere"])) == {"1 HOME ST": KNOWN["1 Home St"]}
+    assert len(provider.calls) == 1
+
+
+def test_failed_lookups_are_retried_and_expired_misses_asked_again(provider):
+    provider.failing.add("Target - 789 Mission St")
+    asyncio.run(geocoding.resolve(["Target - 789 Mission St", "Nowhere"]))
+    provider.failing.clear()
+    asyncio.run(geocoding.resolve(["Target - 789 Mission St", "Nowhere"]))
+    assert provider.calls[-1] == ["Target - 789 Mission St"]
+
+    with sessionmaker(bind=provider.engine)() as db:
+        db.execute(update(GeoPoint).values(resolved_at=datetime.utcnow() - timedelta(days=30)))
+        db.commit()
+    asyncio.run(geocoding.resolve(["Target - 789 Mission St", "Nowhere"]))
+    assert provider.calls[-1] == ["Nowhere"]
+
+
+def test_lookup_and_distances_never_call_the_provider(provider):
+    asyncio.run(geocoding.resolve(["1 Home St", "Costco - 450 10th St"]))
+    provider.calls.clear()
+
+    assert asyncio.run(geocoding.lookup(["Costco - 450 10th St", "Unseen"])) == {
+        "Costco - 450 10th St": KNOWN["Costco - 450 10th St"]
+    }
+    distances = asyncio.run(geocoding.distances_km("1 Home St", ["Costco - 450 10th St", "Unseen"]))
+    assert distances == {"Costco - 450 10th St": pytest.approx(0.9, abs=0.1)}
+    assert provider.calls == []
+
+
+def test_backfill_geocodes_every_stored_address(provider):
+    with sessionmaker(bind=provider.engine)() as db:
+        db.add(Location(name="Home", is_home=True, address="1 Home St"))
+        task = Task(title="Costco run", location="Costco - 450 10th St")
+        db.add(task)
+        db.flush()
+        db.add(TaskLocationSuggestion(task_id=task.id, label="Target", address="Target - 789 Mission St"))
+        db.commit()
+
+    asyncio.run(pipeline.run_geocode_backfill({}))
+    with sessionmaker(bind=provider.engine)() as db:
+        stored = set(db.scalars(select(GeoPoint.address)))
+    assert stored == {"1 home st", "costco - 450 10th st", "target - 789 mission st"}
+
+    asyncio.run(pipeline.run_geocode_backfill({}))
+    assert len(provider.calls) == 1
+
+
+def test_estimate_refresh_geocodes_the_new_home_first(provider):
+    with sessionmaker(bind=provider.engine)() as db:
+        db.add(Location(name="Home", is_home=True, address="1 Home St"))
+        db.add(Task(title="Costco run", location="Costco - 450 10th St"))
+        db.commit()
+
+    asyncio.run(pipeline.run_estimate_refresh({}))
+    assert provider.calls == [["1 Home St"], ["Costco - 450 10th St"]]
@@ -0,0 +1,54 @@
+import pytest
+
+from app.metrics import Counter, Gauge, Histogram, Registry, _Metric
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    calls = registry.register(Counter("calls", "Calls made.", ("api",)))
+    depth = registry.register(Gauge("depth", "Queue depth."))
+    latency = registry.register(Histogram("latency_seconds", "Latency.", ("api",), buckets=(0.1, 1.0)))
+
+    calls.inc(api='say "hi"')
+    calls.inc(2, api='say "hi"')
+    depth.set(4)
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value, api="places")
+
+    assert registry.render().splitlines() == [
+        "# HELP calls Calls made.",
+        "# TYPE calls counter",
+        'calls_total{api="say \\"hi\\""} 3',
+        "# HELP depth Queue depth.",
+        "# TYPE depth gauge",
+        "depth 4",
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{api="places",le="0.1"} 1',
+        'latency_seconds_bucket{api="places",le="1"} 2',
+        'latency_seconds_bucket{api="places",le="+Inf"} 3',
+        'latency_seconds_sum{api="places"} 3.55',
+        'latency_seconds_count{api="places"} 3',
+    ]
+
+
+def test_metrics_reject_mismatched_labels_and_duplicate_names():
+    registry = Registry()
+    counter = registry.register(Counter("calls", "Calls made.", ("api",)))
+    with pytest.raises(ValueError):
+        counter.inc(route="/tasks")
+    with pytest.raises(ValueError):
+        registry.register(Gauge("calls", "Again."))
+    with pytest.raises(TypeError):
+        _Metric("bare", "No samples.")
+
+
+def test_counter_mirrors_a_total_kept_elsewhere():
+    hits = Counter("cache_hits", "Cache hits.", ("tier",))
+    hits.set_total(7, tier="memory")
+    hits.set_total(9, tier="memory")
+    assert hits.render() == [
+        "# HELP cache_hits Cache hits.",
+        "# TYPE cache_hits counter",
+        'cache_hits_total{tier="memory"} 9',
+    ]
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.migrations import MIGRATIONS, applied_versions, migrate
+
+
+def test_fresh_database_gets_every_migration_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'planner.db'}")
+
+    assert migrate(engine, lock_path=tmp_path / "lock") == [m.version for m in MIGRATIONS]
+    assert migrate(engine, lock_path=tmp_path / "lock") == []
+    assert applied_versions(engine) == {m.version for m in MIGRATIONS}
+    assert "ix_plan_blocks_start_time" in {ix["name"] for ix in inspect(engine).get_indexes("plan_blocks")}
+
+
+def test_legacy_database_is_upgraded_in_place(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'planner.db'}")
+    with engine.begin() as connection:
+        # the tasks table as it was before estimates and inference status existed
+        connection.execute(
+            text(
+                "CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR(120), description TEXT, "
+                "priority INTEGER, duration_minutes INTEGER, location VARCHAR(120), due_date DATETIME, "
+                "status VARCHAR(9))"
+            )
+        )
+        connection.execute(text("INSERT INTO tasks (title) VALUES ('Keep me')"))
+
+    migrate(engine, lock_path=tmp_path / "lock")
+
+    columns = {column["name"] for column in inspect(engine).get_columns("tasks")}
+    assert {"time_estimate_minutes", "inference_status", "position"} <= columns
+    indexes = {index["name"] for index in inspect(engine).get_indexes("tasks")}
+    assert "ix_tasks_priority_position_id" in indexes and "ix_tasks_priority_id" not in indexes
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT title FROM tasks")).scalar() == "Keep me"
+
+
+def test_importing_the_app_touches_no_database(tmp_path):
+    data_dir = tmp_path / "data"
+    subprocess.run(
+        [sys.executable, "-c", "import app.main"],
+        cwd=Path(__file__).resolve().parent.parent,
+        env={"DATA_DIR": str(data_dir), "PATH": ""},
+        check=True,
+    )
+    assert not data_dir.exists()
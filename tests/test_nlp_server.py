@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import nlp
+from app.nlp_server import NLPServer
+
+
+class FakeEnt:
+    def __init__(self, text, label):
+        self.text = text
+        self.label_ = label
+
+
+class FakeNlp:
+    def __init__(self):
+        self.batches = []
+
+    def pipe(self, texts, batch_size):
+        texts = list(texts)
+        self.batches.append(texts)
+        for text in texts:
+            yield type("Doc", (), {"ents": [FakeEnt(text.split()[-1], "ORG")]})()
+
+
+@pytest.fixture()
+def sidecar(tmp_path):
+    fake = FakeNlp()
+    server = NLPServer(str(tmp_path / "nlp.sock"), fake, max_batch=64, max_wait=0.05)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result(timeout=5)
+    yield server, fake
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+
+
+def test_sidecar_micro_batches_concurrent_clients(sidecar):
+    server, fake = sidecar
+    client = nlp.SidecarClient(server.socket_path, timeout=5)
+    titles = [f"Errand {n} Store{n}" for n in range(8)]
+
+    with ThreadPoolExecutor(max_workers=len(titles)) as pool:
+        results = list(pool.map(lambda title: client.extract([title]), titles))
+
+    assert results == [[[(f"Store{n}", "ORG")]] for n in range(8)]
+    assert sum(len(batch) for batch in fake.batches) == len(titles)
+    assert server.batches_run < len(titles)
+
+
+def test_extract_entities_uses_configured_sidecar(sidecar, monkeypatch):
+    server, fake = sidecar
+    monkeypatch.setattr(nlp.settings, "nlp_socket_path", server.socket_path)
+    nlp.get_sidecar.cache_clear()
+    monkeypatch.setattr(nlp, "get_nlp", lambda: pytest.fail("model must not load in-process"))
+    try:
+        assert nlp.extract_entities(["Milk at Safeway", "Call mom"]) == [[("Safeway", "ORG")], [("mom", "ORG")]]
+    finally:
+        nlp.get_sidecar.cache_clear()
+
+
+def test_extract_entities_skips_model_when_sidecar_is_down(tmp_path, monkeypatch):
+    monkeypatch.setattr(nlp.settings, "nlp_socket_path", str(tmp_path / "missing.sock"))
+    nlp.get_sidecar.cache_clear()
+    monkeypatch.setattr(nlp, "get_nlp", lambda: pytest.fail("model must not load in-process"))
+    try:
+        assert nlp.extract_entities(["Milk at Safeway"]) is None
+    finally:
+        nlp.get_sidecar.cache_clear()
@@ -0,0 +1,263 @@
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import metrics, place_cache, places, travel_cache
+from app.config import settings
+from app.database import Base
+from app.models import PlaceSearchEntry, TravelTimeEntry
+
+
+DB_PATH = Path(tempfile.mkdtemp()) / "cache.db"
+engine = create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+# each asyncio.run() below is a fresh event loop, so async connections are not pooled
+TestingAsyncSessionLocal = async_sessionmaker(
+    create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}", poolclass=NullPool),
+    expire_on_commit=False,
+)
+
+
+def _matrix_response(minutes: int, params) -> httpx.Response:
+    origins = params["origins"].split("|")
+    destinations = params["destinations"].split("|")
+    element = {
+        "status": "OK",
+        "duration": {"value": minutes * 60, "text": f"{minutes} mins"},
+    }
+    payload = {"rows": [{"elements": [element for _ in destinations]} for _ in origins]}
+    return httpx.Response(200, json=payload)
+
+
+@pytest.fixture()
+def cache_db(monkeypatch):
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(travel_cache, "AsyncSessionLocal", TestingAsyncSessionLocal)
+    monkeypatch.setattr(place_cache, "AsyncSessionLocal", TestingAsyncSessionLocal)
+    monkeypatch.setattr(settings, "google_maps_api_key", "test-key")
+    travel_cache.clear_memory()
+    place_cache.clear_memory()
+    yield
+    travel_cache.clear_memory()
+    place_cache.clear_memory()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _use_transport(monkeypatch, handler) -> None:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(places, "_client", client)
+
+
+def _estimate(home: str, address: str):
+    return asyncio.run(places.estimate_travel_segments(home, address))
+
+
+def test_travel_segments_are_cached_across_calls(cache_db, monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params)
+        return _matrix_response(12, request.url.params)
+
+    _use_transport(monkeypatch, handler)
+
+    first = _estimate("1 Home St", "Costco")
+    second = _estimate("1  home st", "COSTCO")
+
+    assert first == (12, 12, "12 mins")
+    assert second == first
+    # one outbound and one return request, then nothing
+    assert len(calls) == 2
+
+
+def test_travel_cache_survives_memory_eviction(cache_db, monkeypatch):
+    _use_transport(monkeypatch, lambda request: _matrix_response(7, request.url.params))
+    _estimate("1 Home St", "Target")
+
+    travel_cache.clear_memory()
+
+    def fail(request: httpx.Request) -> httpx.Response:
+        raise AssertionError("should be served from SQLite")
+
+    _use_transport(monkeypatch, fail)
+    assert _estimate("1 Home St", "Target")[0] == 7
+
+
+def test_travel_batch_dedupes_and_chunks_destinations(cache_db, monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params)
+        return _matrix_response(9, request.url.params)
+
+    _use_transport(monkeypatch, handler)
+
+    addresses = [f"{n} Market St" for n in range(30)] + ["0 market st", "1 MARKET ST"]
+    estimates = asyncio.run(places.estimate_travel_batch("1 Home St", addresses))
+
+    assert set(estimates) == set(addresses)
+    assert estimates["0 market st"] == (9, 9, "9 mins")
+    # 30 unique addresses -> 2 chunks outbound + 2 chunks return
+    assert len(calls) == 4
+    assert max(len(call["destinations"].split("|")) for call in calls) == places.DISTANCE_MATRIX_MAX_ADDRESSES
+
+
+def test_travel_legs_are_read_and_written_in_chunks(cache_db, monkeypatch):
+    monkeypatch.setattr(travel_cache, "_QUERY_CHUNK", 3)
+    keys = [("1 home st", f"{n} market st", settings.travel_mode) for n in range(8)]
+
+    asyncio.run(travel_cache.put_legs({key: (n, f"{n} mins") for n, key in enumerate(keys)}))
+    travel_cache.clear_memory()
+    # a second write updates the stored rows found across every chunk
+    asyncio.run(travel_cache.put_legs({key: (n + 1, None) for n, key in enumerate(keys)}))
+    travel_cache.clear_memory()
+
+    legs = asyncio.run(travel_cache.get_legs(keys))
+    assert [legs[key].minutes for key in keys] == list(range(1, 9))
+    with TestingSessionLocal() as db:
+        assert db.query(TravelTimeEntry).count() == len(keys)
+
+
+def test_stale_travel_entry_is_served_while_revalidating(cache_db, monkeypatch):
+    stale_at = datetime.utcnow() - timedelta(seconds=settings.travel_cache_ttl_seconds + 60)
+    with TestingSessionLocal() as db:
+        for origin, destination in [("1 home st", "cvs"), ("cvs", "1 home st")]:
+            db.add(
+                TravelTimeEntry(
+                    origin=origin,
+                    destination=destination,
+                    mode=settings.travel_mode,
+                    minutes=30,
+                    summary="30 mins",
+                    fetched_at=stale_at,
+                )
+            )
+        db.commit()
+
+    refreshed = []
+    monkeypatch.setattr(travel_cache, "revalidate", lambda keys, fetch: refreshed.extend(keys))
+
+    assert _estimate("1 Home St", "CVS")[:2] == (30, 30)
+    assert ("1 home st", "cvs", settings.travel_mode) in refreshed
+    assert len(refreshed) == 2
+
+
+def test_places_searches_share_one_client_concurrently(cache_db, monkeypatch):
+    async def run():
+        in_flight = 0
+        peak = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.05)
+            in_flight -= 1
+            query = request.url.params["query"]
+            return httpx.Response(200, json={"results": [{"name": query, "formatted_address": "1 Elm"}]})
+
+        monkeypatch.setattr(places, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        results = await asyncio.gather(*(places.search_places(q, "1 Home St") for q in ["Costco", "CVS", "Target"]))
+        return results, peak
+
+    results, peak = asyncio.run(run())
+    assert [r[0]["name"] for r in results] == ["Costco near 1 Home St", "CVS near 1 Home St", "Target near 1 Home St"]
+    assert peak == 3
+
+
+def test_place_search_cache_folds_case_and_punctuation(cache_db, monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params["query"])
+        return httpx.Response(200, json={"results": [{"name": "Trader Joe's", "formatted_address": "9 Elm"}]})
+
+    _use_transport(monkeypatch, handler)
+
+    for query in ["Trader Joe's", "trader joes", "  TRADER   JOE'S!"]:
+        results = asyncio.run(places.search_places(query, "1 Home St"))
+        assert results == [{"name": "Trader Joe's", "address": "9 Elm"}]
+    assert len(calls) == 1
+
+    place_cache.clear_memory()
+    asyncio.run(places.search_places("trader joe's", "1 home st"))
+    assert len(calls) == 1
+    assert place_cache.stats()["db_hits"] == 1
+
+
+def test_place_search_cache_expires_and_evicts(cache_db, monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params["query"])
+        return httpx.Response(200, json={"results": []})
+
+    _use_transport(monkeypatch, handler)
+    monkeypatch.setattr(settings, "place_cache_max_rows", 2)
+
+    for query in ["Costco", "CVS", "Target"]:
+        asyncio.run(places.search_places(query, "1 Home St"))
+    with TestingSessionLocal() as db:
+        assert sorted(e.query for e in db.query(PlaceSearchEntry)) == ["cvs", "target"]
+
+    monkeypatch.setattr(settings, "place_cache_ttl_seconds", 0)
+    place_cache.clear_memory()
+    asyncio.run(places.search_places("CVS", "1 Home St"))
+    assert len(calls) == 4
+    assert place_cache.stats()["misses"] == 1
+
+
+def test_place_search_errors_are_not_cached(cache_db, monkeypatch):
+    statuses = ["OVER_QUERY_LIMIT", "REQUEST_DENIED", "INVALID_REQUEST", "OK"]
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = statuses[len(calls)]
+        calls.append(status)
+        results = [{"name": "Costco", "formatted_address": "450 10th St"}] if status == "OK" else []
+        return httpx.Response(200, json={"status": status, "results": results})
+
+    _use_transport(monkeypatch, handler)
+    for _ in range(3):
+        assert asyncio.run(places.search_places("Costco", "1 Home St")) == []
+    found = [{"name": "Costco", "address": "450 10th St"}]
+    assert asyncio.run(places.search_places("Costco", "1 Home St")) == found
+    assert asyncio.run(places.search_places("Costco", "1 Home St")) == found
+    assert calls == statuses
+
+
+def test_geocode_resolves_each_address_once_and_tells_misses_from_failures(cache_db, monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        address = request.url.params["address"]
+        calls.append(address)
+        if address == "Nowhere":
+            return httpx.Response(200, json={"status": "ZERO_RESULTS", "results": []})
+        if address == "Flaky":
+            return httpx.Response(200, json={"status": "OVER_QUERY_LIMIT", "results": []})
+        return httpx.Response(200, json={"results": [{"geometry": {"location": {"lat": 37.5, "lng": -122.25}}}]})
+
+    _use_transport(monkeypatch, handler)
+    outcomes = ("ok", "zero_results", "over_query_limit")
+    before = {outcome: metrics.google_requests.count(api="geocode", outcome=outcome) for outcome in outcomes}
+    found = asyncio.run(places.geocode_addresses(["1 Elm", "Nowhere", "Flaky", "1 Elm"]))
+    assert found == {"1 Elm": (37.5, -122.25), "Nowhere": None}
+    assert sorted(calls) == ["1 Elm", "Flaky", "Nowhere"]
+    for outcome, count in before.items():
+        assert metrics.google_requests.count(api="geocode", outcome=outcome) == count + 1
+
+
+def test_non_json_response_is_recorded_and_treated_as_a_failure(cache_db, monkeypatch):
+    _use_transport(monkeypatch, lambda request: httpx.Response(200, text="<html>maintenance</html>"))
+    before = metrics.google_requests.count(api="geocode", outcome="invalid_json")
+    assert asyncio.run(places.geocode_addresses(["1 Elm"])) == {}
+    assert metrics.google_requests.count(api="geocode", outcome="invalid_json") == before + 1
@@ -0,0 +1,76 @@
+import pstats
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.config import settings
+from app.main import app as planner_app
+
+
+def _busy(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+@pytest.fixture()
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    monkeypatch.setattr(settings, "profiling_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "profiling_token", None)
+
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+    @app.post("/work/{size}")
+    async def work(size: int):
+        return {"total": _busy(size)}
+
+    return TestClient(app)
+
+
+def test_header_captures_a_loadable_profile(client):
+    assert "x-profile-id" not in client.post("/work/10").headers
+    assert not settings.profiles_dir.exists()
+
+    response = client.post("/work/10000", headers={"X-Profile": "1"})
+    capture_id = response.headers["x-profile-id"]
+    [capture] = profiling.recent_captures(10)
+    assert capture["id"] == capture_id
+    assert (capture["method"], capture["route"]) == ("POST", "/work/{size}")
+
+    stats = pstats.Stats(str(profiling.capture_path(capture_id)))
+    assert any(function == "_busy" for _, _, function in stats.stats)
+
+
+def test_token_sampling_and_retention(client, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_token", "s3cret")
+    assert "x-profile-id" not in client.post("/work/1", headers={"X-Profile": "1"}).headers
+    assert "x-profile-id" in client.post("/work/1", headers={"X-Profile": "s3cret"}).headers
+
+    monkeypatch.setattr(settings, "profiling_sample_rate", 1.0)
+    monkeypatch.setattr(settings, "profiling_max_files", 2)
+    ids = [client.post("/work/1").headers["x-profile-id"] for _ in range(3)]
+    assert [capture["id"] for capture in profiling.recent_captures(10)] == ids[::-1][:2]
+
+
+def test_capture_endpoints_need_the_header_and_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_token", "s3cret")
+    allowed = {"X-Profile": "s3cret"}
+    capture_id = client.post("/work/1", headers=allowed).headers["x-profile-id"]
+    planner = TestClient(planner_app)
+
+    listed = planner.get("/profiles", headers=allowed).json()
+    assert [row["id"] for row in listed] == [capture_id]
+    download = planner.get(f"/profiles/{capture_id}", headers=allowed)
+    assert download.content == profiling.capture_path(capture_id).read_bytes()
+    assert planner.get("/profiles/..%2Fplanner.db", headers=allowed).status_code == 404
+
+    for headers in ({}, {"X-Profile": "1"}):
+        assert planner.get("/profiles", headers=headers).status_code == 404
+        assert planner.get(f"/profiles/{capture_id}", headers=headers).status_code == 404
+
+    monkeypatch.setattr(settings, "profiling_enabled", False)
+    assert planner.get("/profiles", headers=allowed).status_code == 404
+    assert planner.get(f"/profiles/{capture_id}", headers=allowed).status_code == 404
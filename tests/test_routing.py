@@ -0,0 +1,95 @@
+import math
+import random
+import time
+
+from app.routing import Stop, plan_route, simulate
+
+
+def _line_matrix(positions):
+    return [[abs(a - b) for b in positions] for a in positions]
+
+
+def test_route_orders_stops_to_minimize_travel():
+    # home at 0, stores strung along one road
+    matrix = _line_matrix([0, 10, 20, 30])
+    stops = [
+        Stop(task_id=3, node=3, duration=15, priority=5),
+        Stop(task_id=1, node=1, duration=15, priority=4),
+        Stop(task_id=2, node=2, duration=15, priority=3),
+    ]
+
+    route = plan_route(stops, matrix, horizon=480)
+
+    # one sweep out and back; either direction is optimal
+    assert [visit.stop.task_id for visit in route] in ([1, 2, 3], [3, 2, 1])
+    assert simulate([visit.stop for visit in route], matrix, 480) == (True, 60, 105)
+
+
+def test_route_respects_deadlines_and_skips_what_cannot_fit():
+    matrix = _line_matrix([0, 30, 5])
+    stops = [
+        Stop(task_id=1, node=1, duration=60, priority=5),
+        Stop(task_id=2, node=2, duration=30, priority=1, deadline=40),
+        Stop(task_id=3, node=None, duration=400, priority=4),
+        Stop(task_id=4, node=None, duration=60, priority=2),
+    ]
+
+    route = plan_route(stops, matrix, horizon=240)
+    by_id = {visit.stop.task_id: visit for visit in route}
+
+    assert set(by_id) == {1, 2, 4}
+    assert by_id[2].end <= 40
+    ok, _, finish = simulate([visit.stop for visit in route], matrix, 240)
+    assert ok and finish <= 240
+
+
+def test_overdue_stops_are_placed_before_higher_priority_ones():
+    matrix = _line_matrix([0])
+    stops = [
+        Stop(task_id=1, node=None, duration=60, priority=5),
+        Stop(task_id=2, node=None, duration=60, priority=1, overdue=True),
+    ]
+
+    route = plan_route(stops, matrix, horizon=90)
+
+    assert [visit.stop.task_id for visit in route] == [2]
+
+
+def test_position_breaks_priority_ties_before_task_id():
+    matrix = _line_matrix([0])
+    stops = [
+        Stop(task_id=1, node=None, duration=60, priority=3, position=1),
+        Stop(task_id=2, node=None, duration=60, priority=3, position=0),
+    ]
+
+    route = plan_route(stops, matrix, horizon=90)
+
+    # only one fits, so the manually ordered first task wins the slot
+    assert [visit.stop.task_id for visit in route] == [2]
+
+
+def test_hundreds_of_candidates_plan_within_budget():
+    rng = random.Random(7)
+    points = [(0.0, 0.0)] + [(rng.uniform(-15, 15), rng.uniform(-15, 15)) for _ in range(40)]
+    matrix = [[round(math.dist(a, b) * 2) for b in points] for a in points]
+    stops = [
+        Stop(
+            task_id=index,
+            node=rng.choice([None, *range(1, len(points))]),
+            duration=rng.choice([15, 20, 30, 45]),
+            priority=rng.randint(1, 5),
+            deadline=rng.choice([None, None, None, rng.randint(120, 480)]),
+        )
+        for index in range(300)
+    ]
+
+    began = time.perf_counter()
+    route = plan_route(stops, matrix, horizon=480, time_budget=0.05)
+    elapsed = time.perf_counter() - began
+
+    assert route
+    ok, _, _ = simulate([visit.stop for visit in route], matrix, 480)
+    assert ok
+    assert all(v.stop.deadline is None or v.end <= v.stop.deadline for v in route)
+    # generous bound for slow CI machines; typically well under 100 ms
+    assert elapsed < 0.5